@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Hotel, HotelAdmin as HotelAdminModel, HotelStaff
+from app.core.versions import bump_on_commit
 
 
 @admin.register(Hotel)
@@ -70,11 +71,13 @@ class HotelModelAdmin(admin.ModelAdmin):
 
     def set_plan_starter(self, request, queryset):
         updated = queryset.update(plan_name="starter")
+        bump_on_commit(*queryset.values_list('id', flat=True))
         self.message_user(request, f"{updated} hoteles configurados al plan Starter")
     set_plan_starter.short_description = "Establecer plan: Starter"
 
     def set_plan_grow(self, request, queryset):
         updated = queryset.update(plan_name="grow")
+        bump_on_commit(*queryset.values_list('id', flat=True))
         self.message_user(request, f"{updated} hoteles configurados al plan Grow")
     set_plan_grow.short_description = "Establecer plan: Grow"
 
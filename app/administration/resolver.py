@@ -0,0 +1,225 @@
+"""
+Resolución del hotel (tenant) de cada petición.
+
+Casi todas las vistas /h/<slug>/... y /panel/<slug>/... empiezan buscando el
+hotel por slug, y los listados aceptan ?hotel=<id|slug>. Este módulo mantiene
+una LRU por proceso con los hoteles ya resueltos (por slug y por id) para que
+esas búsquedas no lleguen a la base de datos:
+
+- HotelResolverMiddleware deja el hotel de la URL en request.hotel;
+- get_request_hotel / resolve_hotel sirven a las vistas que reciben el hotel
+  por parámetro (aget_request_hotel / aresolve_hotel a las vistas async: un
+  acierto en la LRU no sale del event loop y un fallo usa el ORM asíncrono);
+- las señales post_save/post_delete de Hotel (ver signals.py) invalidan la
+  LRU de este proceso; en los demás procesos cada entrada vive como máximo
+  HOTEL_RESOLVER_TTL segundos.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .models import Hotel
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL = 60
+
+
+class HotelLRU:
+    """LRU de hoteles con expiración por entrada; segura entre hilos"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Copias al guardar y al leer: una vista que modifique el hotel sin guardarlo no ensucia la caché
+        return copy.copy(entry[1])
+
+    def put(self, hotel, *extra_keys):
+        expires = time.monotonic() + self.ttl
+        hotel = copy.copy(hotel)
+        with self._lock:
+            for key in (('id', hotel.pk), ('slug', hotel.slug), *extra_keys):
+                self._entries[key] = (expires, hotel)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, hotel_id):
+        """Quita todas las claves que apuntan al hotel y la del hotel por defecto"""
+        with self._lock:
+            stale = [key for key, (_, hotel) in self._entries.items() if hotel.pk == hotel_id or key == ('default',)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+hotel_cache = HotelLRU(
+    maxsize=getattr(settings, 'HOTEL_RESOLVER_MAXSIZE', DEFAULT_MAXSIZE),
+    ttl=getattr(settings, 'HOTEL_RESOLVER_TTL', DEFAULT_TTL),
+)
+
+
+def get_hotel_by_slug(slug):
+    """Hotel por slug (None si no existe)"""
+    if not slug:
+        return None
+    hotel = hotel_cache.get(('slug', slug))
+    if hotel is None:
+        hotel = Hotel.objects.filter(slug=slug).first()
+        if hotel is not None:
+            hotel_cache.put(hotel)
+    return hotel
+
+
+def get_hotel_by_id(hotel_id):
+    """Hotel por id (None si no existe)"""
+    hotel = hotel_cache.get(('id', hotel_id))
+    if hotel is None:
+        hotel = Hotel.objects.filter(pk=hotel_id).first()
+        if hotel is not None:
+            hotel_cache.put(hotel)
+    return hotel
+
+
+async def aget_hotel_by_slug(slug):
+    """Versión asíncrona de get_hotel_by_slug"""
+    if not slug:
+        return None
+    hotel = hotel_cache.get(('slug', slug))
+    if hotel is None:
+        hotel = await Hotel.objects.filter(slug=slug).afirst()
+        if hotel is not None:
+            hotel_cache.put(hotel)
+    return hotel
+
+
+async def aget_hotel_by_id(hotel_id):
+    """Versión asíncrona de get_hotel_by_id"""
+    hotel = hotel_cache.get(('id', hotel_id))
+    if hotel is None:
+        hotel = await Hotel.objects.filter(pk=hotel_id).afirst()
+        if hotel is not None:
+            hotel_cache.put(hotel)
+    return hotel
+
+
+def resolve_hotel(value):
+    """Resuelve un hotel por id o slug, como los parámetros ?hotel= de los listados"""
+    if value in (None, ''):
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        hotel = get_hotel_by_id(int(value))
+        if hotel is not None:
+            return hotel
+    return get_hotel_by_slug(value)
+
+
+async def aresolve_hotel(value):
+    """Versión asíncrona de resolve_hotel"""
+    if value in (None, ''):
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        hotel = await aget_hotel_by_id(int(value))
+        if hotel is not None:
+            return hotel
+    return await aget_hotel_by_slug(value)
+
+
+def get_default_hotel():
+    """Primer hotel por id: hotel por defecto cuando la petición no indica ninguno"""
+    hotel = hotel_cache.get(('default',))
+    if hotel is None:
+        hotel = Hotel.objects.order_by('id').first()
+        if hotel is not None:
+            hotel_cache.put(hotel, ('default',))
+    return hotel
+
+
+async def aget_default_hotel():
+    """Versión asíncrona de get_default_hotel"""
+    hotel = hotel_cache.get(('default',))
+    if hotel is None:
+        hotel = await Hotel.objects.order_by('id').afirst()
+        if hotel is not None:
+            hotel_cache.put(hotel, ('default',))
+    return hotel
+
+
+def get_request_hotel(request, hotel_slug):
+    """
+    Hotel del slug de la URL, reutilizando request.hotel si el middleware ya lo
+    resolvió. Lanza Hotel.DoesNotExist si no existe (igual que Hotel.objects.get).
+    """
+    hotel = getattr(request, 'hotel', None)
+    if hotel is None or hotel.slug != hotel_slug:
+        hotel = get_hotel_by_slug(hotel_slug)
+    if hotel is None:
+        raise Hotel.DoesNotExist(f'Hotel {hotel_slug} no encontrado')
+    return hotel
+
+
+async def aget_request_hotel(request, hotel_slug):
+    """Versión asíncrona de get_request_hotel"""
+    hotel = getattr(request, 'hotel', None)
+    if hotel is None or hotel.slug != hotel_slug:
+        hotel = await aget_hotel_by_slug(hotel_slug)
+    if hotel is None:
+        raise Hotel.DoesNotExist(f'Hotel {hotel_slug} no encontrado')
+    return hotel
+
+
+class HotelResolverMiddleware:
+    """
+    Deja en request.hotel el hotel del parámetro hotel_slug de la URL (o None).
+
+    Admite los dos modos: bajo ASGI no obliga a Django a pasar las vistas
+    async por un hilo. process_view es síncrono (Django lo adapta) y casi
+    siempre se resuelve con la LRU.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.hotel = None
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.hotel = None
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        hotel_slug = view_kwargs.get('hotel_slug')
+        if hotel_slug:
+            request.hotel = get_hotel_by_slug(hotel_slug)
+        return None
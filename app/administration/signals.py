@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
-from .models import HotelAdmin, HotelStaff
+from .models import Hotel, HotelAdmin, HotelStaff
+from .resolver import hotel_cache
 
 
 @receiver(post_save, sender=HotelAdmin)
@@ -14,4 +16,12 @@ def ensure_admin_has_no_staff(sender, instance, **kwargs):
 def prevent_staff_if_admin(sender, instance, **kwargs):
     # Si el usuario es admin de algún hotel, no puede ser staff
     if HotelAdmin.objects.filter(user=instance.user).exists():
-        raise ValidationError('El usuario es admin de un hotel y no puede ser staff')
\ No newline at end of file
+        raise ValidationError('El usuario es admin de un hotel y no puede ser staff')
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def discard_resolved_hotel(sender, instance, **kwargs):
+    # Ya y tras el commit: una petición concurrente podría volver a cargar la versión anterior
+    hotel_cache.discard(instance.pk)
+    transaction.on_commit(lambda: hotel_cache.discard(instance.pk))
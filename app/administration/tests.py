@@ -1,3 +1,62 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Hotel
+from .resolver import HotelResolverMiddleware, get_default_hotel, hotel_cache, resolve_hotel
+
+
+class HotelResolverTestCase(TestCase):
+    """Tests de la resolución del hotel por petición con la LRU del proceso"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.other = Hotel.objects.create(name='Hotel Otro', slug='hotel-otro')
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+
+    def test_middleware_attaches_hotel(self):
+        middleware = HotelResolverMiddleware(lambda request: None)
+        request = RequestFactory().get('/')
+        middleware(request)
+        self.assertIsNone(request.hotel)
+        middleware.process_view(request, None, (), {'hotel_slug': self.hotel.slug})
+        self.assertEqual(request.hotel, self.hotel)
+
+    def test_resolved_once_per_process(self):
+        url = reverse('client_index_hotel', args=[self.hotel.slug])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Segunda petición: ni el hotel ni la página tocan la base de datos
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['hotel'], self.hotel)
+        self.assertGreaterEqual(hotel_cache.hits, 1)
+
+    def test_resolve_by_id_or_slug(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(resolve_hotel(self.other.id), self.other)
+            self.assertEqual(resolve_hotel('hotel-test'), self.hotel)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_hotel(str(self.other.id)), self.other)
+            self.assertEqual(resolve_hotel('hotel-otro'), self.other)
+            self.assertIsNone(resolve_hotel(''))
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(resolve_hotel('hotel-test').name, 'Hotel Test')
+        self.assertEqual(get_default_hotel(), self.hotel)
+
+        self.hotel.name = 'Hotel Renombrado'
+        self.hotel.save()
+        self.assertEqual(resolve_hotel('hotel-test').name, 'Hotel Renombrado')
+
+        self.hotel.delete()
+        self.assertIsNone(resolve_hotel('hotel-test'))
+        self.assertEqual(get_default_hotel(), self.other)
+        self.assertEqual(self.client.get(reverse('client_index_hotel', args=['hotel-test'])).status_code, 404)
+
+    def test_cached_hotel_is_a_copy(self):
+        resolve_hotel('hotel-test').name = 'Sin guardar'
+        self.assertEqual(resolve_hotel('hotel-test').name, 'Hotel Test')
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingTransitionLog
+from .state import TRANSITIONS, bulk_transition
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -56,30 +57,41 @@ class BookingAdmin(admin.ModelAdmin):
             pass
         super().save_model(request, obj, form, change)
     
+    def _bulk_transition(self, request, queryset, name):
+        """Aplica la transición a la selección con un update() (ver app/bookings/state.py)"""
+        result = bulk_transition(queryset, name, user=request.user)
+        message = f'{result["updated"]} reservas fueron {TRANSITIONS[name].label}.'
+        if result['skipped']:
+            message += f' {len(result["skipped"])} omitidas por su estado actual.'
+        self.message_user(request, message)
+
     def confirm_bookings(self, request, queryset):
         """Acción para confirmar múltiples reservas"""
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f'{updated} reservas fueron confirmadas.')
+        self._bulk_transition(request, queryset, 'confirm')
     confirm_bookings.short_description = "Confirmar reservas seleccionadas"
     
     def cancel_bookings(self, request, queryset):
         """Acción para cancelar múltiples reservas"""
-        updated = queryset.filter(status__in=['pending', 'confirmed']).update(status='cancelled')
-        self.message_user(request, f'{updated} reservas fueron canceladas.')
+        self._bulk_transition(request, queryset, 'cancel')
     cancel_bookings.short_description = "Cancelar reservas seleccionadas"
 
     def mark_as_paid(self, request, queryset):
         """Acción para marcar reservas como pagadas"""
-        updated_count = 0
-        for booking in queryset:
-            try:
-                booking.payment_status = 'paid'
-                # Si existe total_price, considerar como monto pagado
-                if getattr(booking, 'total_price', None) is not None:
-                    booking.paid_amount = booking.total_price
-                booking.save(update_fields=['payment_status', 'paid_amount', 'updated_at'])
-                updated_count += 1
-            except Exception:
-                continue
-        self.message_user(request, f'{updated_count} reservas marcadas como pagadas.')
+        self._bulk_transition(request, queryset, 'mark_paid')
     mark_as_paid.short_description = "Marcar como pagadas"
+
+
+@admin.register(BookingTransitionLog)
+class BookingTransitionLogAdmin(admin.ModelAdmin):
+    """
+    Auditoría de transiciones de reservas (solo lectura)
+    """
+    list_display = ['created_at', 'transition', 'to_value', 'count', 'hotel', 'user']
+    list_filter = ['transition', 'hotel']
+    readonly_fields = ['transition', 'field', 'to_value', 'booking_ids', 'count', 'hotel', 'user', 'reason', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
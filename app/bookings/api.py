@@ -1,13 +1,18 @@
 from ninja import Router, Schema
+from ninja.errors import HttpError
 from typing import Optional
-from datetime import date
+from datetime import date, timedelta
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
 from .models import Booking
-from app.clients.models import Client
-from app.rooms.models import Room
+from .occupancy import hotel_grid
+from .services import BookingService, split_full_name
+from app.administration.models import Hotel, HotelAdmin, HotelStaff
 from app.core.services import EmailService
+from app.core.versions import not_modified
 
 router = Router()
 
@@ -41,181 +46,37 @@ def create_booking_with_client(request, payload: CreateBookingRequest):
         Información de la reserva creada
     """
     try:
-        with transaction.atomic():
-            # Inicializar variables
-            created = False
-            
-            # Validaciones básicas
-            if payload.fecha_inicio >= payload.fecha_fin:
-                return {
-                    "success": False,
-                    "message": "La fecha de inicio debe ser anterior a la fecha de fin",
-                    "booking_id": None,
-                    "client_id": None,
-                    "total_price": None
-                }
-            
-            # Verificar que la habitación existe
-            try:
-                # Bloqueo de fila para evitar doble reserva en bases que lo soportan
-                room = Room.objects.select_for_update().get(id=payload.habitacion_id)
-            except Room.DoesNotExist:
-                return {
-                    "success": False,
-                    "message": "La habitación especificada no existe",
-                    "booking_id": None,
-                    "client_id": None,
-                    "total_price": None
-                }
-            
-            # Verificar que la habitación esté disponible
-            if not room.available_for_booking:
-                return {
-                    "success": False,
-                    "message": "La habitación no está disponible para reservas",
-                    "booking_id": None,
-                    "client_id": None,
-                    "total_price": None
-                }
-            
-            # Verificar que no haya reservas superpuestas
-            conflicting_bookings = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                check_in_date__lt=payload.fecha_fin,
-                check_out_date__gt=payload.fecha_inicio
-            )
-            
-            if conflicting_bookings.select_for_update().exists():
-                return {
-                    "success": False,
-                    "message": "La habitación no está disponible para las fechas solicitadas",
-                    "booking_id": None,
-                    "client_id": None,
-                    "total_price": None
-                }
-            
-            # Buscar cliente por email o DNI
-            try:
-                # Primero intentar buscar por email
-                client = Client.objects.get(email=payload.email)
-                client_found_by_email = True
-            except Client.DoesNotExist:
-                try:
-                    # Si no existe por email, buscar por DNI
-                    client = Client.objects.get(dni=payload.dni)
-                    client_found_by_email = False
-                except Client.DoesNotExist:
-                    # Si no existe por ninguno, crear nuevo cliente
-                    client = Client.objects.create(
-                        first_name=payload.nombre.split()[0] if payload.nombre else '',
-                        last_name=' '.join(payload.nombre.split()[1:]) if len(payload.nombre.split()) > 1 else '',
-                        email=payload.email,
-                        phone=payload.telefono,
-                        dni=payload.dni,
-                    )
-                    client_found_by_email = False
-                    created = True
-            
-            # Si el cliente ya existía, actualizar datos si es necesario
-            if not created:
-                updated = False
-                
-                # Actualizar email si es diferente y no está en uso
-                if payload.email != client.email:
-                    try:
-                        # Verificar que el nuevo email no esté en uso
-                        Client.objects.get(email=payload.email)
-                        # Si llegamos aquí, el email ya está en uso por otro cliente
-                        return {
-                            "success": False,
-                            "message": f"El email {payload.email} ya está registrado por otro cliente",
-                            "booking_id": None,
-                            "client_id": None,
-                            "total_price": None
-                        }
-                    except Client.DoesNotExist:
-                        client.email = payload.email
-                        updated = True
-                
-                # Actualizar DNI si es diferente y no está en uso
-                if payload.dni != client.dni:
-                    try:
-                        # Verificar que el nuevo DNI no esté en uso
-                        Client.objects.get(dni=payload.dni)
-                        # Si llegamos aquí, el DNI ya está en uso por otro cliente
-                        return {
-                            "success": False,
-                            "message": f"El DNI {payload.dni} ya está registrado por otro cliente",
-                            "booking_id": None,
-                            "client_id": None,
-                            "total_price": None
-                        }
-                    except Client.DoesNotExist:
-                        client.dni = payload.dni
-                        updated = True
-                
-                # Actualizar otros campos si están vacíos
-                if not client.phone and payload.telefono:
-                    client.phone = payload.telefono
-                    updated = True
-                
-                if not client.first_name and payload.nombre:
-                    client.first_name = payload.nombre.split()[0] if payload.nombre else ''
-                    client.last_name = ' '.join(payload.nombre.split()[1:]) if len(payload.nombre.split()) > 1 else ''
-                    updated = True
-                
-                if updated:
-                    client.save()
-            
-            # Calcular precio total
-            duration = (payload.fecha_fin - payload.fecha_inicio).days
-            total_price = room.price * duration
-            
-            # Validar suscripción del hotel
-            if hasattr(room, 'hotel') and room.hotel and hasattr(room.hotel, 'can_accept_new_bookings'):
-                if not room.hotel.can_accept_new_bookings:
-                    return {
-                        "success": False,
-                        "message": "Este hotel no está aceptando reservas nuevas.",
-                        "booking_id": None,
-                        "client_id": client.id,
-                        "total_price": None
-                    }
-            # Crear la reserva
-            booking = Booking.objects.create(
-                hotel=getattr(room, 'hotel', None),
-                client=client,
-                room=room,
-                check_in_date=payload.fecha_inicio,
-                check_out_date=payload.fecha_fin,
-                status='confirmed',  # Estado confirmada como se solicita
-                payment_status='pending',
-                guests_count=room.capacity,  # Usar capacidad de la habitación
-                special_requests=payload.solicitudes_especiales,
-                total_price=total_price
-            )
-            
-            # Cambiar estado de la habitación a reservada
-            room.change_status('reserved')
-            
-            # Intentar enviar email de confirmación
-            email_result = EmailService.send_booking_confirmation(booking.id)
-            
-            return {
-                "success": True,
-                "message": f"Reserva creada exitosamente. Cliente {'creado' if created else 'encontrado'}.",
-                "booking_id": booking.id,
-                "client_id": client.id,
-                "total_price": float(total_price),
-                "email_sent": email_result["success"],
-                "email_message": email_result["message"]
-            }
-            
+        room = BookingService.get_room(payload.habitacion_id)
+        first_name, last_name = split_full_name(payload.nombre)
+        booking, created = BookingService.reserve(
+            room,
+            payload.fecha_inicio,
+            payload.fecha_fin,
+            guest={
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': payload.email,
+                'phone': payload.telefono,
+                'dni': payload.dni,
+            },
+            status='confirmed',  # Estado confirmada como se solicita
+            guests_count=room.capacity,  # Usar capacidad de la habitación
+            special_requests=payload.solicitudes_especiales,
+            mark_room_reserved=True,
+        )
+        return {
+            "success": True,
+            "message": f"Reserva creada exitosamente. Cliente {'creado' if created else 'encontrado'}.",
+            "booking_id": booking.id,
+            "client_id": booking.client_id,
+            "total_price": float(booking.total_price),
+            "email_queued": True,
+            "email_message": "Email de confirmación en cola de envío"
+        }
     except ValidationError as e:
         return {
             "success": False,
-            "message": f"Error de validación: {str(e)}",
+            "message": e.messages[0],
             "booking_id": None,
             "client_id": None,
             "total_price": None
@@ -269,4 +130,48 @@ def resend_booking_confirmation_email(request, booking_id: int):
         return {
             "success": False,
             "message": f"Error al reenviar email: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+def _hotel_for_panel(user, hotel_id):
+    """
+    (hotel, permitido) en una consulta: staff, superusuario o admin/personal del hotel.
+    """
+    hotels = Hotel.objects.filter(pk=hotel_id)
+    if user.is_authenticated and not (user.is_staff or user.is_superuser):
+        hotels = hotels.annotate(member=Exists(HotelAdmin.objects.filter(hotel=OuterRef('pk'), user=user))
+                                 | Exists(HotelStaff.objects.filter(hotel=OuterRef('pk'), user=user)))
+    hotel = hotels.first()
+    if hotel is None or not user.is_authenticated:
+        return hotel, False
+    return hotel, getattr(hotel, 'member', True)
+
+
+@router.get("/hotels/{hotel_id}/grid", tags=["Reservas"])
+def hotel_availability_grid(request, response: HttpResponse, hotel_id: int, start_date: Optional[date] = None, days: int = 14):
+    """
+    Grilla de ocupación del hotel (habitaciones x noches) para el panel.
+
+    Una sola llamada reemplaza a pedir portal/room-availability/ por cada
+    habitación. Las matrices status y bookings llegan empaquetadas en base64
+    (ver app/bookings/occupancy.py). El ETag sale de la versión de datos del
+    hotel (app/core/versions.py): si nada cambió responde 304 sin consultar
+    las reservas, pensado para pantallas que consultan periódicamente.
+
+    Args:
+        hotel_id: ID del hotel
+        start_date: primera noche (hoy por defecto)
+        days: cantidad de noches (máximo 366)
+    """
+    hotel, allowed = _hotel_for_panel(request.user, hotel_id)
+    if hotel is None:
+        raise HttpError(404, "Hotel no encontrado")
+    if not allowed:
+        raise HttpError(403, "Forbidden")
+    cached = not_modified(request, hotel.pk, name="hotel_grid", response=response)
+    if cached is not None:
+        return cached
+    start = start_date or timezone.localdate()
+    try:
+        return hotel_grid(hotel, start, start + timedelta(days=days - 1))
+    except ValidationError as e:
+        raise HttpError(400, e.messages[0])
@@ -0,0 +1,183 @@
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+
+from app.rooms.models import Room
+
+from .models import Booking, RoomNight
+
+# Estados de reserva que ocupan la habitación
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+UNAVAILABLE_MESSAGE = 'La habitación no está disponible para las fechas solicitadas'
+
+# Campos de la reserva que afectan a las noches ocupadas
+NIGHT_FIELDS = {'status', 'room', 'room_id', 'check_in_date', 'check_out_date', 'hotel', 'hotel_id'}
+
+
+def stay_nights(check_in, check_out):
+    """Retorna la lista de noches (fechas) entre check-in (incluido) y check-out (excluido)"""
+    if not check_in or not check_out or check_in >= check_out:
+        return []
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def is_room_available(room, check_in, check_out, exclude_booking=None):
+    """
+    Verifica si la habitación está libre para las noches [check_in, check_out)
+    usando el índice RoomNight (búsqueda por índice (room, date)).
+    """
+    qs = RoomNight.objects.filter(room=room, date__gte=check_in, date__lt=check_out)
+    if exclude_booking is not None:
+        qs = qs.exclude(booking=exclude_booking)
+    return not qs.exists()
+
+
+# Criterios de orden soportados por el buscador de disponibilidad
+SEARCH_ORDERINGS = ('price', 'capacity')
+SEARCH_FIELDS = ('id', 'hotel_id', 'number', 'type', 'capacity', 'price', 'description', 'floor')
+MAX_SEARCH_LIMIT = 200
+
+
+def encode_search_cursor(value, room_id):
+    """Codifica la posición (valor de orden, id) de la última habitación devuelta"""
+    raw = json.dumps([str(value), room_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor):
+    """Decodifica un cursor generado por encode_search_cursor; lanza ValueError si es inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, room_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return value, int(room_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def _search_queryset(check_in, check_out, guests, hotel, order_by, cursor):
+    """Consulta (sin ejecutar) de search_available_rooms; valida orden y cursor"""
+    if order_by not in SEARCH_ORDERINGS:
+        raise ValueError(f'Orden no soportado: {order_by}')
+
+    occupied = RoomNight.objects.filter(
+        room_id=OuterRef('pk'),
+        date__gte=check_in,
+        date__lt=check_out,
+    )
+    qs = Room.objects.filter(status='available', active=True, capacity__gte=guests)
+    if hotel is not None:
+        qs = qs.filter(hotel=hotel)
+    qs = qs.filter(~Exists(occupied))
+
+    if cursor:
+        value, last_id = decode_search_cursor(cursor)
+        value = Decimal(value) if order_by == 'price' else int(value)
+        qs = qs.filter(Q(**{f'{order_by}__gt': value}) | Q(**{order_by: value, 'id__gt': last_id}))
+    return qs.order_by(order_by, 'id').values(*SEARCH_FIELDS)
+
+
+def _search_page(rows, order_by, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_search_cursor(last[order_by], last['id'])
+    return rows, next_cursor
+
+
+def search_available_rooms(check_in, check_out, guests=1, hotel=None, order_by='price', cursor=None, limit=50):
+    """
+    Busca habitaciones libres para [check_in, check_out) con capacidad para `guests`.
+
+    Resuelve todo en una sola consulta: filtra habitaciones reservables del hotel y
+    descarta las que tengan alguna noche ocupada en el rango mediante un anti-join
+    (NOT EXISTS) contra el índice (room, date) de RoomNight. La paginación es por
+    cursor (keyset) sobre (order_by, id), de modo que cada página cuesta lo mismo.
+
+    Retorna (rooms, next_cursor) donde rooms es una lista de diccionarios.
+    """
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    qs = _search_queryset(check_in, check_out, guests, hotel, order_by, cursor)
+    return _search_page(list(qs[:limit + 1]), order_by, limit)
+
+
+async def asearch_available_rooms(check_in, check_out, guests=1, hotel=None, order_by='price', cursor=None, limit=50):
+    """Versión asíncrona de search_available_rooms (ORM asíncrono, misma consulta)"""
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    qs = _search_queryset(check_in, check_out, guests, hotel, order_by, cursor)
+    return _search_page([row async for row in qs[:limit + 1]], order_by, limit)
+
+
+def sync_room_nights(booking, created=False):
+    """
+    Sincroniza las noches ocupadas de una reserva con su estado actual.
+    Las reservas canceladas, finalizadas o no-show liberan sus noches.
+    Con created=True (reserva recién insertada) no hay noches previas que borrar.
+
+    Es la reserva efectiva de la habitación: la restricción única (room, date) de
+    RoomNight garantiza que dos reservas activas no compartan una noche, también
+    entre transacciones concurrentes (en SQLite y en PostgreSQL). Si alguna noche
+    ya está tomada lanza ValidationError (code='room_unavailable').
+    """
+    with transaction.atomic():
+        if not created:
+            RoomNight.objects.filter(booking_id=booking.pk).delete()
+        if booking.status not in ACTIVE_STATUSES or not booking.room_id:
+            return 0
+        hotel_id = booking.hotel_id
+        nights = [
+            RoomNight(hotel_id=hotel_id, room_id=booking.room_id, booking_id=booking.pk, date=night)
+            for night in stay_nights(booking.check_in_date, booking.check_out_date)
+        ]
+        try:
+            with transaction.atomic():
+                RoomNight.objects.bulk_create(nights)
+        except IntegrityError:
+            taken = RoomNight.objects.filter(
+                room_id=booking.room_id, date__in=[night.date for night in nights]
+            ).exclude(booking_id=booking.pk)
+            if taken.exists():
+                raise ValidationError(UNAVAILABLE_MESSAGE, code='room_unavailable')
+            raise
+        return len(nights)
+
+
+def release_room_nights(booking_ids):
+    """Libera las noches de un conjunto de reservas (p. ej. tras un update() masivo)"""
+    deleted, _ = RoomNight.objects.filter(booking_id__in=list(booking_ids)).delete()
+    return deleted
+
+
+def rebuild_room_nights(bookings=None, batch_size=2000):
+    """
+    Reconstruye el índice para las reservas dadas (todas por defecto).
+    Retorna la cantidad de noches creadas.
+
+    Si los datos tienen reservas activas superpuestas (cargadas por SQL o de antes
+    de la restricción única), cada noche queda para la reserva de menor id.
+    """
+    if bookings is None:
+        bookings = Booking.objects.all()
+    active = bookings.filter(status__in=ACTIVE_STATUSES).order_by('id').values_list(
+        'id', 'hotel_id', 'room_id', 'check_in_date', 'check_out_date'
+    )
+    with transaction.atomic():
+        RoomNight.objects.filter(booking__in=bookings).delete()
+        pending = []
+        for booking_id, hotel_id, room_id, check_in, check_out in active.iterator(chunk_size=batch_size):
+            for night in stay_nights(check_in, check_out):
+                pending.append(RoomNight(hotel_id=hotel_id, room_id=room_id, booking_id=booking_id, date=night))
+            if len(pending) >= batch_size:
+                RoomNight.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+                pending = []
+        if pending:
+            RoomNight.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+        # ignore_conflicts no informa cuántas filas se insertaron
+        created = RoomNight.objects.filter(booking__in=bookings).count()
+    return created
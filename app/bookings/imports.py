@@ -0,0 +1,331 @@
+"""
+Importación masiva de reservas (channel managers, migraciones desde otro PMS).
+
+Crear miles de reservas con Booking.save() repite por fila la verificación de
+disponibilidad, el cálculo de precio, el guardado del cliente, las señales y el
+email. import_bookings() trabaja por conjuntos:
+
+1. valida cada fila (habitación, fechas, estado) y reporta errores por línea;
+2. carga de una vez las noches ocupadas de las habitaciones del hotel y los
+   clientes existentes (por email y DNI, en bloques);
+3. decide la disponibilidad en memoria, fila por fila en el orden del archivo:
+   una fila que pisa noches ya tomadas (en la base o por una fila anterior) se
+   rechaza;
+4. inserta clientes nuevos, reservas y RoomNight con bulk_create por lotes; si
+   un lote choca con una reserva hecha mientras tanto (restricción única de
+   RoomNight) se reintenta fila por fila y solo se rechazan las que chocan;
+5. recalcula DailyHotelStats una vez para el rango importado.
+
+bulk_create no dispara señales: el índice de noches y las estadísticas se
+mantienen aquí. Los emails de confirmación no se envían salvo notify=True, y
+en ese caso se encolan al confirmar la transacción.
+"""
+import csv
+import io
+import json
+import time
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, connection, transaction
+
+from app.clients.models import Client
+from app.core.services import EmailService
+from app.core.services_stats import rebuild_daily_stats
+from app.core.versions import bump_on_commit
+from app.rooms.models import Room
+
+from .availability import ACTIVE_STATUSES, stay_nights
+from .models import Booking, RoomNight
+from .services import split_full_name
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 2000
+# Parámetros por consulta IN (SQLite admite 999 variables en versiones antiguas)
+LOOKUP_CHUNK = 500
+# Errores incluidos en el reporte; el resto solo se cuenta
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename, default='csv'):
+    """Formato según la extensión del archivo (.jsonl/.ndjson -> jsonl)"""
+    name = (filename or '').lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def read_rows(stream, fmt='csv'):
+    """
+    Itera (línea, fila) de un archivo de texto CSV (con encabezado) o JSONL.
+    Una línea JSON inválida se entrega como fila None para reportarla.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato no soportado: {fmt}')
+    if isinstance(stream, (bytes, str)):
+        stream = io.StringIO(stream.decode('utf-8-sig') if isinstance(stream, bytes) else stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def _text(row, name):
+    value = row.get(name)
+    return '' if value is None else str(value).strip()
+
+
+def _parse_date(value):
+    return date.fromisoformat(value[:10])
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class _Report:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.clients_created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self, started):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'clients_created': self.clients_created,
+            'failed': self.error_count,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'seconds': round(time.monotonic() - started, 3),
+        }
+
+
+def _validate(line, row, rooms_by_number, rooms_by_id, report):
+    """Convierte una fila en un dict listo para importar, o registra el error y retorna None"""
+    if row is None:
+        report.error(line, 'Línea con JSON inválido')
+        return None
+    room_ref, room_id = _text(row, 'room'), _text(row, 'room_id')
+    room = rooms_by_number.get(room_ref) if room_ref else None
+    if room is None and room_id.isdigit():
+        room = rooms_by_id.get(int(room_id))
+    if room is None:
+        report.error(line, f'Habitación {room_ref or room_id or "(vacía)"} no encontrada en el hotel')
+        return None
+    try:
+        check_in = _parse_date(_text(row, 'check_in_date'))
+        check_out = _parse_date(_text(row, 'check_out_date'))
+    except ValueError:
+        report.error(line, 'Fechas inválidas (formato YYYY-MM-DD)')
+        return None
+    if check_in >= check_out:
+        report.error(line, 'La fecha de salida debe ser posterior a la fecha de llegada')
+        return None
+    status = _text(row, 'status') or 'confirmed'
+    if status not in dict(Booking.STATUS_CHOICES):
+        report.error(line, f'Estado inválido: {status}')
+        return None
+    payment_status = _text(row, 'payment_status') or 'pending'
+    if payment_status not in dict(Booking.PAYMENT_STATUS_CHOICES):
+        report.error(line, f'Estado de pago inválido: {payment_status}')
+        return None
+    email = _text(row, 'email')
+    if not email:
+        report.error(line, 'El email del cliente es obligatorio')
+        return None
+    try:
+        guests_count = int(_text(row, 'guests_count') or 1)
+        total_price = Decimal(_text(row, 'total_price')) if _text(row, 'total_price') else room.price * (check_out - check_in).days
+    except (ValueError, InvalidOperation):
+        report.error(line, 'Cantidad de huéspedes o precio inválido')
+        return None
+    first_name, last_name = _text(row, 'first_name'), _text(row, 'last_name')
+    if not first_name and _text(row, 'name'):
+        first_name, last_name = split_full_name(_text(row, 'name'))
+    return {
+        'line': line,
+        'room': room,
+        'check_in': check_in,
+        'check_out': check_out,
+        'status': status,
+        'payment_status': payment_status,
+        'guests_count': max(1, guests_count),
+        'total_price': total_price,
+        'special_requests': _text(row, 'special_requests'),
+        'email': email,
+        'dni': _text(row, 'dni'),
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': _text(row, 'phone') or None,
+    }
+
+
+def _load_clients(emails, dnis):
+    """Clientes existentes indexados por email y por DNI, en consultas por bloques"""
+    loaded = {}
+    for field, values in (('email__in', emails), ('dni__in', dnis)):
+        for chunk in _chunks(values, LOOKUP_CHUNK):
+            for client in Client.objects.filter(**{field: chunk}).only('id', 'email', 'dni', 'hotel_id'):
+                # Un mismo cliente puede salir por email y por DNI: una sola instancia
+                loaded.setdefault(client.pk, client)
+    return {c.email: c for c in loaded.values()}, {c.dni: c for c in loaded.values()}
+
+
+_NIGHT_INSERT = 'INSERT INTO {} ({}) VALUES (%s, %s, %s, %s)'.format(
+    connection.ops.quote_name(RoomNight._meta.db_table),
+    ', '.join(connection.ops.quote_name(RoomNight._meta.get_field(name).column) for name in ('hotel', 'room', 'booking', 'date')),
+)
+
+
+def _insert_batch(batch, hotel):
+    """Inserta reservas y noches de un lote; retorna las reservas creadas"""
+    bookings = [
+        Booking(
+            hotel=hotel, client_id=item['client'].pk, room_id=item['room'].pk,
+            check_in_date=item['check_in'], check_out_date=item['check_out'],
+            status=item['status'], payment_status=item['payment_status'],
+            guests_count=item['guests_count'], special_requests=item['special_requests'],
+            total_price=item['total_price'],
+        )
+        for item in batch
+    ]
+    Booking.objects.bulk_create(bookings)
+    # Las noches son varias por reserva: se insertan como tuplas, sin instanciar modelos
+    adapt = connection.ops.adapt_datefield_value
+    nights = [
+        (hotel.pk, booking.room_id, booking.pk, adapt(night))
+        for booking in bookings if booking.status in ACTIVE_STATUSES
+        for night in stay_nights(booking.check_in_date, booking.check_out_date)
+    ]
+    if nights:
+        with connection.cursor() as cursor:
+            cursor.executemany(_NIGHT_INSERT, nights)
+    return bookings
+
+
+def import_bookings(rows, hotel, batch_size=DEFAULT_BATCH_SIZE, notify=False, dry_run=False):
+    """
+    Importa reservas al hotel desde un iterable de (línea, fila) (ver read_rows).
+
+    Columnas: room (número) o room_id, check_in_date, check_out_date, email, dni,
+    first_name/last_name (o name), phone, guests_count, status (confirmed por
+    defecto), payment_status, total_price (por defecto precio x noches) y
+    special_requests.
+
+    Los clientes se buscan por email y luego por DNI; los nuevos se crean con el
+    hotel indicado (con un DNI provisorio IMP-... si la fila no trae uno).
+
+    Returns:
+        dict con rows, created, clients_created, failed, errors [{line, error}] y seconds
+    """
+    started = time.monotonic()
+    report = _Report()
+    batch_size = max(1, int(batch_size))
+
+    rooms = list(Room.objects.filter(hotel=hotel).only('id', 'number', 'price', 'hotel_id'))
+    rooms_by_number = {room.number: room for room in rooms}
+    rooms_by_id = {room.pk: room for room in rooms}
+
+    items = []
+    for line, row in rows:
+        report.rows += 1
+        item = _validate(line, row, rooms_by_number, rooms_by_id, report)
+        if item is not None:
+            items.append(item)
+    if not items:
+        return report.as_dict(started)
+
+    # Disponibilidad por conjuntos: noches ya ocupadas en el rango del archivo
+    start = min(item['check_in'] for item in items)
+    end = max(item['check_out'] for item in items)
+    occupied = set(
+        RoomNight.objects.filter(room__hotel=hotel, date__gte=start, date__lt=end).values_list('room_id', 'date')
+    )
+    by_email, by_dni = _load_clients({item['email'] for item in items}, {item['dni'] for item in items if item['dni']})
+
+    accepted, new_clients = [], {}
+    for item in items:
+        client = by_email.get(item['email']) or new_clients.get(item['email'])
+        if client is None and item['dni']:
+            client = by_dni.get(item['dni'])
+        other = by_dni.get(item['dni']) if item['dni'] else None
+        if client is not None and other is not None and other is not client:
+            report.error(item['line'], f"El DNI {item['dni']} ya está registrado por otro cliente")
+            continue
+        if item['status'] in ACTIVE_STATUSES:
+            nights = [(item['room'].pk, night) for night in stay_nights(item['check_in'], item['check_out'])]
+            if any(night in occupied for night in nights):
+                report.error(item['line'], f"La habitación {item['room'].number} no está disponible para las fechas solicitadas")
+                continue
+            occupied.update(nights)
+        if client is None:
+            client = Client(
+                first_name=item['first_name'], last_name=item['last_name'], email=item['email'],
+                phone=item['phone'], dni=item['dni'] or f'IMP-{uuid.uuid4().hex[:12]}', hotel=hotel,
+            )
+            new_clients[item['email']] = client
+            by_dni[client.dni] = client
+        item['client'] = client
+        accepted.append(item)
+
+    if dry_run:
+        report.created = len(accepted)
+        report.clients_created = len(new_clients)
+        return report.as_dict(started)
+
+    created = []
+    with transaction.atomic():
+        Client.objects.bulk_create(list(new_clients.values()), batch_size=batch_size)
+        report.clients_created = len(new_clients)
+        # Igual que Booking.save: el cliente queda asociado al hotel de su reserva
+        existing_ids = {item['client'].pk for item in accepted} - {c.pk for c in new_clients.values()}
+        for chunk in _chunks(existing_ids, LOOKUP_CHUNK):
+            Client.objects.filter(id__in=chunk).exclude(hotel=hotel).update(hotel=hotel)
+
+        for batch in _chunks(accepted, batch_size):
+            try:
+                with transaction.atomic():
+                    created.extend(_insert_batch(batch, hotel))
+            except IntegrityError:
+                # Alguien reservó alguna de estas noches mientras tanto: fila por fila
+                for item in batch:
+                    try:
+                        with transaction.atomic():
+                            created.extend(_insert_batch([item], hotel))
+                    except IntegrityError:
+                        report.error(item['line'], f"La habitación {item['room'].number} no está disponible para las fechas solicitadas")
+        report.created = len(created)
+
+        if created:
+            rebuild_daily_stats(
+                min(b.check_in_date for b in created), max(b.check_out_date for b in created), [hotel.pk]
+            )
+        if created or new_clients:
+            bump_on_commit(hotel.pk)
+        if notify:
+            for booking in created:
+                if booking.status == 'confirmed':
+                    EmailService.queue_booking_email('booking_confirmation', booking.pk)
+    return report.as_dict(started)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:25
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def populate_room_nights(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    nights = []
+    active = Booking.objects.filter(status__in=['pending', 'confirmed']).values_list(
+        'id', 'hotel_id', 'room_id', 'check_in_date', 'check_out_date'
+    )
+    for booking_id, hotel_id, room_id, check_in, check_out in active.iterator():
+        for i in range(max((check_out - check_in).days, 0)):
+            nights.append(RoomNight(hotel_id=hotel_id, room_id=room_id, booking_id=booking_id, date=check_in + timedelta(days=i)))
+    RoomNight.objects.bulk_create(nights, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_hotel_template_id'),
+        ('bookings', '0003_booking_hotel'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Noche ocupada (fecha de llegada de esa noche)')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='bookings.booking')),
+                ('hotel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='room_nights', to='administration.hotel')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='rooms.room')),
+            ],
+            options={
+                'verbose_name': 'Noche ocupada',
+                'verbose_name_plural': 'Noches ocupadas',
+                'indexes': [models.Index(fields=['room', 'date'], name='bookings_ro_room_id_3120af_idx'), models.Index(fields=['hotel', 'date'], name='bookings_ro_hotel_i_509c6b_idx')],
+            },
+        ),
+        migrations.RunPython(populate_room_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_hotel_template_id'),
+        ('bookings', '0004_roomnight'),
+        ('clients', '0003_client_hotel'),
+        ('rooms', '0004_room_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['hotel', 'created_at', 'id'], name='booking_hotel_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:01
+
+from django.db import migrations, models
+
+
+def remove_duplicate_nights(apps, schema_editor):
+    # Antes de la restricción única podían existir reservas superpuestas:
+    # cada noche queda para la reserva de menor id (igual que rebuild_room_nights)
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    seen = set()
+    duplicates = []
+    for night_id, room_id, date in RoomNight.objects.order_by('room_id', 'date', 'booking_id', 'id').values_list('id', 'room_id', 'date'):
+        if (room_id, date) in seen:
+            duplicates.append(night_id)
+        else:
+            seen.add((room_id, date))
+    for start in range(0, len(duplicates), 500):
+        RoomNight.objects.filter(id__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_list_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_nights, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='uniq_room_night'),
+        ),
+        migrations.RemoveIndex(
+            model_name='roomnight',
+            name='bookings_ro_room_id_3120af_idx',
+        ),
+    ]
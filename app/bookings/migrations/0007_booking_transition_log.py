@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_hotel_template_id'),
+        ('bookings', '0006_roomnight_unique_night'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTransitionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transition', models.CharField(help_text='Nombre de la transición (confirm, cancel...)', max_length=20)),
+                ('field', models.CharField(default='status', help_text='Campo que cambió (status o payment_status)', max_length=20)),
+                ('to_value', models.CharField(help_text='Valor resultante', max_length=20)),
+                ('booking_ids', models.JSONField(default=list, help_text='Reservas afectadas')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('reason', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hotel', models.ForeignKey(blank=True, help_text='Hotel, si todas las reservas son del mismo', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking_transitions', to='administration.hotel')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transición de reservas',
+                'verbose_name_plural': 'Transiciones de reservas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['hotel', 'created_at'], name='booking_transition_hotel_idx')],
+            },
+        ),
+    ]
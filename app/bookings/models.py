@@ -1,9 +1,11 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from app.clients.models import Client
 from app.rooms.models import Room
 from app.administration.models import Hotel
+from app.core.profiling import profile_queries
 from datetime import timedelta
 
 class Booking(models.Model):
@@ -59,8 +61,30 @@ class Booking(models.Model):
             models.Index(fields=['check_in_date', 'check_out_date']),
             models.Index(fields=['status']),
             models.Index(fields=['client']),
+            # Listado paginado por cursor dentro de un hotel
+            models.Index(fields=['hotel', 'created_at', 'id'], name='booking_hotel_created_idx'),
         ]
     
+    # Campos cuyo valor cargado de la base se conserva para detectar cambios
+    TRACKED_FIELDS = ('hotel_id', 'room_id', 'client_id', 'status', 'check_in_date', 'check_out_date', 'total_price')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS
+        }
+        return instance
+
+    @property
+    def previous_state(self):
+        """Valores de los campos rastreados tal como estaban en la base (None si es nueva)"""
+        return getattr(self, '_loaded_values', None)
+
+    def _snapshot_tracked_fields(self):
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
     def __str__(self):
         return f"Reserva {self.id} - {self.client.full_name} ({self.check_in_date} a {self.check_out_date})"
     
@@ -87,28 +111,39 @@ class Booking(models.Model):
     
     def save(self, *args, **kwargs):
         """Sobrescribir save para calcular precio total, validar disponibilidad y enviar email"""
+        with profile_queries('Booking.save'):
+            self._save(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
         skip_validation = kwargs.pop('skip_validation', False)
         is_new_booking = not self.pk  # Verificar si es una nueva reserva
+        previous = self.previous_state or {}
         
         # Asegurar asociación de hotel
-        if not self.hotel and self.room and getattr(self.room, 'hotel', None):
-            self.hotel = self.room.hotel
+        if not self.hotel_id and self.room_id and self.room.hotel_id:
+            self.hotel_id = self.room.hotel_id
 
         if is_new_booking and not skip_validation:  # Solo para nuevas reservas
             self.validate_availability()
             self.calculate_total_price()
         
-        super().save(*args, **kwargs)
+        # La señal post_save ocupa las noches (RoomNight); si otra reserva las tomó entre
+        # la verificación y el INSERT, la restricción única deshace también esta reserva
+        from .availability import NIGHT_FIELDS
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not (set(update_fields) & NIGHT_FIELDS):
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
         
-        # Sincronizar hotel del cliente si corresponde
-        try:
-            if self.client and self.hotel and getattr(self.client, 'hotel', None) != self.hotel:
-                self.client.hotel = self.hotel
-                self.client.save(update_fields=['hotel'])
-        except Exception:
-            pass
+        # Sincronizar hotel del cliente solo si cambió el cliente o el hotel de la reserva
+        if is_new_booking or any(previous.get(name) != getattr(self, name) for name in ('client_id', 'hotel_id')):
+            self._sync_client_hotel()
 
-        # Enviar email de confirmación automáticamente para nuevas reservas confirmadas
+        # Encolar email de confirmación para nuevas reservas confirmadas (se entrega
+        # con process_email_queue una vez confirmada la transacción)
         if is_new_booking and self.status == 'confirmed' and not skip_validation:
             try:
                 from app.core.services import EmailService
@@ -117,7 +152,22 @@ class Booking(models.Model):
                 # Log del error pero no fallar la creación de la reserva
                 import logging
                 logger = logging.getLogger(__name__)
-                logger.error(f"Error al enviar email de confirmación para reserva {self.id}: {str(e)}")
+                logger.error(f"Error al encolar email de confirmación para reserva {self.id}: {str(e)}")
+
+    def _sync_client_hotel(self):
+        """Asocia el cliente al hotel de la reserva sin cargarlo si no estaba en memoria"""
+        if not self.hotel_id or not self.client_id:
+            return
+        try:
+            if Booking.client.is_cached(self):
+                if self.client.hotel_id != self.hotel_id:
+                    self.client.hotel_id = self.hotel_id
+                    self.client.save(update_fields=['hotel'])
+            else:
+                # Un UPDATE condicional: no toca la fila si ya tiene ese hotel
+                Client.objects.filter(pk=self.client_id).exclude(hotel_id=self.hotel_id).update(hotel_id=self.hotel_id)
+        except Exception:
+            pass
     
     @property
     def duration(self):
@@ -165,46 +215,39 @@ class Booking(models.Model):
         if self.hotel and self.room and hasattr(self.room, 'hotel') and self.room.hotel and self.room.hotel != self.hotel:
             raise ValidationError('La habitación seleccionada no pertenece al hotel de la reserva')
         
-        # Verificar si hay conflictos con otras reservas
-        conflicting_bookings = Booking.objects.filter(
-            room=self.room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=self.check_out_date,
-            check_out_date__gt=self.check_in_date
-        )
-        
-        if conflicting_bookings.exists():
+        # Verificar si hay conflictos con otras reservas (índice de noches ocupadas)
+        from .availability import is_room_available
+        if not is_room_available(self.room, self.check_in_date, self.check_out_date, exclude_booking=self.pk):
             raise ValidationError('La habitación no está disponible para las fechas solicitadas')
     
-    def confirm_booking(self):
+    def _change_status(self, status, room_status, **fields):
+        """Cambia el estado guardando solo los campos tocados, y luego el de la habitación"""
+        self.status = status
+        for name, value in fields.items():
+            setattr(self, name, value)
+        with transaction.atomic():
+            self.save(update_fields=['status', *fields, 'updated_at'])
+            self.room.change_status(room_status)
+
+    # Las transiciones legales y sus efectos están en app/bookings/state.py
+
+    def confirm_booking(self, user=None):
         """Confirma la reserva"""
-        if self.status == 'pending':
-            self.status = 'confirmed'
-            self.confirmed_at = timezone.now()
-            self.room.change_status('reserved')
-            self.save()
-            return True
-        return False
-    
-    def cancel_booking(self, reason=""):
+        from .state import apply_transition
+        with profile_queries('Booking.confirm_booking'):
+            return apply_transition(self, 'confirm', user=user)
+    
+    def cancel_booking(self, reason="", user=None):
         """Cancela la reserva"""
-        if self.status in ['pending', 'confirmed']:
-            self.status = 'cancelled'
-            self.cancelled_at = timezone.now()
-            self.cancellation_reason = reason
-            self.room.change_status('available')
-            self.save()
-            return True
-        return False
-    
-    def complete_booking(self):
+        from .state import apply_transition
+        with profile_queries('Booking.cancel_booking'):
+            return apply_transition(self, 'cancel', reason=reason, user=user)
+    
+    def complete_booking(self, user=None):
         """Marca la reserva como completada"""
-        if self.status == 'confirmed':
-            self.status = 'completed'
-            self.room.change_status('cleaning')
-            self.save()
-            return True
-        return False
+        from .state import apply_transition
+        with profile_queries('Booking.complete_booking'):
+            return apply_transition(self, 'complete', user=user)
     
     @property
     def amount_due(self):
@@ -214,3 +257,59 @@ class Booking(models.Model):
         paid = self.paid_amount or Decimal('0')
         due = total - paid
         return due if due > Decimal('0') else Decimal('0')
+
+
+class RoomNight(models.Model):
+    """
+    Índice de ocupación por habitación y noche.
+    Cada reserva activa (pendiente o confirmada) ocupa una fila por noche, de modo que
+    consultar si una habitación está libre es una búsqueda puntual por (room, date).
+    La restricción única (room, date) hace que la base rechace una segunda reserva de
+    la misma noche aunque dos peticiones concurrentes pasen la verificación previa.
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, null=True, blank=True, related_name='room_nights')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='nights')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights')
+    date = models.DateField(help_text="Noche ocupada (fecha de llegada de esa noche)")
+
+    class Meta:
+        verbose_name = "Noche ocupada"
+        verbose_name_plural = "Noches ocupadas"
+        constraints = [
+            # También sirve de índice para las búsquedas por (room, date)
+            models.UniqueConstraint(fields=['room', 'date'], name='uniq_room_night'),
+        ]
+        indexes = [
+            models.Index(fields=['hotel', 'date']),
+        ]
+
+    def __str__(self):
+        return f"Habitación {self.room_id} - {self.date} (reserva {self.booking_id})"
+
+
+class BookingTransitionLog(models.Model):
+    """
+    Auditoría de cambios de estado de reservas (app/bookings/state.py).
+    Una fila por operación: una transición masiva sobre cientos de reservas
+    registra un solo evento con la lista de ids.
+    """
+    transition = models.CharField(max_length=20, help_text="Nombre de la transición (confirm, cancel...)")
+    field = models.CharField(max_length=20, default='status', help_text="Campo que cambió (status o payment_status)")
+    to_value = models.CharField(max_length=20, help_text="Valor resultante")
+    booking_ids = models.JSONField(default=list, help_text="Reservas afectadas")
+    count = models.PositiveIntegerField(default=0)
+    hotel = models.ForeignKey(Hotel, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_transitions', help_text="Hotel, si todas las reservas son del mismo")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    reason = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Transición de reservas"
+        verbose_name_plural = "Transiciones de reservas"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['hotel', 'created_at'], name='booking_transition_hotel_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.transition} x{self.count} ({self.created_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,242 @@
+"""
+Calendario de ocupación por habitación con máscaras de días.
+
+Cada habitación se representa con un bytearray de un byte por día del rango
+(0 libre, 1 ocupado). Las reservas se aplican como cortes de intervalo
+(mask[a:b] = ...), sin recorrer día por día, y el resultado se devuelve
+comprimido en tramos (run-length): [fecha de inicio, días, disponible].
+
+Una sola consulta trae las reservas de todas las habitaciones pedidas, así el
+calendario de un hotel completo cuesta lo mismo que el de una habitación. Las
+funciones con prefijo "a" son las variantes para vistas async (ORM asíncrono).
+
+hotel_grid() arma con la misma técnica la grilla habitaciones x noches del
+panel (tape chart): una matriz de códigos de estado y otra de ids de reserva,
+empaquetadas como bytes.
+"""
+import base64
+import sys
+from array import array
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+
+from app.rooms.models import Room
+
+from .availability import ACTIVE_STATUSES
+from .models import Booking
+
+# Un año: el calendario del portal pide como mucho dos meses
+MAX_CALENDAR_DAYS = 366
+
+FREE = 0
+OCCUPIED = 1
+
+
+def calendar_days(start, end):
+    """Cantidad de días del rango [start, end] (ambos incluidos), validando el límite"""
+    if start is None or end is None or end < start:
+        raise ValidationError('La fecha final debe ser igual o posterior a la inicial', code='invalid_dates')
+    days = (end - start).days + 1
+    if days > MAX_CALENDAR_DAYS:
+        raise ValidationError(f'El rango no puede superar {MAX_CALENDAR_DAYS} días', code='range_too_long')
+    return days
+
+
+def _bookings_query(room_ids, start, end):
+    return Booking.objects.filter(
+        room_id__in=room_ids,
+        status__in=ACTIVE_STATUSES,
+        check_in_date__lte=end,
+        check_out_date__gt=start,
+    ).order_by().values_list('room_id', 'check_in_date', 'check_out_date')
+
+
+def _paint(masks, start, days, bookings):
+    for room_id, check_in, check_out in bookings:
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        if first < last:
+            masks[room_id][first:last] = b'\x01' * (last - first)
+    return masks
+
+
+def occupancy_masks(room_ids, start, end):
+    """
+    {room_id: bytearray} con un byte por día de [start, end]; 1 = noche ocupada
+    por una reserva pendiente o confirmada.
+    """
+    days = calendar_days(start, end)
+    masks = {room_id: bytearray(days) for room_id in room_ids}
+    if not masks:
+        return masks
+    return _paint(masks, start, days, _bookings_query(list(masks), start, end))
+
+
+async def aoccupancy_masks(room_ids, start, end):
+    """Versión asíncrona de occupancy_masks (ORM asíncrono)"""
+    days = calendar_days(start, end)
+    masks = {room_id: bytearray(days) for room_id in room_ids}
+    if not masks:
+        return masks
+    bookings = [row async for row in _bookings_query(list(masks), start, end)]
+    return _paint(masks, start, days, bookings)
+
+
+def mask_runs(mask):
+    """Tramos [(offset, largo, valor)] de bytes iguales consecutivos"""
+    runs = []
+    size = len(mask)
+    offset = 0
+    while offset < size:
+        value = mask[offset]
+        # find() recorre el buffer en C: salta el tramo completo de una vez
+        other = b'\x00' if value else b'\x01'
+        following = mask.find(other, offset)
+        following = size if following == -1 else following
+        runs.append((offset, following - offset, value))
+        offset = following
+    return runs
+
+
+def encode_runs(mask, start):
+    """[[fecha ISO, días, disponible], ...] a partir de una máscara"""
+    return [
+        [(start + timedelta(days=offset)).isoformat(), length, value == FREE]
+        for offset, length, value in mask_runs(mask)
+    ]
+
+
+def free_room_counts(masks):
+    """Habitaciones libres por día (lista de enteros) para un conjunto de máscaras"""
+    if not masks:
+        return []
+    days = len(next(iter(masks.values())))
+    # Diferencias por tramo ocupado: O(tramos) en lugar de O(habitaciones x días)
+    delta = [0] * (days + 1)
+    for mask in masks.values():
+        for offset, length, value in mask_runs(mask):
+            if value == OCCUPIED:
+                delta[offset] += 1
+                delta[offset + length] -= 1
+    counts = []
+    occupied = 0
+    total = len(masks)
+    for day in range(days):
+        occupied += delta[day]
+        counts.append(total - occupied)
+    return counts
+
+
+def encode_count_runs(counts, start):
+    """[[fecha ISO, días, habitaciones libres], ...] agrupando días con el mismo valor"""
+    runs = []
+    for offset, value in enumerate(counts):
+        if runs and runs[-1][2] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([(start + timedelta(days=offset)).isoformat(), 1, value])
+    return runs
+
+
+def room_calendar(room, start, end):
+    """Calendario de una habitación: {'room_id', 'runs'}"""
+    mask = occupancy_masks([room.pk], start, end)[room.pk]
+    return {'room_id': room.pk, 'runs': encode_runs(mask, start)}
+
+
+def rooms_calendar(rooms, start, end):
+    """
+    Calendario de varias habitaciones (p. ej. todas las de un hotel) en una sola consulta.
+
+    Returns:
+        {'rooms': {room_id: runs}, 'free_rooms': runs con la cantidad de habitaciones libres}
+    """
+    masks = occupancy_masks([room.pk for room in rooms], start, end)
+    return {
+        'rooms': {room_id: encode_runs(mask, start) for room_id, mask in masks.items()},
+        'free_rooms': encode_count_runs(free_room_counts(masks), start),
+    }
+
+
+async def aroom_calendar(room, start, end):
+    """Versión asíncrona de room_calendar"""
+    mask = (await aoccupancy_masks([room.pk], start, end))[room.pk]
+    return {'room_id': room.pk, 'runs': encode_runs(mask, start)}
+
+
+async def arooms_calendar(rooms, start, end):
+    """Versión asíncrona de rooms_calendar"""
+    masks = await aoccupancy_masks([room.pk for room in rooms], start, end)
+    return {
+        'rooms': {room_id: encode_runs(mask, start) for room_id, mask in masks.items()},
+        'free_rooms': encode_count_runs(free_room_counts(masks), start),
+    }
+
+
+def expand_runs(runs):
+    """Formato anterior día por día: {fecha ISO: disponible}"""
+    days = {}
+    for first, length, available in runs:
+        day = date.fromisoformat(first)
+        for offset in range(length):
+            days[(day + timedelta(days=offset)).isoformat()] = available
+    return days
+
+
+# Códigos de celda de la grilla: un byte por habitación y noche
+GRID_CODES = {'free': 0, 'pending': 1, 'confirmed': 2, 'completed': 3}
+GRID_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+def _pack_ids(ids):
+    """array('I') -> bytes uint32 little-endian, igual en cualquier plataforma"""
+    if sys.byteorder != 'little':
+        ids = array('I', ids)
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def hotel_grid(hotel, start, end):
+    """
+    Grilla de ocupación del hotel para [start, end]: habitaciones activas x noches.
+
+    Dos consultas (habitaciones y reservas). Cada reserva se pinta como un corte
+    sobre la fila de su habitación. Las matrices van en orden fila por fila
+    (habitación, noche) y codificadas en base64:
+
+    - status: un byte por celda con GRID_CODES;
+    - bookings: uint32 little-endian por celda con el id de la reserva (0 = libre).
+    """
+    days = calendar_days(start, end)
+    rooms = list(Room.objects.filter(hotel=hotel, active=True).order_by('floor', 'number').values_list('id', 'number'))
+    row_of = {room_id: row for row, (room_id, _) in enumerate(rooms)}
+    status = bytearray(len(rooms) * days)
+    booking_ids = array('I', bytes(4 * len(status)))
+
+    bookings = Booking.objects.filter(
+        room_id__in=list(row_of),
+        status__in=GRID_STATUSES,
+        check_in_date__lte=end,
+        check_out_date__gt=start,
+    ).order_by('id').values_list('id', 'room_id', 'status', 'check_in_date', 'check_out_date')
+    for booking_id, room_id, booking_status, check_in, check_out in bookings:
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        if first >= last:
+            continue
+        offset = row_of[room_id] * days
+        length = last - first
+        status[offset + first:offset + last] = bytes([GRID_CODES[booking_status]]) * length
+        booking_ids[offset + first:offset + last] = array('I', [booking_id]) * length
+
+    return {
+        'hotel_id': hotel.pk,
+        'start_date': start.isoformat(),
+        'days': days,
+        'rooms': [room_id for room_id, _ in rooms],
+        'room_numbers': [number for _, number in rooms],
+        'codes': GRID_CODES,
+        'status': base64.b64encode(bytes(status)).decode(),
+        'bookings': base64.b64encode(_pack_ids(booking_ids)).decode(),
+    }
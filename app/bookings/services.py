@@ -0,0 +1,210 @@
+"""
+Alta de reservas: un único camino para todas las vistas y APIs.
+
+Antes cada punto de entrada (API ninja, API del dashboard, asistente por pasos,
+portal del cliente y reserva pública del hotel) buscaba el cliente, verificaba
+solapamientos, calculaba el precio y encolaba el email a su manera.
+BookingService.reserve() hace todo con un número fijo de consultas:
+
+- la habitación llega con su hotel (get_room usa select_related);
+- una consulta al índice RoomNight como verificación previa;
+- una sola consulta para encontrar al cliente (por usuario, email o DNI) y, si
+  hace falta, un INSERT o un UPDATE con solo los campos cambiados;
+- la reserva y sus noches en una transacción: la restricción única de RoomNight
+  rechaza la reserva si otra petición tomó las noches entre medio;
+- el email de confirmación y el cambio de estado de la habitación se ejecutan
+  al confirmarse la transacción (on_commit), nunca si se revierte.
+
+Los errores de negocio se informan con ValidationError y un code estable para
+que cada vista arme su propia respuesta.
+"""
+import random
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from app.clients.models import Client
+from app.core.services import EmailService
+from app.rooms.models import Room
+
+from .availability import UNAVAILABLE_MESSAGE, is_room_available
+from .models import Booking
+
+GUEST_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'dni')
+
+
+def split_full_name(full_name):
+    """'Ana María Pérez' -> ('Ana', 'María Pérez')"""
+    parts = (full_name or '').split()
+    return (parts[0] if parts else ''), ' '.join(parts[1:])
+
+
+class BookingService:
+    """Servicio de alta de reservas"""
+
+    @staticmethod
+    def get_room(room_id, hotel=None):
+        """
+        Habitación activa (con su hotel precargado) para reservar.
+        Lanza ValidationError(code='room_not_found') si no existe o no pertenece al hotel.
+        """
+        qs = Room.objects.select_related('hotel').filter(active=True)
+        if hotel is not None:
+            qs = qs.filter(hotel=hotel)
+        try:
+            return qs.get(id=room_id)
+        except (Room.DoesNotExist, ValueError, TypeError):
+            raise ValidationError('La habitación seleccionada no existe', code='room_not_found')
+
+    @staticmethod
+    def validate(room, check_in, check_out):
+        """Reglas previas a la transacción: fechas, habitación y hotel habilitados"""
+        if not check_in or not check_out or check_in >= check_out:
+            raise ValidationError('La fecha de salida debe ser posterior a la fecha de llegada', code='invalid_dates')
+        if not room.available_for_booking:
+            raise ValidationError('La habitación no está disponible para reservas', code='room_not_bookable')
+        hotel = room.hotel
+        if hotel is not None and not hotel.can_accept_new_bookings:
+            raise ValidationError('Este hotel no está aceptando reservas nuevas.', code='hotel_closed')
+
+    @staticmethod
+    def resolve_client(guest=None, user=None, hotel=None):
+        """
+        Cliente para la reserva a partir de los datos del huésped y/o el usuario logueado.
+
+        Busca en una sola consulta por usuario, email o DNI (en ese orden de prioridad).
+        Un usuario nunca toma el cliente de otro usuario: si no tiene uno propio adopta
+        el registro sin usuario que coincida o se le crea uno nuevo. Los datos de contacto
+        recibidos reemplazan a los guardados y los nombres solo completan los vacíos.
+
+        Returns:
+            (client, created)
+        """
+        guest = {name: (value or '').strip() for name, value in (guest or {}).items() if name in GUEST_FIELDS}
+        user = user if user is not None and user.is_authenticated else None
+        email = guest.get('email') or (user.email if user is not None else '')
+        dni = guest.get('dni', '')
+
+        lookup = Q()
+        if user is not None:
+            lookup |= Q(user=user)
+        if email:
+            lookup |= Q(email=email)
+        if dni:
+            lookup |= Q(dni=dni)
+        matches = list(Client.objects.filter(lookup)) if lookup else []
+
+        def owned(client):
+            return user is None or client.user_id in (None, user.pk)
+
+        by_user = next((c for c in matches if user is not None and c.user_id == user.pk), None)
+        by_email = next((c for c in matches if email and c.email == email), None)
+        by_dni = next((c for c in matches if dni and c.dni == dni), None)
+        client = by_user or next((c for c in (by_email, by_dni) if c is not None and owned(c)), None)
+
+        if client is None:
+            # Solo llega acá con email o DNI de otro usuario: no se comparten, se usan provisorios
+            if user is not None and (not email or by_email is not None):
+                email = f'{user.username}_{random.randint(1000, 9999)}@hotel.com'
+            if not dni or by_dni is not None:
+                dni = f'{random.randint(10000000, 99999999)}'
+            if not email:
+                raise ValidationError('El email del cliente es obligatorio', code='client_required')
+            client = Client.objects.create(
+                user=user,
+                first_name=guest.get('first_name') or (user.first_name or user.username if user else ''),
+                last_name=guest.get('last_name') or (user.last_name or 'Usuario' if user else ''),
+                email=email,
+                phone=guest.get('phone') or None,
+                dni=dni,
+                hotel=hotel,
+            )
+            return client, True
+
+        changed = []
+        for name, taken_by in (('email', by_email), ('dni', by_dni)):
+            value = guest.get(name)
+            if value and value != getattr(client, name):
+                if taken_by is not None and taken_by.pk != client.pk:
+                    label = 'email' if name == 'email' else 'DNI'
+                    raise ValidationError(f'El {label} {value} ya está registrado por otro cliente', code='client_conflict')
+                setattr(client, name, value)
+                changed.append(name)
+        if guest.get('phone') and guest['phone'] != client.phone:
+            client.phone = guest['phone']
+            changed.append('phone')
+        for name in ('first_name', 'last_name'):
+            if not getattr(client, name) and guest.get(name):
+                setattr(client, name, guest[name])
+                changed.append(name)
+        if user is not None and client.user_id is None:
+            client.user = user
+            changed.append('user')
+        if hotel is not None and client.hotel_id != hotel.pk:
+            changed.append('hotel')
+        if hotel is not None:
+            # Deja el hotel en la caché de la relación: Booking.save no vuelve a consultarlo
+            client.hotel = hotel
+        if changed:
+            client.save(update_fields=changed + ['updated_at'])
+        return client, False
+
+    @classmethod
+    def reserve(cls, room, check_in, check_out, *, client=None, guest=None, user=None,
+                guests_count=1, special_requests='', status='confirmed', payment_status='pending',
+                notify=True, mark_room_reserved=False):
+        """
+        Crea una reserva validando disponibilidad.
+
+        Args:
+            room: habitación (idealmente de get_room, con el hotel precargado)
+            client: cliente ya elegido (dashboard); si no, se resuelve con guest/user
+            guest: dict con first_name, last_name, email, phone y dni del huésped
+            user: usuario logueado que reserva para sí mismo
+            notify: encolar el email de confirmación al confirmar la transacción
+            mark_room_reserved: pasar la habitación a 'reserved' al confirmar
+
+        Returns:
+            (booking, client_created)
+
+        Raises:
+            ValidationError con code invalid_dates, room_not_bookable, hotel_closed,
+            room_unavailable, client_conflict o client_required
+        """
+        cls.validate(room, check_in, check_out)
+        if not is_room_available(room, check_in, check_out):
+            raise ValidationError(UNAVAILABLE_MESSAGE, code='room_unavailable')
+
+        hotel = room.hotel
+        nights = (check_out - check_in).days
+        with transaction.atomic():
+            client_created = False
+            if client is None:
+                client, client_created = cls.resolve_client(guest, user=user, hotel=hotel)
+            elif hotel is not None:
+                moved = client.hotel_id != hotel.pk
+                client.hotel = hotel
+                if moved:
+                    client.save(update_fields=['hotel'])
+            booking = Booking(
+                hotel=hotel,
+                client=client,
+                room=room,
+                check_in_date=check_in,
+                check_out_date=check_out,
+                status=status,
+                payment_status=payment_status,
+                guests_count=int(guests_count or 1),
+                special_requests=special_requests or '',
+                total_price=room.price * nights,
+            )
+            # La verificación ya se hizo arriba; la restricción única de RoomNight
+            # (sync_room_nights en post_save) cubre la carrera hasta el INSERT
+            booking.save(skip_validation=True)
+
+            if notify:
+                EmailService.queue_booking_email('booking_confirmation', booking.id)
+            if mark_room_reserved and status in ('pending', 'confirmed'):
+                transaction.on_commit(lambda: room.change_status('reserved'))
+        return booking, client_created
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Booking
+from .availability import NIGHT_FIELDS, sync_room_nights
+from app.core.services_stats import STATS_FIELDS, refresh_stats_for_booking
+
+
+@receiver(post_save, sender=Booking)
+def update_room_nights(sender, instance, created, update_fields=None, **kwargs):
+    # Mantener el índice de noches ocupadas; si solo cambian campos ajenos (pagos, notas) no se toca
+    if not created and update_fields is not None and not (set(update_fields) & NIGHT_FIELDS):
+        return
+    sync_room_nights(instance, created=created)
+
+
+@receiver(post_save, sender=Booking)
+def update_daily_stats(sender, instance, created, update_fields=None, **kwargs):
+    # Se registra después de update_room_nights: la ocupación se calcula desde el índice de noches
+    if not created and update_fields is not None and not (set(update_fields) & STATS_FIELDS):
+        return
+    refresh_stats_for_booking(instance, previous=instance.previous_state)
+
+
+@receiver(post_delete, sender=Booking)
+def release_daily_stats(sender, instance, **kwargs):
+    refresh_stats_for_booking(instance, previous=instance.previous_state)
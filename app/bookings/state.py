@@ -0,0 +1,191 @@
+"""
+Máquina de estados de las reservas.
+
+TRANSITIONS define qué cambios son legales (estado de origen -> destino), qué
+estado toma la habitación y qué marca de tiempo se registra. La usan tanto los
+métodos del modelo (confirm_booking, cancel_booking, complete_booking) como las
+acciones masivas del admin, para que ambos caminos apliquen las mismas reglas.
+
+bulk_transition() aplica una transición a un queryset con un número fijo de
+consultas, sin importar cuántas reservas toque:
+
+- una consulta para separar las reservas elegibles de las que no lo son, y
+  otra que las vuelve a leer con select_for_update() dentro de la transacción;
+- un update() de las reservas y un update() de sus habitaciones;
+- el índice de noches, las estadísticas, la caché del portal y la versión de
+  datos de los hoteles se actualizan a mano porque update() no dispara señales;
+- una sola fila de BookingTransitionLog con la lista de reservas afectadas.
+"""
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app.core import cache as portal_cache
+from app.core.services_stats import refresh_stats_for_bookings
+from app.core.versions import bump_on_commit
+from app.rooms.models import Room
+
+from .availability import ACTIVE_STATUSES, release_room_nights
+from .models import Booking, BookingTransitionLog
+
+# Tamaño de los bloques de ids en los update(): evita el límite de variables de SQLite
+CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class Transition:
+    name: str
+    field: str
+    sources: tuple
+    target: str
+    room_status: str = None
+    timestamp: str = None
+    label: str = ''
+
+    def allows(self, value):
+        return value in self.sources
+
+
+TRANSITIONS = {
+    t.name: t for t in (
+        Transition('confirm', 'status', ('pending',), 'confirmed', room_status='reserved',
+                   timestamp='confirmed_at', label='confirmadas'),
+        Transition('cancel', 'status', ('pending', 'confirmed'), 'cancelled', room_status='available',
+                   timestamp='cancelled_at', label='canceladas'),
+        Transition('complete', 'status', ('confirmed',), 'completed', room_status='cleaning',
+                   label='finalizadas'),
+        Transition('no_show', 'status', ('pending', 'confirmed'), 'no_show', room_status='available',
+                   label='marcadas como no-show'),
+        Transition('mark_paid', 'payment_status', ('pending', 'partial'), 'paid',
+                   label='marcadas como pagadas'),
+    )
+}
+
+
+def get_transition(name):
+    try:
+        return TRANSITIONS[name]
+    except KeyError:
+        raise ValidationError(f'Transición desconocida: {name}', code='unknown_transition')
+
+
+def allowed_transitions(booking):
+    """Nombres de las transiciones legales para la reserva en su estado actual"""
+    return [t.name for t in TRANSITIONS.values() if t.allows(getattr(booking, t.field))]
+
+
+def _log(transition, booking_ids, hotel_ids, user=None, reason=''):
+    return BookingTransitionLog.objects.create(
+        transition=transition.name,
+        field=transition.field,
+        to_value=transition.target,
+        booking_ids=list(booking_ids),
+        count=len(booking_ids),
+        hotel_id=next(iter(hotel_ids)) if len(hotel_ids) == 1 else None,
+        user=user if user is not None and user.is_authenticated else None,
+        reason=reason or '',
+    )
+
+
+def apply_transition(booking, name, user=None, reason=''):
+    """
+    Aplica la transición a una reserva. Retorna False si no es legal desde su
+    estado actual (sin escribir nada).
+    """
+    transition = get_transition(name)
+    if not transition.allows(getattr(booking, transition.field)):
+        return False
+    with transaction.atomic():
+        if transition.field == 'status':
+            fields = {}
+            if transition.timestamp:
+                fields[transition.timestamp] = timezone.now()
+            if transition.name == 'cancel':
+                fields['cancellation_reason'] = reason
+            booking._change_status(transition.target, transition.room_status, **fields)
+        else:
+            booking.payment_status = transition.target
+            booking.paid_amount = booking.total_price
+            booking.save(update_fields=['payment_status', 'paid_amount', 'updated_at'])
+        _log(transition, [booking.pk], {booking.hotel_id}, user=user, reason=reason)
+    return True
+
+
+def _illegal_transition(name, booking_ids):
+    return ValidationError(
+        f'{len(booking_ids)} reservas no admiten la transición {name}',
+        code='illegal_transition',
+        params={'booking_ids': booking_ids},
+    )
+
+
+def bulk_transition(queryset, name, user=None, reason='', strict=False):
+    """
+    Aplica la transición a todas las reservas del queryset.
+
+    Las que no admiten la transición se omiten; con strict=True se rechaza la
+    operación completa (ValidationError code='illegal_transition') sin escribir.
+
+    Returns:
+        {'updated': n, 'skipped': [ids omitidos], 'log': BookingTransitionLog o None}
+    """
+    transition = get_transition(name)
+    rows = list(queryset.order_by().values_list('id', transition.field))
+    eligible = [row[0] for row in rows if transition.allows(row[1])]
+    skipped = [row[0] for row in rows if not transition.allows(row[1])]
+    if strict and skipped:
+        raise _illegal_transition(name, skipped)
+    if not eligible:
+        return {'updated': 0, 'skipped': skipped, 'log': None}
+
+    values = {transition.field: transition.target, 'updated_at': timezone.now()}
+    if transition.timestamp:
+        values[transition.timestamp] = values['updated_at']
+    if transition.name == 'cancel':
+        values['cancellation_reason'] = reason
+    if transition.name == 'mark_paid':
+        values['paid_amount'] = F('total_price')
+
+    with transaction.atomic():
+        # Releer con bloqueo: entre la lectura y el update() otra petición pudo
+        # cambiar el estado, y solo las que siguen en un origen válido se tocan
+        locked = []
+        for start in range(0, len(eligible), CHUNK_SIZE):
+            locked += Booking.objects.select_for_update().filter(
+                id__in=eligible[start:start + CHUNK_SIZE], **{f'{transition.field}__in': transition.sources}
+            ).order_by().values_list('id', 'room_id', 'hotel_id')
+        booking_ids = [row[0] for row in locked]
+        changed = sorted(set(eligible) - set(booking_ids))
+        if strict and changed:
+            raise _illegal_transition(name, changed)
+        skipped += changed
+        if not booking_ids:
+            return {'updated': 0, 'skipped': skipped, 'log': None}
+        room_ids = sorted({row[1] for row in locked})
+        hotel_ids = {row[2] for row in locked if row[2] is not None}
+
+        updated = 0
+        for start in range(0, len(booking_ids), CHUNK_SIZE):
+            updated += Booking.objects.filter(id__in=booking_ids[start:start + CHUNK_SIZE]).update(**values)
+
+        if transition.room_status:
+            for start in range(0, len(room_ids), CHUNK_SIZE):
+                Room.objects.filter(id__in=room_ids[start:start + CHUNK_SIZE]).exclude(
+                    status=transition.room_status
+                ).update(status=transition.room_status, updated_at=values['updated_at'])
+            # update() no dispara las señales de Room: invalidar la caché del portal a mano
+            for hotel_id in hotel_ids | {portal_cache.ALL_HOTELS}:
+                transaction.on_commit(lambda hotel_id=hotel_id: portal_cache.invalidate_hotel(hotel_id))
+
+        if transition.field == 'status':
+            # Ni el índice de noches ni las estadísticas se enteran de un update()
+            if transition.target not in ACTIVE_STATUSES:
+                release_room_nights(booking_ids)
+            refresh_stats_for_bookings(booking_ids)
+
+        bump_on_commit(*hotel_ids)
+        log = _log(transition, booking_ids, hotel_ids, user=user, reason=reason)
+    return {'updated': updated, 'skipped': skipped, 'log': log}
@@ -1,3 +1,686 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel, HotelStaff
+from app.administration.resolver import hotel_cache
+from app.bookings.availability import is_room_available
+from app.bookings.imports import import_bookings, read_rows
+from app.bookings.models import Booking, BookingTransitionLog, RoomNight
+from app.bookings.occupancy import MAX_CALENDAR_DAYS, expand_runs, occupancy_masks, rooms_calendar
+from app.bookings.services import BookingService
+from app.bookings.state import allowed_transitions, bulk_transition
+from app.clients.models import Client
+from app.core.models import DailyHotelStats, EmailLog
+from app.core.profiling import profile_stats
+from app.rooms.models import Room
+
+
+class RoomNightIndexTestCase(TestCase):
+    """Tests del índice de noches ocupadas por habitación"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        self.today = timezone.now().date()
+
+    def create_booking(self, start, nights, status='pending'):
+        return Booking.objects.create(
+            hotel=self.hotel,
+            client=self.guest,
+            room=self.room,
+            check_in_date=self.today + timedelta(days=start),
+            check_out_date=self.today + timedelta(days=start + nights),
+            status=status,
+            total_price=Decimal('0'),
+        )
+
+    def test_new_booking_occupies_its_nights(self):
+        booking = self.create_booking(1, 3)
+        nights = list(RoomNight.objects.filter(booking=booking).order_by('date').values_list('date', flat=True))
+        self.assertEqual(nights, [self.today + timedelta(days=d) for d in (1, 2, 3)])
+
+    def test_overlap_is_detected_and_checkout_day_is_free(self):
+        self.create_booking(1, 3)
+        self.assertFalse(is_room_available(self.room, self.today + timedelta(days=3), self.today + timedelta(days=5)))
+        self.assertTrue(is_room_available(self.room, self.today + timedelta(days=4), self.today + timedelta(days=6)))
+        with self.assertRaises(ValidationError):
+            self.create_booking(2, 1)
+
+    def test_cancel_releases_nights(self):
+        booking = self.create_booking(1, 2, status='confirmed')
+        booking.cancel_booking('Prueba')
+        self.assertFalse(RoomNight.objects.filter(booking=booking).exists())
+        self.assertTrue(is_room_available(self.room, self.today + timedelta(days=1), self.today + timedelta(days=3)))
+
+    def test_date_change_moves_nights(self):
+        booking = self.create_booking(1, 2)
+        booking.check_in_date = self.today + timedelta(days=10)
+        booking.check_out_date = self.today + timedelta(days=11)
+        booking.save()
+        self.assertEqual(list(booking.nights.values_list('date', flat=True)), [self.today + timedelta(days=10)])
+
+    def test_payment_update_does_not_touch_index(self):
+        booking = self.create_booking(1, 2)
+        booking.payment_status = 'paid'
+        with self.assertNumQueries(1):
+            booking.save(update_fields=['payment_status'])
+
+    def test_storage_rejects_overlap_even_without_validation(self):
+        self.create_booking(1, 3)
+        bookings_before = Booking.objects.count()
+        with self.assertRaises(ValidationError) as ctx:
+            Booking(
+                hotel=self.hotel, client=self.guest, room=self.room, status='confirmed', total_price=Decimal('0'),
+                check_in_date=self.today + timedelta(days=3), check_out_date=self.today + timedelta(days=5),
+            ).save(skip_validation=True)
+        self.assertEqual(ctx.exception.code, 'room_unavailable')
+        # La reserva se deshizo junto con sus noches
+        self.assertEqual(Booking.objects.count(), bookings_before)
+        self.assertEqual(RoomNight.objects.filter(date=self.today + timedelta(days=4)).count(), 0)
+
+    def test_reactivating_into_taken_nights_is_rolled_back(self):
+        cancelled = self.create_booking(1, 2)
+        cancelled.cancel_booking('Prueba')
+        self.create_booking(2, 2)
+        cancelled.status = 'pending'
+        with self.assertRaises(ValidationError):
+            cancelled.save()
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+        self.assertFalse(cancelled.nights.exists())
+
+
+class BookingLifecycleTestCase(TestCase):
+    """Los cambios de estado solo escriben las filas y columnas que cambian"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=self.hotel
+        )
+        today = timezone.now().date()
+        self.booking = Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=self.room, status='pending', total_price=Decimal('0'),
+            check_in_date=today + timedelta(days=1), check_out_date=today + timedelta(days=3),
+        )
+
+    def capture(self, action):
+        with CaptureQueriesContext(connection) as ctx:
+            action()
+        return [query['sql'] for query in ctx.captured_queries]
+
+    def test_transition_updates_only_touched_columns(self):
+        Room.objects.filter(pk=self.room.pk).update(status='reserved')
+        booking = Booking.objects.get(pk=self.booking.pk)
+        queries = self.capture(lambda: booking.cancel_booking('Prueba'))
+        self.assertFalse([sql for sql in queries if 'clients_client' in sql])
+        booking_update = next(sql for sql in queries if sql.startswith('UPDATE "bookings_booking"'))
+        self.assertIn('"cancellation_reason"', booking_update)
+        self.assertNotIn('"check_in_date"', booking_update)
+        room_update = next(sql for sql in queries if sql.startswith('UPDATE "rooms_room"'))
+        self.assertNotIn('"price"', room_update)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'available')
+        self.assertFalse(booking.nights.exists())
+
+    def test_room_already_in_state_is_not_written(self):
+        Room.objects.filter(pk=self.room.pk).update(status='reserved')
+        booking = Booking.objects.get(pk=self.booking.pk)
+        queries = self.capture(booking.confirm_booking)
+        self.assertFalse([sql for sql in queries if sql.startswith('UPDATE "rooms_room"')])
+        self.assertIsNotNone(Booking.objects.get(pk=booking.pk).confirmed_at)
+
+    def test_client_hotel_synced_only_when_client_or_hotel_changes(self):
+        other = Client.objects.create(first_name='Luis', last_name='Gómez', email='luis@example.com', dni='23456789')
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.special_requests = 'Cuna'
+        self.assertFalse([sql for sql in self.capture(booking.save) if 'clients_client' in sql])
+
+        booking.client_id = other.pk
+        queries = self.capture(booking.save)
+        self.assertEqual(len([sql for sql in queries if sql.startswith('UPDATE "clients_client"')]), 1)
+        other.refresh_from_db()
+        self.assertEqual(other.hotel, self.hotel)
+
+    @override_settings(SAVE_PATH_PROFILE=True)
+    def test_profile_mode_logs_save_paths(self):
+        profile_stats(reset=True)
+        booking = Booking.objects.get(pk=self.booking.pk)
+        with self.assertLogs('app.profiling', 'INFO') as logs:
+            booking.confirm_booking()
+        self.assertTrue(any('Booking.confirm_booking' in line for line in logs.output))
+        stats = profile_stats(reset=True)
+        self.assertEqual(stats['Booking.save']['calls'], 1)
+        self.assertGreater(stats['Booking.confirm_booking']['queries'], stats['Booking.save']['queries'])
+
+
+class BookingStateMachineTestCase(TestCase):
+    """Transiciones masivas: consultas fijas, solo cambios legales y un registro por operación"""
+
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=self.hotel
+        )
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, number=str(100 + i), price=Decimal('100.00'), capacity=2)
+            for i in range(6)
+        ]
+        today = timezone.now().date()
+        self.bookings = [
+            Booking.objects.create(
+                hotel=self.hotel, client=self.guest, room=room, status=status, total_price=Decimal('200.00'),
+                check_in_date=today + timedelta(days=1), check_out_date=today + timedelta(days=3),
+            )
+            for room, status in zip(self.rooms, ['pending', 'pending', 'pending', 'confirmed', 'cancelled', 'completed'])
+        ]
+
+    def test_bulk_confirm_skips_illegal_and_logs_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            result = bulk_transition(Booking.objects.all(), 'confirm')
+        self.assertEqual(result['updated'], 3)
+        self.assertEqual(sorted(result['skipped']), [b.pk for b in self.bookings[3:]])
+        booking_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "bookings_booking"')]
+        room_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "rooms_room"')]
+        self.assertEqual((len(booking_updates), len(room_updates)), (1, 1))
+        self.assertEqual(Booking.objects.filter(status='confirmed', confirmed_at__isnull=False).count(), 3)
+        self.assertEqual(Room.objects.filter(status='reserved').count(), 3)
+        log = BookingTransitionLog.objects.get()
+        self.assertEqual((log.transition, log.to_value, log.count, log.hotel), ('confirm', 'confirmed', 3, self.hotel))
+        self.assertEqual(sorted(log.booking_ids), [b.pk for b in self.bookings[:3]])
+
+    def test_bookings_changed_before_the_lock_are_left_out(self):
+        raced = self.bookings[0]
+        atomic = transaction.atomic
+
+        def racing_atomic(*args, **kwargs):
+            # Otra petición cancela la reserva entre la lectura y la transacción
+            Booking.objects.filter(pk=raced.pk).update(status='cancelled')
+            return atomic(*args, **kwargs)
+
+        with mock.patch('app.bookings.state.transaction.atomic', racing_atomic):
+            result = bulk_transition(Booking.objects.all(), 'confirm')
+        self.assertEqual(result['updated'], 2)
+        self.assertIn(raced.pk, result['skipped'])
+        self.assertEqual(sorted(result['log'].booking_ids), [b.pk for b in self.bookings[1:3]])
+        self.assertEqual(result['log'].count, 2)
+        self.assertEqual(Booking.objects.get(pk=raced.pk).status, 'cancelled')
+        self.assertEqual(Room.objects.get(pk=raced.room_id).status, 'available')
+
+    def test_query_count_does_not_grow_with_selection(self):
+        def count(name, qs):
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_transition(qs, name)
+            return len(ctx.captured_queries)
+        small = count('cancel', Booking.objects.filter(pk=self.bookings[0].pk))
+        large = count('cancel', Booking.objects.filter(pk__in=[b.pk for b in self.bookings[1:4]]))
+        self.assertEqual(small, large)
+
+    def test_cancel_releases_nights_and_refreshes_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Booking.objects.all(), 'cancel', reason='Cierre')
+        self.assertFalse(RoomNight.objects.exists())
+        cancelled = Booking.objects.filter(status='cancelled').exclude(pk=self.bookings[4].pk)
+        self.assertEqual(cancelled.count(), 4)
+        self.assertTrue(all(b.cancelled_at and b.cancellation_reason == 'Cierre' for b in cancelled))
+        stats = DailyHotelStats.objects.filter(hotel=self.hotel)
+        self.assertTrue(stats.exists())
+        self.assertFalse(stats.exclude(occupied_rooms=0).exists())
+
+    def test_strict_rejects_without_writing(self):
+        with self.assertRaises(ValidationError) as ctx:
+            bulk_transition(Booking.objects.all(), 'complete', strict=True)
+        self.assertEqual(ctx.exception.code, 'illegal_transition')
+        self.assertEqual(Booking.objects.filter(status='completed').count(), 1)
+        self.assertFalse(BookingTransitionLog.objects.exists())
+
+    def test_mark_paid_copies_total_price(self):
+        result = bulk_transition(Booking.objects.all(), 'mark_paid')
+        self.assertEqual(result['updated'], 6)
+        self.assertEqual(set(Booking.objects.values_list('payment_status', 'paid_amount')), {('paid', Decimal('200.00'))})
+        self.assertEqual(bulk_transition(Booking.objects.all(), 'mark_paid')['updated'], 0)
+
+    def test_single_transitions_follow_the_same_rules(self):
+        booking = self.bookings[5]
+        self.assertFalse(booking.cancel_booking())
+        self.assertEqual(allowed_transitions(booking), ['mark_paid'])
+        pending = self.bookings[0]
+        self.assertTrue(pending.confirm_booking())
+        self.assertEqual(BookingTransitionLog.objects.get().booking_ids, [pending.pk])
+
+    def test_admin_actions_use_bulk_transition(self):
+        admin = get_user_model().objects.create_superuser('root', 'root@example.com', 'secret')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:bookings_booking_changelist'), {
+            'action': 'cancel_bookings',
+            '_selected_action': [b.pk for b in self.bookings],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 5)
+        log = BookingTransitionLog.objects.get()
+        self.assertEqual((log.transition, log.count, log.user), ('cancel', 4, admin))
+
+
+class OccupancyCalendarTestCase(TestCase):
+    """Calendario por máscaras de días y respuesta en tramos"""
+
+    def setUp(self):
+        cache.clear()
+        hotel_cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=self.hotel
+        )
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.other = Room.objects.create(hotel=self.hotel, number='102', price=Decimal('80.00'), capacity=2)
+        self.start = timezone.now().date() + timedelta(days=10)
+
+    def book(self, room, first, last, status='confirmed'):
+        return Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=room, status=status, total_price=Decimal('0'),
+            check_in_date=self.start + timedelta(days=first), check_out_date=self.start + timedelta(days=last),
+        )
+
+    def test_bookings_applied_as_intervals(self):
+        self.book(self.room, -2, 2)
+        self.book(self.room, 5, 7)
+        self.book(self.room, 7, 8, status='cancelled')
+        masks = occupancy_masks([self.room.pk, self.other.pk], self.start, self.start + timedelta(days=9))
+        self.assertEqual(bytes(masks[self.room.pk]), bytes([1, 1, 0, 0, 0, 1, 1, 0, 0, 0]))
+        self.assertEqual(bytes(masks[self.other.pk]), bytes(10))
+
+    def test_runs_and_free_room_counts(self):
+        self.book(self.room, 0, 3)
+        self.book(self.other, 2, 4)
+        end = self.start + timedelta(days=5)
+        with self.assertNumQueries(1):
+            calendar = rooms_calendar([self.room, self.other], self.start, end)
+        day = lambda n: (self.start + timedelta(days=n)).isoformat()
+        self.assertEqual(calendar['rooms'][self.room.pk], [[day(0), 3, False], [day(3), 3, True]])
+        self.assertEqual(calendar['free_rooms'], [[day(0), 2, 1], [day(2), 1, 0], [day(3), 1, 1], [day(4), 2, 2]])
+        self.assertEqual(len(expand_runs(calendar['rooms'][self.other.pk])), 6)
+
+    def test_room_endpoint_returns_runs(self):
+        self.book(self.room, 1, 2)
+        end = self.start + timedelta(days=3)
+        url = reverse('room_availability', args=[self.room.pk])
+        params = {'start_date': self.start.isoformat(), 'end_date': end.isoformat()}
+        data = self.client.get(url, params).json()
+        self.assertEqual([run[1:] for run in data['runs']], [[1, True], [1, False], [2, True]])
+        self.assertNotIn('availability', data)
+        legacy = self.client.get(url, {**params, 'format': 'days'}).json()['availability']
+        self.assertEqual(legacy[(self.start + timedelta(days=1)).isoformat()]['status'], 'occupied')
+        self.assertEqual(len(legacy), 4)
+
+    def test_range_is_bounded(self):
+        url = reverse('room_availability', args=[self.room.pk])
+        response = self.client.get(url, {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=MAX_CALENDAR_DAYS)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_hotel_endpoint_covers_several_rooms(self):
+        self.book(self.other, 0, 1)
+        response = self.client.get(reverse('rooms_availability'), {
+            'hotel': self.hotel.slug,
+            'rooms': f'{self.room.pk},{self.other.pk}',
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=1)).isoformat(),
+        })
+        data = response.json()
+        self.assertEqual(set(data['rooms']), {str(self.room.pk), str(self.other.pk)})
+        self.assertEqual(data['free_rooms'][0][1:], [1, 1])
+
+
+class HotelGridApiTestCase(TestCase):
+    """Grilla habitaciones x noches del panel con GET condicional"""
+
+    def setUp(self):
+        cache.clear()
+        hotel_cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=self.hotel
+        )
+        self.room = Room.objects.create(hotel=self.hotel, number='101', floor=1, price=Decimal('100.00'), capacity=2)
+        self.other = Room.objects.create(hotel=self.hotel, number='201', floor=2, price=Decimal('80.00'), capacity=2)
+        self.start = timezone.now().date() + timedelta(days=5)
+        self.booking = Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=self.other, status='pending', total_price=Decimal('0'),
+            check_in_date=self.start + timedelta(days=1), check_out_date=self.start + timedelta(days=3),
+        )
+        self.user = get_user_model().objects.create_user('recepcion', 'recepcion@example.com', 'secret')
+        HotelStaff.objects.create(user=self.user, hotel=self.hotel)
+        self.client.force_login(self.user)
+        self.url = f'/api/hotels/{self.hotel.pk}/grid'
+        self.params = {'start_date': self.start.isoformat(), 'days': 4}
+
+    def test_grid_is_packed_by_room_and_night(self):
+        with self.assertNumQueries(5):  # sesión, usuario, hotel con permiso, habitaciones, reservas
+            response = self.client.get(self.url, self.params)
+        data = response.json()
+        self.assertEqual(data['rooms'], [self.room.pk, self.other.pk])
+        self.assertEqual(data['days'], 4)
+        status = base64.b64decode(data['status'])
+        self.assertEqual(list(status), [0, 0, 0, 0, 0, 1, 1, 0])
+        ids = memoryview(base64.b64decode(data['bookings'])).cast('I').tolist()
+        self.assertEqual(ids, [0, 0, 0, 0, 0, self.booking.pk, self.booking.pk, 0])
+
+    @override_settings(CACHES={'default': {
+        # Los 304 por versión de datos solo se activan con un backend compartido
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'o11ce-test-cache'),
+    }})
+    def test_conditional_get_returns_304_until_grid_changes(self):
+        cache.clear()
+        etag = self.client.get(self.url, self.params)['ETag']
+        response = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.confirm_booking()
+        response = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_requires_hotel_access(self):
+        outsider = get_user_model().objects.create_user('otro', 'otro@example.com', 'secret')
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(self.url, self.params).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url, {'days': MAX_CALENDAR_DAYS + 1}).status_code, 400)
+
+
+class ConcurrentReservationTestCase(TransactionTestCase):
+    """Muchas peticiones simultáneas sobre la misma habitación nunca ocupan dos veces una noche"""
+
+    WORKERS = 12
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.guests = [
+            Client.objects.create(first_name=f'Ana{i}', email=f'ana{i}@example.com', dni=f'3000{i:04d}')
+            for i in range(self.WORKERS)
+        ]
+        self.today = timezone.now().date()
+
+    def hammer(self, ranges, skip_validation):
+        """Cada hilo intenta su reserva a la vez; devuelve (creadas, rechazadas)"""
+        barrier = threading.Barrier(len(ranges))
+        created, rejected, errors = [], [], []
+
+        def worker(index, start, nights):
+            try:
+                barrier.wait()
+                booking = Booking(
+                    hotel=self.hotel, client=self.guests[index], room=self.room, status='pending',
+                    check_in_date=self.today + timedelta(days=start),
+                    check_out_date=self.today + timedelta(days=start + nights), total_price=Decimal('0'),
+                )
+                for attempt in range(50):
+                    try:
+                        booking.save(skip_validation=skip_validation)
+                        created.append(booking.pk)
+                        return
+                    except ValidationError:
+                        rejected.append(index)
+                        return
+                    except OperationalError:
+                        # SQLite en memoria (tests) informa el bloqueo de escritura sin esperar: reintentar
+                        booking.pk = None
+                        time.sleep(0.005 * (attempt + 1))
+                errors.append(f'{index}: base bloqueada')
+            except Exception as e:
+                errors.append(f'{index}: {e!r}')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i, *r)) for i, r in enumerate(ranges)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return created, rejected
+
+    def assert_no_double_booking(self):
+        nights = list(RoomNight.objects.values_list('room_id', 'date'))
+        self.assertEqual(len(nights), len(set(nights)))
+        active = list(Booking.objects.filter(status__in=['pending', 'confirmed']).order_by('check_in_date'))
+        for previous, current in zip(active, active[1:]):
+            self.assertLessEqual(previous.check_out_date, current.check_in_date)
+
+    def test_same_dates_only_one_wins(self):
+        created, rejected = self.hammer([(5, 3)] * self.WORKERS, skip_validation=True)
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(rejected), self.WORKERS - 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assert_no_double_booking()
+
+    def test_overlapping_ranges_with_validation(self):
+        ranges = [(1 + i, 1 + i % 3) for i in range(self.WORKERS)]
+        created, rejected = self.hammer(ranges, skip_validation=False)
+        self.assertEqual(len(created) + len(rejected), self.WORKERS)
+        self.assertGreaterEqual(len(created), 1)
+        self.assertEqual(Booking.objects.count(), len(created))
+        self.assert_no_double_booking()
+
+
+class BookingServiceTestCase(TestCase):
+    """Tests del alta unificada de reservas (BookingService.reserve)"""
+
+    # Consultas de una reserva con cliente existente, sin contar los efectos posteriores al commit
+    RESERVE_QUERIES = 12
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, number=str(101 + i), price=Decimal('100.00'), capacity=2)
+            for i in range(3)
+        ]
+        self.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=self.hotel
+        )
+        self.today = timezone.now().date()
+
+    def dates(self, start, nights):
+        return self.today + timedelta(days=start), self.today + timedelta(days=start + nights)
+
+    def reserve(self, room, start, nights, **kwargs):
+        kwargs.setdefault('guest', {'email': 'ana@example.com', 'dni': '12345678'})
+        with self.captureOnCommitCallbacks(execute=True):
+            return BookingService.reserve(BookingService.get_room(room.id), *self.dates(start, nights), **kwargs)
+
+    def test_reserve_prices_occupies_and_queues_email(self):
+        booking, created = self.reserve(self.rooms[0], 1, 3)
+        self.assertFalse(created)
+        self.assertEqual(booking.client, self.guest)
+        self.assertEqual(booking.total_price, Decimal('300.00'))
+        self.assertEqual(booking.nights.count(), 3)
+        self.assertTrue(EmailLog.objects.filter(booking=booking, email_type='booking_confirmation').exists())
+
+    def test_query_count_does_not_depend_on_stay_length(self):
+        for room, nights in ((self.rooms[0], 1), (self.rooms[1], 14)):
+            room = BookingService.get_room(room.id)
+            with self.assertNumQueries(self.RESERVE_QUERIES):
+                BookingService.reserve(
+                    room, *self.dates(1, nights), guest={'email': 'ana@example.com'}, notify=False
+                )
+
+    def test_unavailable_room_has_no_side_effects(self):
+        self.reserve(self.rooms[0], 1, 3)
+        with self.assertRaises(ValidationError) as ctx:
+            self.reserve(self.rooms[0], 2, 2, guest={'email': 'otro@example.com', 'dni': '87654321'})
+        self.assertEqual(ctx.exception.code, 'room_unavailable')
+        self.assertFalse(Client.objects.filter(email='otro@example.com').exists())
+        self.assertEqual(EmailLog.objects.count(), 1)
+
+    def test_client_found_by_dni_and_conflicts_rejected(self):
+        booking, created = self.reserve(self.rooms[0], 1, 1, guest={'email': 'ana.nueva@example.com', 'dni': '12345678'})
+        self.assertFalse(created)
+        self.guest.refresh_from_db()
+        self.assertEqual(self.guest.email, 'ana.nueva@example.com')
+
+        Client.objects.create(first_name='Luis', last_name='Gómez', email='luis@example.com', dni='23456789')
+        with self.assertRaises(ValidationError) as ctx:
+            self.reserve(self.rooms[1], 1, 1, guest={'email': 'luis@example.com', 'dni': '12345678'})
+        self.assertEqual(ctx.exception.code, 'client_conflict')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_user_never_takes_another_users_client(self):
+        User = get_user_model()
+        owner = User.objects.create_user(username='duena', email='duena@example.com', password='x')
+        other = User.objects.create_user(username='otro', email='otro@example.com', password='x')
+        # Sin los perfiles que crea la señal de usuarios
+        Client.objects.filter(user__in=[owner, other]).delete()
+        self.guest.user = owner
+        self.guest.save()
+
+        booking, created = self.reserve(self.rooms[0], 1, 1, guest={'email': 'ana@example.com'}, user=other)
+        self.assertTrue(created)
+        self.assertEqual(booking.client.user, other)
+        self.assertNotEqual(booking.client.email, 'ana@example.com')
+        # La segunda reserva del mismo usuario reutiliza su cliente
+        again, created = self.reserve(self.rooms[1], 1, 1, guest={}, user=other)
+        self.assertFalse(created)
+        self.assertEqual(again.client, booking.client)
+
+    def test_closed_hotel_is_rejected(self):
+        self.hotel.is_blocked = True
+        self.hotel.save()
+        with self.assertRaises(ValidationError) as ctx:
+            self.reserve(self.rooms[0], 1, 1)
+        self.assertEqual(ctx.exception.code, 'hotel_closed')
+
+    def test_entry_points_share_the_pipeline(self):
+        check_in, check_out = self.dates(1, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reservas/crear-con-cliente/', {
+                'nombre': 'Marta Sosa', 'email': 'marta@example.com', 'dni': '34567890',
+                'habitacion_id': self.rooms[0].id, 'fecha_inicio': check_in.isoformat(), 'fecha_fin': check_out.isoformat(),
+            }, content_type='application/json')
+        data = response.json()
+        self.assertTrue(data['success'], data)
+        self.assertEqual(data['total_price'], 200.0)
+        self.rooms[0].refresh_from_db()
+        self.assertEqual(self.rooms[0].status, 'reserved')
+
+        url = reverse('hotel_confirm_reservation', args=[self.hotel.slug])
+        response = self.client.post(url, {
+            'room_id': self.rooms[1].id, 'full_name': 'Marta Sosa', 'email': 'marta@example.com',
+            'check_in': check_in.isoformat(), 'check_out': check_out.isoformat(), 'guests': '2',
+        })
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, {
+            'room_id': self.rooms[1].id, 'full_name': 'Otra Persona', 'email': 'otra@example.com',
+            'check_in': check_in.isoformat(), 'check_out': check_out.isoformat(), 'guests': '1',
+        })
+        self.assertEqual(response.status_code, 400)
+        marta = Client.objects.get(email='marta@example.com')
+        self.assertEqual(marta.booking_set.count(), 2)
+        self.assertEqual(marta.first_name, 'Marta')
+
+
+class BookingImportTestCase(TestCase):
+    """Tests de la importación masiva de reservas (CSV/JSONL)"""
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.other_room = Room.objects.create(hotel=self.hotel, number='102', price=Decimal('50.00'), capacity=2)
+        self.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        self.day = timezone.now().date() + timedelta(days=30)
+        Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=self.room, status='confirmed', total_price=Decimal('0'),
+            check_in_date=self.day, check_out_date=self.day + timedelta(days=2),
+        )
+
+    def d(self, offset):
+        return (self.day + timedelta(days=offset)).isoformat()
+
+    def csv(self, *lines):
+        header = 'room,check_in_date,check_out_date,name,email,dni,status,total_price\n'
+        return header + '\n'.join(lines) + '\n'
+
+    def test_set_based_import_reports_row_errors(self):
+        content = self.csv(
+            f'101,{self.d(2)},{self.d(4)},Luis Gómez,luis@example.com,23456789,,',       # libre desde el check-out
+            f'101,{self.d(1)},{self.d(3)},Eva Ruiz,eva@example.com,34567890,,',          # pisa la reserva existente
+            f'101,{self.d(3)},{self.d(5)},Eva Ruiz,eva@example.com,34567890,,',          # pisa la fila 2 del archivo
+            f'102,{self.d(3)},{self.d(5)},Eva Ruiz,eva@example.com,34567890,,80',        # mismo cliente nuevo
+            f'102,{self.d(3)},{self.d(5)},Ana Pérez,ana@example.com,12345678,cancelled,',  # cancelada: no ocupa
+            f'999,{self.d(0)},{self.d(1)},X,x@example.com,45678901,,',
+            f'102,{self.d(5)},{self.d(5)},X,x@example.com,45678901,,',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_bookings(read_rows(content, 'csv'), self.hotel)
+        self.assertEqual((report['rows'], report['created'], report['clients_created']), (7, 3, 2))
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4, 7, 8])
+        self.assertEqual(Client.objects.filter(email='eva@example.com').count(), 1)
+
+        luis = Booking.objects.get(client__email='luis@example.com')
+        self.assertEqual(luis.total_price, Decimal('200.00'))
+        self.assertEqual(luis.nights.count(), 2)
+        self.assertEqual(Booking.objects.get(client__email='eva@example.com').total_price, Decimal('80'))
+        self.assertFalse(Booking.objects.get(status='cancelled').nights.exists())
+        # Estadísticas recalculadas y sin emails salvo que se pidan
+        stats = DailyHotelStats.objects.get(hotel=self.hotel, date=self.day + timedelta(days=3))
+        self.assertEqual(stats.occupied_rooms, 2)
+        self.assertEqual(EmailLog.objects.exclude(booking__client=self.guest).count(), 0)
+
+    def test_jsonl_command_with_notify(self):
+        lines = [
+            json.dumps({'room_id': self.other_room.id, 'check_in_date': self.d(0), 'check_out_date': self.d(1),
+                        'first_name': 'Luis', 'email': 'luis@example.com'}),
+            '{no es json',
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as handle:
+            handle.write('\n'.join(lines))
+        self.addCleanup(os.unlink, handle.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_bookings', handle.name, hotel='hotel-test', notify=True, stdout=open(os.devnull, 'w'))
+        booking = Booking.objects.get(client__email='luis@example.com')
+        self.assertTrue(booking.client.dni.startswith('IMP-'))
+        self.assertTrue(EmailLog.objects.filter(booking=booking, email_type='booking_confirmation').exists())
+
+    def test_api_requires_hotel_permission(self):
+        User = get_user_model()
+        url = reverse('import_bookings_api') + '?hotel=hotel-test'
+        body = self.csv(f'102,{self.d(0)},{self.d(1)},Luis Gómez,luis@example.com,23456789,,')
+        self.client.force_login(User.objects.create_user(username='recep', email='recep@example.com', password='x'))
+        self.assertEqual(self.client.post(url, body, content_type='text/csv').status_code, 403)
+
+        self.client.force_login(User.objects.create_user(username='jefe', email='jefe@example.com', password='x', is_staff=True))
+        response = self.client.post(url + '&dry_run=1', body, content_type='text/csv')
+        self.assertEqual(response.json()['created'], 1)
+        self.assertFalse(Client.objects.filter(email='luis@example.com').exists())
+        response = self.client.post(url, body, content_type='text/csv')
+        self.assertEqual(response.json()['created'], 1)
+        self.assertTrue(Booking.objects.filter(client__email='luis@example.com').exists())
@@ -4,18 +4,24 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 
-from .models import Booking
+from .models import Booking, RoomNight
+from .availability import is_room_available
+from .imports import FORMATS, detect_format, import_bookings, read_rows
+from .services import BookingService
 from app.rooms.models import Room
 from app.clients.models import Client
-from app.administration.models import Hotel
+from app.administration.models import Hotel, HotelAdmin
+from app.administration.resolver import get_hotel_by_slug, get_request_hotel, resolve_hotel
 from app.core.services import EmailService
 from django.db.models import Q
-from django.http import HttpResponse
-import csv
+from app.core.utils import CSV_CHUNK_SIZE, stream_csv_response
+from app.core.pagination import InvalidCursor, keyset_paginate, parse_page_size
+from app.core.versions import conditional_on_versions, hotel_param
 
 def booking_step1(request):
     """Paso 1: Selección de fechas y número de personas"""
@@ -64,11 +70,9 @@ def booking_step2(request):
         active=True,
         capacity__gte=guests_count,
         status='available'
-    ).exclude(
-        booking__check_in_date__lt=check_out,
-        booking__check_out_date__gt=check_in,
-        booking__status__in=['pending', 'confirmed']
-    ).distinct()
+    ).with_main_image().exclude(
+        id__in=RoomNight.objects.filter(date__gte=check_in, date__lt=check_out).values('room_id')
+    )
     
     # Calcular precio total para cada habitación
     for room in available_rooms:
@@ -173,86 +177,24 @@ def create_booking_final(request):
                 'message': 'No se encontraron datos de reserva'
             })
         
-        # Obtener la habitación
-        try:
-            room = Room.objects.get(id=booking_data['room_id'])
-        except Room.DoesNotExist:
-            return JsonResponse({
-                'success': False,
-                'message': 'La habitación seleccionada no existe'
-            })
-        
-        # Verificar disponibilidad una vez más
         check_in = datetime.strptime(booking_data['check_in_date'], '%Y-%m-%d').date()
         check_out = datetime.strptime(booking_data['check_out_date'], '%Y-%m-%d').date()
-        
-        conflicting_bookings = Booking.objects.filter(
-            room=room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in
-        )
-        
-        if conflicting_bookings.exists():
-            return JsonResponse({
-                'success': False,
-                'message': 'La habitación ya no está disponible para las fechas seleccionadas'
-            })
-        
-        # Crear o obtener el cliente
-        client, created = Client.objects.get_or_create(
-            email=booking_data['email'],
-            defaults={
-                'first_name': booking_data['first_name'],
-                'last_name': booking_data['last_name'],
-                'phone': booking_data.get('phone', ''),
-                'dni': booking_data.get('dni', ''),
-                'user': request.user if request.user.is_authenticated else None,
-            }
-        )
-        
-        # Si el cliente ya existía, actualizar datos si es necesario
-        if not created:
-            if not client.first_name:
-                client.first_name = booking_data['first_name']
-            if not client.last_name:
-                client.last_name = booking_data['last_name']
-            if not client.phone and booking_data.get('phone'):
-                client.phone = booking_data['phone']
-            if not client.dni and booking_data.get('dni'):
-                client.dni = booking_data['dni']
-            if not client.user and request.user.is_authenticated:
-                client.user = request.user
-        client.hotel = getattr(room, 'hotel', None)
-        client.save()
-        
-        # Calcular precio total
-        duration = (check_out - check_in).days
-        total_price = room.price * duration
-        
-        # Validar suscripción del hotel
-        if hasattr(room, 'hotel') and room.hotel and hasattr(room.hotel, 'can_accept_new_bookings'):
-            if not room.hotel.can_accept_new_bookings:
-                return JsonResponse({'success': False, 'message': 'Este hotel no está aceptando reservas nuevas.'}, status=403)
-        # Crear la reserva
-        booking = Booking.objects.create(
-            hotel=room.hotel,
-            client=client,
-            room=room,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            status='confirmed',
-            payment_status='pending',
-            guests_count=int(booking_data['guests_count']),
-            special_requests=booking_data.get('special_requests', ''),
-            total_price=total_price
-        )
-        
-        # Cambiar estado de la habitación
-        room.change_status('reserved')
-        
-        # Enviar email de confirmación
-        email_result = EmailService.send_booking_confirmation(booking.id)
+        try:
+            room = BookingService.get_room(booking_data['room_id'])
+            booking, _ = BookingService.reserve(
+                room,
+                check_in,
+                check_out,
+                guest=booking_data,
+                user=request.user,
+                guests_count=booking_data['guests_count'],
+                special_requests=booking_data.get('special_requests', ''),
+                mark_room_reserved=True,
+            )
+        except ValidationError as e:
+            status = 403 if e.code == 'hotel_closed' else 200
+            message = 'La habitación ya no está disponible para las fechas seleccionadas' if e.code == 'room_unavailable' else e.messages[0]
+            return JsonResponse({'success': False, 'message': message}, status=status)
         
         # Limpiar datos de sesión
         if 'booking_data' in request.session:
@@ -262,7 +204,7 @@ def create_booking_final(request):
             'success': True,
             'message': 'Reserva creada exitosamente',
             'booking_id': booking.id,
-            'email_sent': email_result.get('success', False),
+            'email_queued': True,
             'redirect_url': f'/portal/my-bookings/{booking.id}/'
         })
         
@@ -298,7 +240,7 @@ def booking_detail(request, booking_id):
 @login_required
 def panel_booking_detail_hotel_view(request, hotel_slug, booking_id):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         messages.error(request, 'Hotel no encontrado.')
         return redirect('panel_bookings_hotel', hotel_slug=hotel_slug)
@@ -360,14 +302,8 @@ def cancel_booking(request, booking_id):
         # Cancelar la reserva
         booking.cancel_booking()
         
-        # Enviar email de cancelación
-        try:
-            EmailService.send_booking_cancellation(booking.id)
-        except Exception as e:
-            # Log del error pero no fallar la cancelación
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error al enviar email de cancelación para reserva {booking.id}: {str(e)}")
+        # Encolar email de cancelación
+        EmailService.queue_booking_email('booking_cancellation', booking.id)
         
         return JsonResponse({
             'success': True,
@@ -381,22 +317,27 @@ def cancel_booking(request, booking_id):
             'message': f'Error al cancelar la reserva: {str(e)}'
         })
 
+BOOKING_LIST_FIELDS = (
+    'id', 'client_id', 'client__first_name', 'client__last_name', 'client__email',
+    'room_id', 'room__number', 'room__type', 'room__price',
+    'check_in_date', 'check_out_date', 'total_price', 'status', 'payment_status',
+    'guests_count', 'special_requests', 'created_at',
+)
+
+
 @login_required
 @require_http_methods(["GET"])
+@conditional_on_versions(hotel_param)
 def bookings_api(request):
-    """API: Listar reservas con filtros"""
-    qs = Booking.objects.select_related('client', 'room', 'hotel').all().order_by('-created_at')
+    """API: Listar reservas con filtros, paginado por cursor sobre (created_at, id)"""
+    qs = Booking.objects.all()
     hotel_param = request.GET.get('hotel')
     if hotel_param:
         try:
             qs = qs.filter(hotel_id=int(hotel_param))
         except Exception:
-            from app.administration.models import Hotel
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-                qs = qs.filter(hotel=hotel)
-            except Hotel.DoesNotExist:
-                qs = qs.none()
+            hotel = get_hotel_by_slug(str(hotel_param))
+            qs = qs.filter(hotel=hotel) if hotel else qs.none()
 
     status = request.GET.get('status')
     payment = request.GET.get('payment')
@@ -410,34 +351,47 @@ def bookings_api(request):
     if check_in:
         qs = qs.filter(check_in_date=check_in)
     if search:
-        qs = qs.filter(Q(client__full_name__icontains=search) | Q(room__number__icontains=search))
+        qs = qs.filter(
+            Q(client__first_name__icontains=search)
+            | Q(client__last_name__icontains=search)
+            | Q(room__number__icontains=search)
+        )
+
+    try:
+        page = keyset_paginate(
+            qs, ['-created_at', '-id'], BOOKING_LIST_FIELDS,
+            cursor=request.GET.get('cursor'), page_size=parse_page_size(request.GET.get('page_size')),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-    data = []
-    for b in qs:
-        data.append({
-            'id': b.id,
+    page['results'] = [
+        {
+            'id': b['id'],
             'client': {
-                'id': b.client.id,
-                'full_name': getattr(b.client, 'full_name', str(b.client)),
-                'email': getattr(b.client, 'email', ''),
+                'id': b['client_id'],
+                'full_name': f"{b['client__first_name']} {b['client__last_name']}",
+                'email': b['client__email'] or '',
             },
             'room': {
-                'id': b.room.id if b.room else None,
-                'number': b.room.number if b.room else '',
-                'type': b.room.type if b.room else '',
-                'price': float(b.room.price) if b.room and b.room.price is not None else 0,
+                'id': b['room_id'],
+                'number': b['room__number'] or '',
+                'type': b['room__type'] or '',
+                'price': float(b['room__price']) if b['room__price'] is not None else 0,
             },
-            'check_in_date': b.check_in_date.isoformat() if b.check_in_date else None,
-            'check_out_date': b.check_out_date.isoformat() if b.check_out_date else None,
-            'duration': b.duration,
-            'total_price': float(b.total_price) if b.total_price is not None else 0,
-            'status': b.status,
-            'payment_status': b.payment_status,
-            'guests_count': b.guests_count,
-            'special_requests': b.special_requests or '',
-            'created_at': b.created_at.isoformat() if b.created_at else None,
-        })
-    return JsonResponse(data, safe=False)
+            'check_in_date': b['check_in_date'].isoformat() if b['check_in_date'] else None,
+            'check_out_date': b['check_out_date'].isoformat() if b['check_out_date'] else None,
+            'duration': (b['check_out_date'] - b['check_in_date']).days if b['check_in_date'] and b['check_out_date'] else 0,
+            'total_price': float(b['total_price']) if b['total_price'] is not None else 0,
+            'status': b['status'],
+            'payment_status': b['payment_status'],
+            'guests_count': b['guests_count'],
+            'special_requests': b['special_requests'] or '',
+            'created_at': b['created_at'].isoformat() if b['created_at'] else None,
+        }
+        for b in page['results']
+    ]
+    return JsonResponse(page)
 
 @login_required
 @csrf_exempt
@@ -453,58 +407,28 @@ def create_booking_api(request):
                 return JsonResponse({'error': f'Campo requerido: {field}'}, status=400)
 
         client = get_object_or_404(Client, id=payload['client_id'])
-        room = get_object_or_404(Room, id=payload['room_id'])
+        room = get_object_or_404(Room.objects.select_related('hotel'), id=payload['room_id'])
         check_in = datetime.strptime(payload['check_in_date'], '%Y-%m-%d').date()
         check_out = datetime.strptime(payload['check_out_date'], '%Y-%m-%d').date()
 
-        if check_in >= check_out:
-            return JsonResponse({'error': 'La fecha de salida debe ser posterior a la de llegada'}, status=400)
-
-        # Verificar conflictos de fechas para la habitación
-        conflicts = Booking.objects.filter(
-            room=room,
-            status__in=['pending', 'confirmed'],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in
-        )
-        if conflicts.exists():
-            return JsonResponse({'error': 'La habitación no está disponible para las fechas seleccionadas'}, status=400)
-
         status_val = payload.get('status', 'confirmed')
-        payment_status_val = payload.get('payment_status', 'pending')
-        guests_count = int(payload.get('guests_count', 1))
-        special_requests = payload.get('special_requests', '')
-
-        duration = (check_out - check_in).days
-        total_price = room.price * duration
-
-        # Asegurar asociación de hotel
-        if getattr(client, 'hotel_id', None) != getattr(room, 'hotel_id', None):
-            client.hotel = getattr(room, 'hotel', None)
-            try:
-                client.save(update_fields=['hotel'])
-            except Exception:
-                client.save()
-        # Validar suscripción del hotel
-        if hasattr(room, 'hotel') and room.hotel and hasattr(room.hotel, 'can_accept_new_bookings'):
-            if not room.hotel.can_accept_new_bookings:
-                return JsonResponse({'error': 'Este hotel no está aceptando reservas nuevas.'}, status=403)
-        booking = Booking.objects.create(
-            hotel=getattr(room, 'hotel', None),
-            client=client,
-            room=room,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            status=status_val,
-            payment_status=payment_status_val,
-            guests_count=guests_count,
-            special_requests=special_requests,
-            total_price=total_price
-        )
-
-        # Cambiar estado de la habitación si corresponde
-        if booking.status in ['pending', 'confirmed']:
-            room.change_status('reserved')
+        try:
+            booking, _ = BookingService.reserve(
+                room,
+                check_in,
+                check_out,
+                client=client,
+                status=status_val,
+                payment_status=payload.get('payment_status', 'pending'),
+                guests_count=int(payload.get('guests_count', 1)),
+                special_requests=payload.get('special_requests', ''),
+                notify=status_val == 'confirmed',
+                mark_room_reserved=True,
+            )
+        except ValidationError as e:
+            if e.code == 'room_unavailable':
+                return JsonResponse({'error': 'La habitación no está disponible para las fechas seleccionadas'}, status=400)
+            return JsonResponse({'error': e.messages[0]}, status=403 if e.code == 'hotel_closed' else 400)
 
         return JsonResponse({
             'id': booking.id,
@@ -523,6 +447,46 @@ def bookings_api_collection(request):
     else:
         return create_booking_api(request)
 
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def import_bookings_api(request):
+    """
+    API: Importación masiva de reservas (CSV o JSONL) para un hotel.
+
+    Acepta el archivo como multipart (campo `file`) o como cuerpo crudo
+    (Content-Type text/csv o application/x-ndjson). Parámetros: hotel (id o slug),
+    format, notify=1, dry_run=1. Responde el reporte con los errores por línea.
+    """
+    hotel = resolve_hotel(request.GET.get('hotel') or request.POST.get('hotel'))
+    if hotel is None:
+        return JsonResponse({'error': 'Hotel no encontrado'}, status=404)
+    if not (request.user.is_staff or HotelAdmin.objects.filter(user=request.user, hotel=hotel).exists()):
+        return JsonResponse({'error': 'No autorizado para importar reservas en este hotel'}, status=403)
+
+    upload = request.FILES.get('file')
+    if upload is not None:
+        default = 'jsonl' if 'json' in (upload.content_type or '') else 'csv'
+        fmt = detect_format(upload.name, default)
+        content = upload.read()
+    else:
+        fmt = 'jsonl' if 'json' in (request.content_type or '') else 'csv'
+        content = request.body
+    fmt = request.GET.get('format') or request.POST.get('format') or fmt
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f'Formato no soportado: {fmt}'}, status=400)
+    if not content:
+        return JsonResponse({'error': 'Archivo vacío'}, status=400)
+
+    def flag(name):
+        return (request.GET.get(name) or request.POST.get(name) or '') in ('1', 'true', 'on')
+
+    try:
+        report = import_bookings(read_rows(content, fmt), hotel, notify=flag('notify'), dry_run=flag('dry_run'))
+    except UnicodeDecodeError:
+        return JsonResponse({'error': 'El archivo debe estar codificado en UTF-8'}, status=400)
+    return JsonResponse(report)
+
 @login_required
 @csrf_exempt
 @require_http_methods(["PUT"])
@@ -545,13 +509,7 @@ def update_booking_api(request, booking_id):
             if ci >= co:
                 return JsonResponse({'error': 'La fecha de salida debe ser posterior a la de llegada'}, status=400)
 
-            conflicts = Booking.objects.filter(
-                room=room,
-                status__in=['pending', 'confirmed'],
-                check_in_date__lt=co,
-                check_out_date__gt=ci
-            ).exclude(id=booking.id)
-            if conflicts.exists():
+            if not is_room_available(room, ci, co, exclude_booking=booking):
                 return JsonResponse({'error': 'La habitación no está disponible para las nuevas fechas'}, status=400)
 
             booking.room = room
@@ -640,14 +598,8 @@ def cancel_booking(request, booking_id):
         # Cancelar la reserva
         booking.cancel_booking()
         
-        # Enviar email de cancelación
-        try:
-            EmailService.send_booking_cancellation(booking.id)
-        except Exception as e:
-            # Log del error pero no fallar la cancelación
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error al enviar email de cancelación para reserva {booking.id}: {str(e)}")
+        # Encolar email de cancelación
+        EmailService.queue_booking_email('booking_cancellation', booking.id)
         
         return JsonResponse({
             'success': True,
@@ -663,28 +615,15 @@ def cancel_booking(request, booking_id):
 
 @login_required
 def export_bookings_csv(request):
-    """Exporta reservas a CSV con filtros opcionales"""
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reservas.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Cliente', 'Email', 'Habitacion', 'Check-in', 'Check-out',
-        'Noches', 'Total', 'Estado', 'Pago', 'Creado'
-    ])
-
-    qs = Booking.objects.select_related('client', 'room', 'hotel').all().order_by('-created_at')
+    """Exporta reservas a CSV con filtros opcionales (en streaming, sin límite de filas)"""
+    qs = Booking.objects.all().order_by('-created_at')
     hotel_param = request.GET.get('hotel')
     if hotel_param:
         try:
             qs = qs.filter(hotel_id=int(hotel_param))
         except Exception:
-            from app.administration.models import Hotel
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-                qs = qs.filter(hotel=hotel)
-            except Hotel.DoesNotExist:
-                qs = qs.none()
+            hotel = get_hotel_by_slug(str(hotel_param))
+            qs = qs.filter(hotel=hotel) if hotel else qs.none()
 
     status = request.GET.get('status')
     payment = request.GET.get('payment')
@@ -698,21 +637,37 @@ def export_bookings_csv(request):
     if check_in:
         qs = qs.filter(check_in_date=check_in)
     if search:
-        qs = qs.filter(Q(client__full_name__icontains=search) | Q(room__number__icontains=search))
-
-    for b in qs:
-        writer.writerow([
-            b.id,
-            getattr(b.client, 'full_name', str(b.client)),
-            getattr(b.client, 'email', ''),
-            b.room.number if b.room else '',
-            b.check_in_date.isoformat() if b.check_in_date else '',
-            b.check_out_date.isoformat() if b.check_out_date else '',
-            b.duration,
-            float(b.total_price) if b.total_price is not None else 0,
-            b.get_status_display() if hasattr(b, 'get_status_display') else b.status,
-            b.get_payment_status_display() if hasattr(b, 'get_payment_status_display') else b.payment_status,
-            b.created_at.isoformat() if b.created_at else ''
-        ])
-
-    return response
+        qs = qs.filter(
+            Q(client__first_name__icontains=search)
+            | Q(client__last_name__icontains=search)
+            | Q(room__number__icontains=search)
+        )
+
+    status_labels = dict(Booking.STATUS_CHOICES)
+    payment_labels = dict(Booking.PAYMENT_STATUS_CHOICES)
+    values = qs.values_list(
+        'id', 'client__first_name', 'client__last_name', 'client__email', 'room__number',
+        'check_in_date', 'check_out_date', 'total_price', 'status', 'payment_status', 'created_at',
+    )
+
+    def rows():
+        for (booking_id, first_name, last_name, email, room_number, check_in_date, check_out_date,
+             total_price, booking_status, payment_status, created_at) in values.iterator(chunk_size=CSV_CHUNK_SIZE):
+            yield [
+                booking_id,
+                f"{first_name} {last_name}",
+                email or '',
+                room_number or '',
+                check_in_date.isoformat() if check_in_date else '',
+                check_out_date.isoformat() if check_out_date else '',
+                (check_out_date - check_in_date).days if check_in_date and check_out_date else 0,
+                float(total_price) if total_price is not None else 0,
+                status_labels.get(booking_status, booking_status),
+                payment_labels.get(payment_status, payment_status),
+                created_at.isoformat() if created_at else '',
+            ]
+
+    return stream_csv_response(rows(), [
+        'ID', 'Cliente', 'Email', 'Habitacion', 'Check-in', 'Check-out',
+        'Noches', 'Total', 'Estado', 'Pago', 'Creado'
+    ], 'reservas.csv')
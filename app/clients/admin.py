@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Client
+from app.core.versions import bump_on_commit
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
@@ -40,20 +41,24 @@ class ClientAdmin(admin.ModelAdmin):
 
     def mark_active(self, request, queryset):
         updated = queryset.update(active=True)
+        bump_on_commit(*queryset.values_list('hotel_id', flat=True).distinct())
         self.message_user(request, f'{updated} clientes marcados como activos.')
     mark_active.short_description = 'Marcar como activos'
 
     def mark_inactive(self, request, queryset):
         updated = queryset.update(active=False)
+        bump_on_commit(*queryset.values_list('hotel_id', flat=True).distinct())
         self.message_user(request, f'{updated} clientes marcados como inactivos.')
     mark_inactive.short_description = 'Marcar como inactivos'
 
     def mark_vip(self, request, queryset):
         updated = queryset.update(vip=True)
+        bump_on_commit(*queryset.values_list('hotel_id', flat=True).distinct())
         self.message_user(request, f'{updated} clientes marcados como VIP.')
     mark_vip.short_description = 'Marcar como VIP'
 
     def unmark_vip(self, request, queryset):
         updated = queryset.update(vip=False)
+        bump_on_commit(*queryset.values_list('hotel_id', flat=True).distinct())
         self.message_user(request, f'{updated} clientes desmarcados como VIP.')
     unmark_vip.short_description = 'Quitar VIP'
@@ -36,6 +36,10 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Listado paginado por cursor dentro de un hotel
+            models.Index(fields=['hotel', 'first_name', 'last_name', 'id'], name='client_hotel_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -6,8 +6,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Q
 
 from .models import Client
-from app.administration.models import Hotel
+from app.administration.resolver import get_default_hotel, get_hotel_by_slug, resolve_hotel
 from app.bookings.models import Booking
+from app.core.pagination import InvalidCursor, keyset_paginate, parse_page_size
 
 # Vistas existentes
 # Create your views here.
@@ -15,31 +16,35 @@ from app.bookings.models import Booking
 @login_required
 @require_http_methods(["GET"])
 def clients_api(request):
-    """API: Listado simple de clientes para el selector del dashboard"""
-    qs = Client.objects.all().order_by('first_name', 'last_name')
+    """API: Listado de clientes para el selector del dashboard, paginado por cursor sobre (nombre, apellido, id)"""
+    qs = Client.objects.all()
     hotel_param = request.GET.get('hotel')
     if hotel_param:
         try:
             qs = qs.filter(hotel_id=int(hotel_param))
         except Exception:
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-                qs = qs.filter(hotel=hotel)
-            except Hotel.DoesNotExist:
-                qs = qs.none()
+            hotel = get_hotel_by_slug(str(hotel_param))
+            qs = qs.filter(hotel=hotel) if hotel else qs.none()
     search = request.GET.get('search')
     if search:
         qs = qs.filter(Q(first_name__icontains=search) | Q(last_name__icontains=search) | Q(email__icontains=search) | Q(dni__icontains=search))
-    data = [
+    try:
+        page = keyset_paginate(
+            qs, ['first_name', 'last_name', 'id'], ('id', 'first_name', 'last_name', 'email', 'dni'),
+            cursor=request.GET.get('cursor'), page_size=parse_page_size(request.GET.get('page_size')),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    page['results'] = [
         {
-            'id': c.id,
-            'full_name': getattr(c, 'full_name', f"{c.first_name} {c.last_name}").strip(),
-            'email': c.email,
-            'dni': c.dni or ''
+            'id': c['id'],
+            'full_name': f"{c['first_name']} {c['last_name']}".strip(),
+            'email': c['email'],
+            'dni': c['dni'] or ''
         }
-        for c in qs
+        for c in page['results']
     ]
-    return JsonResponse(data, safe=False)
+    return JsonResponse(page)
 
 # Endpoint unificado si se desea expandir a POST en futuro
 @login_required
@@ -57,16 +62,10 @@ def clients_api_collection(request):
     hotel_param = request.GET.get('hotel') or data.get('hotel') or data.get('hotel_id') or data.get('hotel_slug')
     hotel = None
     if hotel_param:
-        try:
-            hotel = Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                hotel = None
+        hotel = resolve_hotel(hotel_param)
     if hotel is None:
         try:
-            hotel = Hotel.objects.order_by('id').first()
+            hotel = get_default_hotel()
         except Exception:
             hotel = None
     if hotel is None:
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailLog, ActionLog
+from .models import EmailLog, ActionLog, DailyHotelStats
 
 @admin.register(ActionLog)
 class ActionLogAdmin(admin.ModelAdmin):
@@ -29,18 +29,18 @@ class ActionLogAdmin(admin.ModelAdmin):
 
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
-    list_display = ('recipient_email', 'recipient_name', 'subject', 'status', 'sent_at', 'created_at')
-    list_filter = ('status', 'sent_at', 'created_at')
+    list_display = ('recipient_email', 'recipient_name', 'subject', 'email_type', 'status', 'attempts', 'sent_at', 'created_at')
+    list_filter = ('status', 'email_type', 'sent_at', 'created_at')
     search_fields = ('recipient_email', 'recipient_name', 'subject')
-    readonly_fields = ('created_at', 'sent_at', 'error_message')
+    readonly_fields = ('created_at', 'sent_at', 'error_message', 'attempts', 'next_attempt_at')
     ordering = ('-created_at',)
     
     fieldsets = (
         ('Información del Email', {
-            'fields': ('recipient_email', 'recipient_name', 'subject', 'content')
+            'fields': ('recipient_email', 'recipient_name', 'subject', 'email_type', 'content', 'text_content')
         }),
         ('Estado y Tracking', {
-            'fields': ('status', 'sent_at', 'error_message')
+            'fields': ('status', 'sent_at', 'error_message', 'attempts', 'next_attempt_at')
         }),
         ('Relaciones', {
             'fields': ('booking', 'client'),
@@ -55,3 +55,18 @@ class EmailLogAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         """No permitir crear registros manualmente desde el admin"""
         return False
+
+
+@admin.register(DailyHotelStats)
+class DailyHotelStatsAdmin(admin.ModelAdmin):
+    list_display = ('hotel', 'date', 'occupied_rooms', 'arrivals', 'departures', 'revenue', 'pending', 'confirmed', 'cancelled')
+    list_filter = ('hotel', 'date')
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+
+    def has_add_permission(self, request):
+        """Las estadísticas se calculan a partir de las reservas"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,18 +1,20 @@
 from ninja import Router, Schema
 from ninja.errors import HttpError
-from django.core.mail import send_mail
 from django.conf import settings
 from datetime import datetime, timedelta
 from typing import Optional
-from .models import EmailLog
+from .models import EmailLog, DailyHotelStats
 from app.bookings.models import Booking
 from app.clients.models import Client
 from .services import EmailService
+from .services_stats import summarize_stats
+from .series import BUCKETS, build_series
+from .versions import not_modified
+from app.superadmin.services import get_fleet_summary
 from app.administration.models import Hotel, SUB_TRIAL, SUB_ACTIVE
 from django.utils import timezone
-from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
 from django.db.models import Count, Sum, Q
-from decimal import Decimal
+from django.http import HttpResponse
 
 router = Router()
 
@@ -33,13 +35,14 @@ class SendEmailResponse(Schema):
 @router.post("/manda_email_cliente/", response=SendEmailResponse, tags=["Emails"])
 def send_email_to_client(request, payload: SendEmailRequest):
     """
-    Envía un email de confirmación al cliente de una reserva específica.
+    Encola un email de confirmación al cliente de una reserva específica;
+    lo entrega el worker process_email_queue.
     
     Args:
         payload: Datos de la reserva
         
     Returns:
-        Estado del envío del email
+        Estado del encolado del email
     """
     result = EmailService.send_booking_confirmation(payload.reserva_id)
     
@@ -51,13 +54,14 @@ def send_email_to_client(request, payload: SendEmailRequest):
 @router.post("/manda_email_bienvenida/", response=SendEmailResponse, tags=["Emails"])
 def send_welcome_email(request, payload: SendWelcomeEmailRequest):
     """
-    Envía un email de bienvenida a un nuevo cliente.
+    Encola un email de bienvenida a un nuevo cliente; lo entrega el worker
+    process_email_queue.
     
     Args:
         payload: Datos del cliente
         
     Returns:
-        Estado del envío del email
+        Estado del encolado del email
     """
     result = EmailService.send_welcome_email(payload.client_id)
     
@@ -104,9 +108,12 @@ def get_email_logs(request):
     }
 
 @router.get("/superadmin/kpis", tags=["Superadmin"])
-def superadmin_kpis(request):
+def superadmin_kpis(request, response: HttpResponse):
     if not getattr(request, "user", None) or not request.user.is_authenticated or not request.user.is_superuser:
         raise HttpError(403, "Forbidden")
+    cached = not_modified(request, name="superadmin_kpis", response=response)
+    if cached is not None:
+        return cached
     today = timezone.now().date()
     total_rooms = 0
     try:
@@ -114,22 +121,20 @@ def superadmin_kpis(request):
         total_rooms = Room.objects.count()
     except Exception:
         total_rooms = 0
-    occupied_rooms = Booking.objects.filter(
-        status="confirmed",
-        check_in_date__lte=today,
-        check_out_date__gte=today,
-    ).values("room").distinct().count()
+    today_stats = summarize_stats(today, today)
+    occupied_rooms = today_stats["occupied_rooms"]
     occupancy_rate = float(occupied_rooms / total_rooms) if total_rooms > 0 else 0.0
+    # Reservas confirmadas en curso hoy (no hay fila diaria con ese conteo)
     active_bookings = Booking.objects.filter(
         status="confirmed",
         check_in_date__lte=today,
         check_out_date__gte=today,
     ).count()
-    agg = Booking.objects.filter(
+    # Solo confirmadas con check-in hoy: la fila diaria suma también las finalizadas
+    estimated_revenue_today = Booking.objects.filter(
         status="confirmed",
         check_in_date=today,
-    ).aggregate(total=Sum("total_price"))
-    estimated_revenue_today = agg.get("total") or Decimal("0")
+    ).aggregate(total=Sum("total_price"))["total"] or 0
     active_hotels = Hotel.objects.filter(
         subscription_status__in=[SUB_TRIAL, SUB_ACTIVE],
         is_blocked=False,
@@ -143,9 +148,12 @@ def superadmin_kpis(request):
     }
 
 @router.get("/superadmin/chart", tags=["Superadmin"])
-def superadmin_chart(request, metric: str = "bookings", interval: str = "week", start_date: Optional[str] = None, end_date: Optional[str] = None):
+def superadmin_chart(request, response: HttpResponse, metric: str = "bookings", interval: str = "week", start_date: Optional[str] = None, end_date: Optional[str] = None):
     if not getattr(request, "user", None) or not request.user.is_authenticated or not request.user.is_superuser:
         raise HttpError(403, "Forbidden")
+    cached = not_modified(request, name="superadmin_chart", response=response)
+    if cached is not None:
+        return cached
     today = timezone.now().date()
     if end_date:
         try:
@@ -161,51 +169,29 @@ def superadmin_chart(request, metric: str = "bookings", interval: str = "week",
             start = end - timedelta(days=84)
     else:
         start = end - timedelta(days=84)
-    qs = Booking.objects.filter(check_in_date__gte=start, check_in_date__lte=end)
-    if interval == "month":
-        grp = TruncMonth("check_in_date")
-    elif interval == "day":
-        grp = TruncDate("check_in_date")
-    else:
-        grp = TruncWeek("check_in_date")
+    if interval not in BUCKETS:
+        interval = "week"
     if metric == "revenue":
-        data = (
-            qs.filter(status="confirmed")
-            .annotate(p=grp)
-            .values("p")
-            .annotate(value=Sum("total_price"))
-            .order_by("p")
-        )
+        qs, date_field, value = Booking.objects.filter(status="confirmed"), "check_in_date", Sum("total_price")
+    elif metric == "nights":
+        # Noches ocupadas (habitación-noche confirmadas) según la tabla de estadísticas diarias
+        qs, date_field, value = DailyHotelStats.objects.all(), "date", Sum("occupied_rooms")
     else:
-        data = (
-            qs.annotate(p=grp)
-            .values("p")
-            .annotate(value=Count("id"))
-            .order_by("p")
-        )
-    return {"series": [{"period": d["p"], "value": d["value"]} for d in data]}
+        qs, date_field, value = Booking.objects.all(), "check_in_date", Count("id")
+    data = build_series(qs, date_field, start, end, bucket=interval, metrics={"value": value})
+    return {"series": [{"period": d["period"], "value": d["value"]} for d in data]}
 
 @router.get("/superadmin/hotels", tags=["Superadmin"])
-def superadmin_hotels(request):
+def superadmin_hotels(request, response: HttpResponse):
     if not getattr(request, "user", None) or not request.user.is_authenticated or not request.user.is_superuser:
         raise HttpError(403, "Forbidden")
-    today = timezone.now().date()
-    start_week = today - timedelta(days=today.weekday())
-    end_week = start_week + timedelta(days=6)
-    hotels = Hotel.objects.all().order_by("name")
+    cached = not_modified(request, name="superadmin_hotels", response=response)
+    if cached is not None:
+        return cached
+    summary = get_fleet_summary()
     results = []
-    for h in hotels:
-        week_count = Booking.objects.filter(
-            hotel=h,
-            check_in_date__gte=start_week,
-            check_in_date__lte=end_week,
-        ).count()
-        bookings_today = Booking.objects.filter(
-            hotel=h,
-            status="confirmed",
-            check_in_date__lte=today,
-            check_out_date__gte=today,
-        ).count()
+    for item in summary["hotels"]:
+        h = item["hotel"]
         results.append({
             "id": h.id,
             "name": h.name,
@@ -213,7 +199,7 @@ def superadmin_hotels(request):
             "plan_name": h.plan_name,
             "subscription_status": h.subscription_status,
             "is_blocked": h.is_blocked,
-            "bookings_this_week": week_count,
-            "bookings_today": bookings_today,
+            "bookings_this_week": item["bookings_this_week"],
+            "bookings_today": item["confirmed_spans_today"],
         })
     return {"hotels": results}
\ No newline at end of file
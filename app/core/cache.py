@@ -0,0 +1,188 @@
+"""
+Caché por hotel (tenant) para las páginas públicas del portal.
+
+Cada hotel tiene un número de versión en caché; todas sus claves lo incluyen
+(portal:h<id>:v<versión>:<nombre>:...), así que invalidar un hotel completo es
+un solo incremento: las entradas viejas dejan de leerse y expiran solas. Las
+señales de app/core/signals.py suben la versión al guardar o borrar Hotel,
+Room o RoomImage.
+
+El backend es el alias PORTAL_CACHE_ALIAS de CACHES (por defecto 'default'),
+configurable con CACHE_BACKEND=locmem|file|redis. Los contadores de aciertos y
+fallos se guardan en el mismo backend para que se sumen entre procesos cuando
+es compartido (file/redis).
+
+acached_for_hotel() y sus auxiliares con prefijo "a" usan la API asíncrona
+del backend (aget/aset) para las vistas async del portal.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'portal'
+STAT_NAMES = ('hits', 'misses', 'invalidations')
+# Ámbito de las entradas que abarcan todos los hoteles (los ids reales empiezan en 1)
+ALL_HOTELS = 0
+# Marca para distinguir "no está en caché" de un valor None cacheado
+_MISSING = object()
+
+
+def _cache():
+    return caches[getattr(settings, 'PORTAL_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'PORTAL_CACHE_TIMEOUT', 300)
+
+
+def _incr(key, delta=1):
+    cache = _cache()
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # La clave no existe (o expiró): add evita pisar un valor creado en paralelo
+        if cache.add(key, delta, timeout=None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def _count(name, delta=1):
+    if not delta:
+        return
+    try:
+        _incr(f'{KEY_PREFIX}:stats:{name}', delta)
+    except Exception:
+        # Las métricas nunca deben romper una página
+        logger.debug('No se pudo actualizar el contador de caché %s', name, exc_info=True)
+
+
+async def _aincr(key, delta=1):
+    cache = _cache()
+    try:
+        return await cache.aincr(key, delta)
+    except ValueError:
+        if await cache.aadd(key, delta, timeout=None):
+            return delta
+        return await cache.aincr(key, delta)
+
+
+async def _acount(name, delta=1):
+    try:
+        await _aincr(f'{KEY_PREFIX}:stats:{name}', delta)
+    except Exception:
+        logger.debug('No se pudo actualizar el contador de caché %s', name, exc_info=True)
+
+
+def hotel_version(hotel_id):
+    """Versión vigente de las entradas del hotel"""
+    key = f'{KEY_PREFIX}:h{hotel_id}:version'
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key) or 1
+    return version
+
+
+async def ahotel_version(hotel_id):
+    """Versión asíncrona de hotel_version"""
+    key = f'{KEY_PREFIX}:h{hotel_id}:version'
+    cache = _cache()
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, 1, timeout=None)
+        version = await cache.aget(key) or 1
+    return version
+
+
+def invalidate_hotel(hotel_id):
+    """Descarta todas las entradas del hotel subiendo su versión"""
+    if hotel_id is None:
+        return
+    _incr(f'{KEY_PREFIX}:h{hotel_id}:version')
+    _count('invalidations')
+
+
+def _versioned_key(hotel_id, version, name, params=None):
+    key = f'{KEY_PREFIX}:h{hotel_id}:v{version}:{name}'
+    if params:
+        raw = json.dumps(params, sort_keys=True, default=str)
+        key += ':' + hashlib.md5(raw.encode()).hexdigest()
+    return key
+
+
+def hotel_key(hotel_id, name, params=None):
+    """Clave versionada para `name` (y parámetros opcionales) dentro del hotel"""
+    return _versioned_key(hotel_id, hotel_version(hotel_id), name, params)
+
+
+def get_or_build(key, builder, timeout=None):
+    """Devuelve la entrada `key`; si falta la construye con builder() y la guarda"""
+    cache = _cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('hits')
+        return value
+    _count('misses')
+    value = builder()
+    cache.set(key, value, timeout if timeout is not None else _timeout())
+    return value
+
+
+def cached_for_hotel(hotel_id, name, builder, params=None, timeout=None):
+    """Atajo: get_or_build sobre la clave versionada del hotel"""
+    return get_or_build(hotel_key(hotel_id, name, params), builder, timeout)
+
+
+async def acached_for_hotel(hotel_id, name, builder, params=None, timeout=None):
+    """Versión asíncrona de cached_for_hotel; builder es una función async"""
+    cache = _cache()
+    key = _versioned_key(hotel_id, await ahotel_version(hotel_id), name, params)
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        await _acount('hits')
+        return value
+    await _acount('misses')
+    value = await builder()
+    await cache.aset(key, value, timeout if timeout is not None else _timeout())
+    return value
+
+
+def get_many_for_hotel(hotel_id, names, build_missing, timeout=None):
+    """
+    Varias entradas del hotel con una sola lectura. build_missing(faltantes)
+    devuelve {nombre: valor} para las que no estaban; las que no devuelva se
+    guardan como None. Resultado: {nombre: valor} en el orden de `names`.
+    """
+    cache = _cache()
+    prefix = f'{KEY_PREFIX}:h{hotel_id}:v{hotel_version(hotel_id)}:'
+    found = cache.get_many([prefix + name for name in names])
+    values = {name: found[prefix + name] for name in names if prefix + name in found}
+    missing = [name for name in names if name not in values]
+    _count('hits', len(values))
+    _count('misses', len(missing))
+    if missing:
+        built = build_missing(missing)
+        built = {name: built.get(name) for name in missing}
+        cache.set_many({prefix + name: value for name, value in built.items()},
+                       timeout if timeout is not None else _timeout())
+        values.update(built)
+    return {name: values[name] for name in names}
+
+
+def cache_stats():
+    """Contadores acumulados: hits, misses, invalidations y hit_ratio"""
+    values = _cache().get_many([f'{KEY_PREFIX}:stats:{name}' for name in STAT_NAMES])
+    stats = {name: values.get(f'{KEY_PREFIX}:stats:{name}', 0) for name in STAT_NAMES}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    _cache().delete_many([f'{KEY_PREFIX}:stats:{name}' for name in STAT_NAMES])
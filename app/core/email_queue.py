@@ -0,0 +1,211 @@
+"""
+Entrega de la cola de emails (outbox) construida sobre EmailLog.
+
+Las vistas y el modelo de reservas solo registran emails 'pending' al
+confirmarse su transacción (EmailService.queue_booking_email); el comando
+process_email_queue los entrega fuera del ciclo de la petición:
+
+- reclama un lote de pendientes vencidos pasando cada fila a 'sending' con un
+  UPDATE condicional, de modo que dos workers nunca envían la misma fila;
+- envía el lote con un pool de hilos acotado; cada hilo reutiliza una sola
+  conexión SMTP autenticada para su parte (send_batch) y las escrituras en
+  base de datos quedan en el hilo principal, en un único bulk_update;
+- reprograma los fallos con backoff exponencial y marca 'failed' al agotar
+  los intentos.
+"""
+import logging
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import EmailLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_WORKERS = 4
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 6 * 3600
+# Una fila en 'sending' más allá de este plazo se considera abandonada (worker caído)
+SENDING_LEASE = timedelta(minutes=10)
+# Respuestas SMTP que rechazan un mensaje sin invalidar la conexión
+MESSAGE_ERRORS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+def retry_delay(attempts):
+    """Espera antes del siguiente intento: 1, 2, 4, 8... minutos, con tope"""
+    seconds = BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, BACKOFF_MAX_SECONDS))
+
+
+def release_stale(now=None):
+    """Devuelve a 'pending' los envíos reclamados cuyo plazo venció"""
+    now = now or timezone.now()
+    return EmailLog.objects.filter(status='sending', next_attempt_at__lte=now).update(status='pending')
+
+
+def claim_batch(limit=DEFAULT_BATCH_SIZE, now=None):
+    """
+    Reclama hasta `limit` emails pendientes vencidos y los devuelve.
+
+    Cada fila se reclama con UPDATE ... WHERE status='pending', que solo afecta
+    una fila si nadie la tomó antes; sirve igual en SQLite y en PostgreSQL.
+    """
+    now = now or timezone.now()
+    release_stale(now)
+    candidates = list(
+        EmailLog.objects.filter(status='pending')
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    lease = now + SENDING_LEASE
+    claimed = [
+        pk for pk in candidates
+        if EmailLog.objects.filter(pk=pk, status='pending').update(
+            status='sending', next_attempt_at=lease, attempts=F('attempts') + 1
+        )
+    ]
+    return list(EmailLog.objects.filter(pk__in=claimed).order_by('id'))
+
+
+def build_message(email_log, connection=None):
+    """Construye el mensaje (texto + alternativa HTML) de un EmailLog"""
+    message = EmailMultiAlternatives(
+        subject=email_log.subject,
+        body=email_log.text_content or strip_tags(email_log.content),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email_log.recipient_email],
+        connection=connection,
+    )
+    if email_log.content:
+        message.attach_alternative(email_log.content, 'text/html')
+    return message
+
+
+def send_batch(email_logs, connection=None):
+    """
+    Envía `email_logs` reutilizando una única conexión del backend de email
+    (un solo handshake SMTP/TLS y login para todo el lote).
+
+    Cada mensaje se envía con send_messages por separado para poder atribuir
+    los errores; si la conexión se cae (no un simple rechazo) se reabre para
+    los siguientes.
+    No toca la base de datos, por lo que puede correr en un hilo del pool.
+
+    Returns:
+        (errores, métricas): errores es una lista paralela a `email_logs` con None
+        o el texto del error; métricas un dict con 'messages', 'sent', 'failed',
+        'connections' y 'seconds'
+    """
+    started = time.monotonic()
+    connection = connection or get_connection(fail_silently=False)
+    errors = []
+    connections = 0
+    try:
+        if connection.open():
+            connections += 1
+        for email_log in email_logs:
+            try:
+                connection.send_messages([build_message(email_log, connection)])
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e) or e.__class__.__name__)
+                if isinstance(e, MESSAGE_ERRORS):
+                    # El servidor rechazó este mensaje pero la sesión sigue siendo válida
+                    continue
+                # La conexión puede haber quedado inutilizable: reabrir para el resto
+                connection.close()
+                try:
+                    if connection.open():
+                        connections += 1
+                except Exception as open_error:
+                    logger.warning(f"No se pudo reabrir la conexión de email: {open_error}")
+    except Exception as e:
+        # No se pudo abrir la conexión inicial: todo el lote queda con ese error
+        error = str(e) or e.__class__.__name__
+        errors.extend([error] * (len(email_logs) - len(errors)))
+    finally:
+        connection.close()
+
+    failed = sum(1 for error in errors if error is not None)
+    return errors, {
+        'messages': len(email_logs),
+        'sent': len(email_logs) - failed,
+        'failed': failed,
+        'connections': connections,
+        'seconds': time.monotonic() - started,
+    }
+
+
+def _split(items, parts):
+    """Reparte `items` en hasta `parts` bloques contiguos de tamaño similar"""
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        if end > start:
+            chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def _apply_result(email_log, error, now, max_attempts):
+    if error is None:
+        email_log.status = 'sent'
+        email_log.sent_at = now
+        email_log.next_attempt_at = None
+        email_log.error_message = ''
+        return 'sent'
+
+    email_log.error_message = f"Intento {email_log.attempts}: {error}"
+    if email_log.attempts >= max_attempts:
+        email_log.status = 'failed'
+        email_log.next_attempt_at = None
+        logger.error(f"Email {email_log.id} descartado tras {email_log.attempts} intentos: {error}")
+        return 'failed'
+    email_log.status = 'pending'
+    email_log.next_attempt_at = now + retry_delay(email_log.attempts)
+    logger.warning(f"Email {email_log.id} reprogramado para {email_log.next_attempt_at}: {error}")
+    return 'retried'
+
+
+def process_queue(batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, max_attempts=MAX_ATTEMPTS):
+    """
+    Procesa un lote de la cola: cada hilo del pool envía su parte del lote por
+    una sola conexión y los resultados se guardan con un único bulk_update.
+
+    Returns:
+        dict con 'claimed', 'sent', 'retried', 'failed', 'connections',
+        'seconds' y 'per_second' (emails entregados por segundo)
+    """
+    stats = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0, 'seconds': 0.0, 'per_second': 0.0}
+    started = time.monotonic()
+    batch = claim_batch(batch_size)
+    if not batch:
+        return stats
+    stats['claimed'] = len(batch)
+
+    chunks = _split(batch, max(1, min(workers, len(batch))))
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        results = list(pool.map(send_batch, chunks))
+
+    now = timezone.now()
+    for chunk, (errors, metrics) in zip(chunks, results):
+        stats['connections'] += metrics['connections']
+        for email_log, error in zip(chunk, errors):
+            stats[_apply_result(email_log, error, now, max_attempts)] += 1
+    EmailLog.objects.bulk_update(batch, ['status', 'sent_at', 'next_attempt_at', 'error_message'])
+
+    stats['seconds'] = time.monotonic() - started
+    if stats['seconds'] > 0:
+        stats['per_second'] = stats['sent'] / stats['seconds']
+    return stats
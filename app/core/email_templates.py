@@ -0,0 +1,143 @@
+"""
+Plantillas de email precompiladas y cacheadas por hotel.
+
+Cada email se define con dos plantillas Django en templates/emails/<plantilla>/
+(<tipo>.html y <tipo>.txt) más una hoja styles.css. La plantilla del hotel se
+elige por Hotel.template_id y, si no existe ese archivo, se usa la de
+templates/emails/default/.
+
+Al cargar una plantilla HTML se incrustan los estilos de styles.css como
+atributos style="" (los clientes de correo ignoran <style>) y el resultado se
+compila una sola vez; las llamadas siguientes reutilizan el Template compilado,
+de modo que render_batch produce N mensajes sin volver a leer ni parsear nada.
+"""
+import re
+from functools import lru_cache
+
+from django.template import Context, TemplateDoesNotExist, engines
+
+DEFAULT_TEMPLATE_ID = 'default'
+EMAIL_TYPES = ('booking_confirmation', 'booking_cancellation', 'payment_confirmation', 'welcome')
+
+_CSS_RULE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_OPEN_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)(\s[^<>]*?)?(/?)>')
+_ATTR = r'''\s{name}\s*=\s*(["'])(.*?)\1'''
+_SELECTOR = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[\w-]+)*)$')
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def _find_source(template_id, filename):
+    """Lee el código de emails/<template_id>/<filename> con respaldo en emails/default/"""
+    names = [f'emails/{template_id}/{filename}']
+    if template_id != DEFAULT_TEMPLATE_ID:
+        names.append(f'emails/{DEFAULT_TEMPLATE_ID}/{filename}')
+    for name in names:
+        try:
+            template, origin = _engine().find_template(name)
+        except TemplateDoesNotExist:
+            continue
+        return template.source
+    raise TemplateDoesNotExist(names[0], tried=names)
+
+
+def parse_css(css):
+    """
+    Convierte una hoja de estilos simple en reglas (especificidad, orden, tag, clases, declaraciones).
+    Admite selectores de etiqueta, de clase y combinados (p. ej. 'td.total', '.header.danger').
+    """
+    rules = []
+    for order, (selectors, body) in enumerate(_CSS_RULE.findall(_CSS_COMMENT.sub('', css))):
+        declarations = '; '.join(part.strip() for part in body.split(';') if part.strip())
+        if not declarations:
+            continue
+        for selector in selectors.split(','):
+            match = _SELECTOR.match(selector.strip())
+            if not match:
+                continue
+            tag = (match.group(1) or '').lower()
+            classes = frozenset(c for c in match.group(2).split('.') if c)
+            specificity = (len(classes), 1 if tag else 0)
+            rules.append((specificity, order, tag, classes, declarations))
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    return rules
+
+
+def inline_css(html, css):
+    """
+    Incrusta `css` en los atributos style="" de `html`. Las reglas se aplican
+    por especificidad y orden; un style="" ya presente en la etiqueta tiene prioridad.
+    """
+    rules = parse_css(css)
+
+    def apply(match):
+        tag, attrs, closing = match.group(1).lower(), match.group(2) or '', match.group(3)
+        class_match = re.search(_ATTR.format(name='class'), attrs)
+        classes = set(class_match.group(2).split()) if class_match else set()
+        declarations = [
+            body for _, _, rule_tag, rule_classes, body in rules
+            if (not rule_tag or rule_tag == tag) and rule_classes <= classes
+        ]
+        if not declarations:
+            return match.group(0)
+        style_match = re.search(_ATTR.format(name='style'), attrs)
+        if style_match:
+            declarations.append(style_match.group(2).strip().rstrip(';'))
+            attrs = attrs[:style_match.start()] + attrs[style_match.end():]
+        style = '; '.join(declarations).replace('"', "'")
+        return f'<{match.group(1)}{attrs} style="{style}"{closing}>'
+
+    return _OPEN_TAG.sub(apply, html)
+
+
+@lru_cache(maxsize=None)
+def get_email_template(template_id, email_type, kind):
+    """
+    Devuelve el Template compilado para (plantilla, tipo, 'html'|'txt').
+    El resultado queda en caché de proceso: ver clear_cache().
+    """
+    if email_type not in EMAIL_TYPES:
+        raise ValueError(f'Tipo de email no soportado: {email_type}')
+    source = _find_source(template_id, f'{email_type}.{kind}')
+    if kind == 'html':
+        source = inline_css(source, _find_source(template_id, 'styles.css'))
+    else:
+        # El texto plano no se escapa como HTML
+        source = '{% autoescape off %}' + source + '{% endautoescape %}'
+    return _engine().from_string(source)
+
+
+def clear_cache():
+    """Descarta las plantillas compiladas (p. ej. tras editar los archivos)"""
+    get_email_template.cache_clear()
+
+
+def template_id_for(hotel):
+    return (getattr(hotel, 'template_id', None) or DEFAULT_TEMPLATE_ID) if hotel else DEFAULT_TEMPLATE_ID
+
+
+def render_email(email_type, context, template_id=DEFAULT_TEMPLATE_ID):
+    """Renderiza un email y devuelve (html, texto)"""
+    ctx = Context(context)
+    html = get_email_template(template_id, email_type, 'html').render(ctx)
+    text = get_email_template(template_id, email_type, 'txt').render(ctx)
+    return html, text.strip() + '\n'
+
+
+def render_batch(email_type, contexts, template_id=DEFAULT_TEMPLATE_ID):
+    """
+    Renderiza un email por cada contexto con las mismas plantillas compiladas.
+
+    Returns:
+        Lista de (html, texto) en el mismo orden que `contexts`
+    """
+    html_template = get_email_template(template_id, email_type, 'html')
+    text_template = get_email_template(template_id, email_type, 'txt')
+    rendered = []
+    for context in contexts:
+        ctx = Context(context)
+        rendered.append((html_template.render(ctx), text_template.render(ctx).strip() + '\n'))
+    return rendered
@@ -0,0 +1,110 @@
+"""
+Pub/sub en proceso para los eventos en vivo del panel (server-sent events).
+
+Cada conexión SSE del dashboard se suscribe al tema de su hotel (o a
+ALL_HOTELS) y espera con un asyncio.Event: miles de conexiones ociosas no
+ocupan hilos ni consultas. bump_data_version() (app/core/versions.py) publica
+el hotel cada vez que cambian sus reservas, habitaciones o clientes; publish()
+puede llamarse desde cualquier hilo y despierta a los suscriptores en su
+event loop con call_soon_threadsafe.
+
+Los avisos no llevan datos y se agrupan: si llegan varios antes de que la
+conexión los atienda, se procesa uno solo. El bus es local al proceso; las
+escrituras hechas en otros procesos se detectan al vencer el heartbeat
+comparando la versión de datos del hotel (ver dashboard_events_view).
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+
+
+class Subscription:
+    """Suscripción de una conexión a un tema; se usa desde el event loop que la creó"""
+
+    def __init__(self, bus, topic):
+        self.bus = bus
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            # El loop ya se cerró: la conexión terminó sin desuscribirse
+            self.bus.unsubscribe(self)
+
+    async def wait(self, timeout=None):
+        """True si hubo un aviso; False si venció el timeout"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Temas (ids de hotel) -> suscripciones; seguro entre hilos"""
+
+    def __init__(self):
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, *topics):
+        """Avisa a los suscriptores de los temas dados. Retorna cuántos se notificaron."""
+        with self._lock:
+            targets = [sub for topic in set(topics) for sub in self._topics.get(topic, ())]
+        for subscription in targets:
+            subscription.notify()
+        return len(targets)
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+
+bus = EventBus()
+
+
+def heartbeat_seconds():
+    """Segundos sin eventos tras los que se envía un comentario de keep-alive"""
+    return getattr(settings, 'DASHBOARD_EVENTS_HEARTBEAT', 15)
+
+
+def format_sse(data, event=None, event_id=None):
+    """Mensaje SSE (data ya serializado a texto, una línea)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def metric_deltas(previous, current):
+    """Campos de current que cambiaron respecto de previous (todos si no hay previous)"""
+    if previous is None:
+        return dict(current)
+    return {key: value for key, value in current.items() if previous.get(key) != value}
@@ -0,0 +1,152 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.bookings.availability import search_available_rooms, stay_nights
+from app.bookings.models import Booking, RoomNight
+from app.clients.models import Client
+from app.rooms.models import Room
+
+
+class _Rollback(Exception):
+    """Se usa para descartar los datos sembrados al terminar el benchmark"""
+
+
+class Command(BaseCommand):
+    help = "Benchmark del buscador de disponibilidad (siembra datos sintéticos y mide latencias)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=20, help='Cantidad de hoteles')
+        parser.add_argument('--rooms', type=int, default=10000, help='Habitaciones totales')
+        parser.add_argument('--bookings', type=int, default=1000000, help='Reservas totales')
+        parser.add_argument('--days', type=int, default=730, help='Horizonte de fechas de las reservas')
+        parser.add_argument('--queries', type=int, default=200, help='Búsquedas a medir')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Conservar los datos sembrados')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        try:
+            with transaction.atomic():
+                hotels = self._seed(options)
+                self._run(hotels, options)
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            self.stdout.write('Datos sintéticos descartados')
+
+    def _seed(self, options):
+        hotels_count = max(1, options['hotels'])
+        rooms_count = max(hotels_count, options['rooms'])
+        bookings_count = max(0, options['bookings'])
+        batch = options['batch_size']
+        today = timezone.now().date()
+        started = time.perf_counter()
+
+        hotels = [
+            Hotel.objects.create(name=f'Bench Hotel {i}', slug=f'bench-hotel-{i}')
+            for i in range(hotels_count)
+        ]
+        clients = [
+            Client.objects.create(
+                first_name='Bench', last_name=str(i), email=f'bench{i}@example.com',
+                dni=f'BENCH{i:06d}', hotel=hotel,
+            )
+            for i, hotel in enumerate(hotels)
+        ]
+
+        room_types = [('individual', 1, 70), ('double', 2, 110), ('triple', 3, 150), ('suite', 4, 220)]
+        rooms = []
+        for i in range(rooms_count):
+            room_type, capacity, base = random.choice(room_types)
+            rooms.append(Room(
+                hotel=hotels[i % hotels_count], number=str(i // hotels_count + 1), type=room_type,
+                capacity=capacity, price=Decimal(base + random.randint(0, 60)), floor=1,
+            ))
+        Room.objects.bulk_create(rooms, batch_size=batch)
+        room_refs = list(Room.objects.filter(hotel__in=hotels).values_list('id', 'hotel_id'))
+        client_by_hotel = {c.hotel_id: c.id for c in clients}
+        self.stdout.write(f'{len(room_refs)} habitaciones creadas')
+
+        # Reservas sin solapamiento por habitación: cada habitación avanza su propio calendario
+        per_room = max(1, bookings_count // len(room_refs))
+        statuses = ['pending', 'confirmed', 'confirmed', 'completed', 'cancelled']
+        created = 0
+        pending_bookings = []
+        for room_id, hotel_id in room_refs:
+            cursor = today - timedelta(days=options['days'] // 2)
+            for _ in range(per_room):
+                if created >= bookings_count:
+                    break
+                check_in = cursor + timedelta(days=random.randint(0, 1))
+                check_out = check_in + timedelta(days=random.randint(1, 4))
+                cursor = check_out
+                pending_bookings.append(Booking(
+                    hotel_id=hotel_id, room_id=room_id, client_id=client_by_hotel[hotel_id],
+                    check_in_date=check_in, check_out_date=check_out,
+                    status=random.choice(statuses), total_price=Decimal('100'),
+                ))
+                created += 1
+            if len(pending_bookings) >= batch:
+                self._flush_bookings(pending_bookings, batch)
+                pending_bookings = []
+        if pending_bookings:
+            self._flush_bookings(pending_bookings, batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{created} reservas y {RoomNight.objects.filter(hotel__in=hotels).count()} noches '
+            f'sembradas en {elapsed:.1f}s'
+        )
+        return hotels
+
+    def _flush_bookings(self, bookings, batch):
+        Booking.objects.bulk_create(bookings, batch_size=batch)
+        nights = [
+            RoomNight(hotel_id=b.hotel_id, room_id=b.room_id, booking_id=b.pk, date=night)
+            for b in bookings if b.status in ('pending', 'confirmed')
+            for night in stay_nights(b.check_in_date, b.check_out_date)
+        ]
+        RoomNight.objects.bulk_create(nights, batch_size=batch)
+
+    def _run(self, hotels, options):
+        today = timezone.now().date()
+        timings = []
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(max(1, options['queries'])):
+            hotel = random.choice(hotels)
+            check_in = today + timedelta(days=random.randint(0, 60))
+            check_out = check_in + timedelta(days=random.randint(1, 7))
+            order_by = random.choice(['price', 'capacity'])
+            guests = random.randint(1, 4)
+            with connection.execute_wrapper(count_queries):
+                started = time.perf_counter()
+                rows, next_cursor = search_available_rooms(
+                    check_in, check_out, guests, hotel=hotel, order_by=order_by, limit=50
+                )
+                if next_cursor:
+                    search_available_rooms(
+                        check_in, check_out, guests, hotel=hotel, order_by=order_by, cursor=next_cursor, limit=50
+                    )
+                timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(timings)} búsquedas (2 páginas c/u): p50={statistics.median(timings):.2f}ms '
+            f'p95={p95:.2f}ms max={timings[-1]:.2f}ms'
+        ))
+        self.stdout.write(f'Consultas SQL por búsqueda: {queries[0] / len(timings):.1f}')
@@ -0,0 +1,69 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core import email_templates
+from app.core.services import EmailService
+from app.rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = "Benchmark del render de emails: plantillas compiladas en caché frente a compilar en cada mensaje"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000, help='Mensajes a renderizar')
+        parser.add_argument('--type', default='booking_confirmation', choices=email_templates.EMAIL_TYPES,
+                            help='Tipo de email')
+
+    def _bookings(self, count):
+        """Reservas en memoria (sin base de datos) para aislar el costo del render"""
+        hotel = Hotel(id=1, name='Bench Hotel', slug='bench-hotel', email_contact='bench@example.com')
+        room = Room(id=1, hotel=hotel, number='101', price=Decimal('100'), capacity=2)
+        start = date(2030, 1, 1)
+        bookings = []
+        for i in range(count):
+            client = Client(id=i + 1, first_name=f'Huésped {i}', last_name='Bench', email=f'bench{i}@example.com')
+            bookings.append(Booking(
+                id=i + 1, hotel=hotel, room=room, client=client, status='confirmed', payment_status='partial',
+                check_in_date=start + timedelta(days=i % 300), check_out_date=start + timedelta(days=i % 300 + 2),
+                total_price=Decimal('200'), paid_amount=Decimal('50'),
+            ))
+        return bookings
+
+    def handle(self, *args, **options):
+        count = options['count']
+        email_type = options['type']
+        if email_type == 'welcome':
+            raise CommandError('El benchmark usa emails de reserva; elige otro --type')
+        if count < 1:
+            raise CommandError('--count debe ser mayor que 0')
+        bookings = self._bookings(count)
+
+        # Sin caché: leer, incrustar CSS y compilar en cada mensaje
+        started = time.perf_counter()
+        for booking in bookings:
+            email_templates.clear_cache()
+            EmailService.render_booking_email(email_type, booking)
+        uncached = time.perf_counter() - started
+
+        # Primera carga (lectura + CSS + compilación) y luego el lote completo en caché
+        email_templates.clear_cache()
+        started = time.perf_counter()
+        EmailService.render_booking_email(email_type, bookings[0])
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        EmailService.render_booking_emails(email_type, bookings)
+        cached = time.perf_counter() - started
+
+        self.stdout.write(f"Mensajes: {count} ({email_type})")
+        self.stdout.write(f"Compilando en cada mensaje: {uncached / count * 1000:.3f} ms/mensaje")
+        self.stdout.write(f"Primera carga de plantillas: {cold * 1000:.2f} ms")
+        self.stdout.write(f"Lote con plantillas en caché: {cached / count * 1000:.3f} ms/mensaje "
+                          f"({count / cached:.0f} mensajes/s)")
+        self.stdout.write(self.style.SUCCESS(f"Mejora: x{uncached / cached:.1f}"))
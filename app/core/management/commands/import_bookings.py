@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.administration.resolver import resolve_hotel
+from app.bookings.imports import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_bookings, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa reservas en bloque desde un archivo CSV o JSONL (channel managers, migraciones)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV (con encabezado) o JSONL')
+        parser.add_argument('--hotel', required=True, help='ID o slug del hotel destino')
+        parser.add_argument('--format', choices=FORMATS, help='Formato del archivo (por defecto según la extensión)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Reservas insertadas por lote')
+        parser.add_argument('--notify', action='store_true', help='Encolar el email de confirmación de las reservas confirmadas')
+        parser.add_argument('--dry-run', action='store_true', help='Validar sin escribir en la base')
+
+    def handle(self, *args, **options):
+        hotel = resolve_hotel(options['hotel'])
+        if hotel is None:
+            raise CommandError(f"Hotel {options['hotel']} no encontrado")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = import_bookings(
+                    read_rows(stream, fmt), hotel,
+                    batch_size=options['batch_size'], notify=options['notify'], dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f'No se pudo leer el archivo: {e}')
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Línea {error['line']}: {error['error']}"))
+        if report['failed'] > len(report['errors']):
+            self.stdout.write(self.style.WARNING(f"... y {report['failed'] - len(report['errors'])} errores más"))
+        prefix = 'Simulación: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{report['created']} reservas importadas de {report['rows']} filas "
+            f"({report['clients_created']} clientes nuevos, {report['failed']} con error) en {report['seconds']:.1f}s"
+        ))
@@ -0,0 +1,136 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.administration.resolver import resolve_hotel
+from app.rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de los endpoints públicos de lectura del portal: compara el modo "
+        "síncrono (WSGI con un hilo por cliente) con el asíncrono (ASGI, event loop)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', help='ID o slug del hotel (por defecto el primero)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Clientes concurrentes')
+        parser.add_argument('--requests', type=int, default=500, help='Peticiones por modo')
+        parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+        parser.add_argument('--slow-calls', type=int, default=0,
+                            help='Llamadas bloqueantes simultáneas (SMTP/n8n lentos) durante la prueba')
+        parser.add_argument('--slow-ms', type=int, default=2000, help='Duración de cada llamada bloqueante')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Ruta a consultar (repetible); por defecto los tres endpoints del portal')
+
+    def handle(self, *args, **options):
+        hotel = resolve_hotel(options['hotel']) if options['hotel'] else Hotel.objects.order_by('id').first()
+        if hotel is None:
+            raise CommandError('No hay hotel para la prueba')
+        paths = options['paths'] or self._default_paths(hotel)
+        total = max(1, options['requests'])
+        targets = [paths[i % len(paths)] for i in range(total)]
+        self.stdout.write(
+            f'Hotel {hotel.slug}: {total} peticiones, {options["concurrency"]} clientes, '
+            f'{options["slow_calls"]} llamadas lentas de {options["slow_ms"]}ms'
+        )
+        for path in paths:
+            self.stdout.write(f'  {path}')
+
+        # Los clientes de prueba envían Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if options['mode'] in ('sync', 'both'):
+                self._report('sync', *self._run_sync(targets, options))
+            if options['mode'] in ('async', 'both'):
+                self._report('async', *asyncio.run(self._run_async(targets, options)))
+
+    def _default_paths(self, hotel):
+        room = Room.objects.filter(hotel=hotel, active=True).order_by('id').first()
+        if room is None:
+            raise CommandError(f'El hotel {hotel.slug} no tiene habitaciones activas')
+        check_in = timezone.localdate() + timedelta(days=7)
+        search = urlencode({
+            'fecha_inicio': check_in, 'fecha_fin': check_in + timedelta(days=3),
+            'personas': 2, 'hotel': hotel.slug,
+        })
+        return [
+            f'/api/habitaciones-disponibles/?{search}',
+            reverse('room_availability', args=[room.pk]),
+            reverse('client_rooms_hotel', args=[hotel.slug]),
+        ]
+
+    def _run_sync(self, targets, options):
+        """Un hilo por cliente, como un servidor WSGI con --threads; las llamadas lentas ocupan hilos del mismo pool"""
+        slow = options['slow_ms'] / 1000
+
+        def fetch(path, queued):
+            status = Client().get(path).status_code
+            return status, time.perf_counter() - queued
+
+        workers = max(1, options['concurrency'])
+        limit = threading.Semaphore(workers)
+
+        def submit(pool, path):
+            # Igual que los clientes async: como mucho `concurrency` peticiones en curso
+            limit.acquire()
+            future = pool.submit(fetch, path, time.perf_counter())
+            future.add_done_callback(lambda _: limit.release())
+            return future
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in range(options['slow_calls']):
+                pool.submit(time.sleep, slow)
+            # La latencia incluye la espera por un hilo libre, como en la cola de un servidor WSGI
+            futures = [submit(pool, path) for path in targets]
+            results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    async def _run_async(self, targets, options):
+        """Un event loop; cada llamada lenta ocupa un hilo propio pero no bloquea las lecturas"""
+        slow = options['slow_ms'] / 1000
+        limit = asyncio.Semaphore(max(1, options['concurrency']))
+        client = AsyncClient()
+
+        async def fetch(path):
+            async with limit:
+                started = time.perf_counter()
+                # Igual que ASGIHandler: cada petición con su propio contexto de hilos
+                async with ThreadSensitiveContext():
+                    response = await client.get(path)
+                return response.status_code, time.perf_counter() - started
+
+        async def slow_call():
+            # Como una vista síncrona bajo ASGI: su propio hilo, fuera del executor por defecto del loop
+            async with ThreadSensitiveContext():
+                await sync_to_async(time.sleep)(slow)
+
+        slow_calls = [asyncio.ensure_future(slow_call()) for _ in range(options['slow_calls'])]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(fetch(path) for path in targets))
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*slow_calls)
+        return results, elapsed
+
+    def _report(self, mode, results, elapsed):
+        latencies = sorted(latency * 1000 for _, latency in results)
+        errors = sum(1 for status, _ in results if status >= 400)
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(style(
+            f'{mode:>5}: {len(results) / elapsed:.1f} req/s en {elapsed:.2f}s, errores={errors} '
+            f'p50={statistics.median(latencies):.1f}ms p95={p95:.1f}ms max={latencies[-1]:.1f}ms'
+        ))
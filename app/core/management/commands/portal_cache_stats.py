@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from app.core.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Muestra los contadores de aciertos/fallos de la caché del portal (con backend compartido: file o redis)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Poner los contadores a cero después de mostrarlos')
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(
+            f"Aciertos: {stats['hits']}  Fallos: {stats['misses']}  "
+            f"Invalidaciones: {stats['invalidations']}  Tasa de acierto: {stats['hit_ratio']:.1%}"
+        )
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Contadores reiniciados'))
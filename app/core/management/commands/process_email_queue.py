@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app.core.email_queue import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, MAX_ATTEMPTS, process_queue
+
+
+class Command(BaseCommand):
+    help = "Entrega los emails pendientes de la cola (EmailLog) con concurrencia acotada y reintentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Envíos SMTP simultáneos')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Emails reclamados por lote')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='Intentos antes de marcar como fallido')
+        parser.add_argument('--loop', action='store_true', help='Seguir procesando en lugar de vaciar la cola y salir')
+        parser.add_argument('--interval', type=float, default=5.0, help='Segundos de espera con la cola vacía (con --loop)')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        batch_size = options['batch_size']
+        if workers < 1 or batch_size < 1:
+            raise CommandError('--workers y --batch-size deben ser mayores que 0')
+
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0, 'seconds': 0.0}
+        try:
+            while True:
+                close_old_connections()
+                stats = process_queue(batch_size=batch_size, workers=workers, max_attempts=options['max_attempts'])
+                for key in totals:
+                    totals[key] += stats[key]
+                if stats['claimed']:
+                    self.stdout.write(
+                        f"Lote: {stats['sent']} enviados, {stats['retried']} reprogramados, {stats['failed']} fallidos "
+                        f"({stats['connections']} conexiones, {stats['per_second']:.1f} emails/s)"
+                    )
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Interrumpido')
+
+        per_second = totals['sent'] / totals['seconds'] if totals['seconds'] else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Cola procesada: {totals['sent']} enviados, {totals['retried']} reprogramados, {totals['failed']} fallidos "
+            f"({totals['connections']} conexiones, {per_second:.1f} emails/s)"
+        ))
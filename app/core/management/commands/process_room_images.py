@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app.rooms.images import DEFAULT_BATCH_SIZE, process_pending, requeue
+from app.rooms.models import RoomImage
+
+
+class Command(BaseCommand):
+    help = "Genera los derivados (thumb/card/hero en WebP y JPEG) de las imágenes de habitaciones pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Imágenes reclamadas por lote')
+        parser.add_argument('--loop', action='store_true', help='Seguir procesando en lugar de vaciar la cola y salir')
+        parser.add_argument('--interval', type=float, default=10.0, help='Segundos de espera sin pendientes (con --loop)')
+        parser.add_argument('--rebuild', action='store_true', help='Volver a generar los derivados de todas las imágenes')
+        parser.add_argument('--retry-failed', action='store_true', help='Reintentar las imágenes marcadas como fallidas')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        if options['rebuild']:
+            self.stdout.write(f"{requeue()} imágenes encoladas para regenerar")
+        elif options['retry_failed']:
+            self.stdout.write(f"{requeue(RoomImage.objects.filter(derivatives_status='failed'))} imágenes fallidas encoladas")
+
+        totals = {'ready': 0, 'failed': 0, 'files': 0}
+        try:
+            while True:
+                close_old_connections()
+                stats = process_pending(batch_size=batch_size)
+                for key in totals:
+                    totals[key] += stats[key]
+                if stats['claimed']:
+                    self.stdout.write(
+                        f"Lote: {stats['ready']} listas, {stats['failed']} fallidas, "
+                        f"{stats['files']} archivos en {stats['seconds']:.1f}s"
+                    )
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Interrumpido')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imágenes procesadas: {totals['ready']} listas, {totals['failed']} fallidas, {totals['files']} archivos"
+        ))
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.administration.models import Hotel
+from app.core.services_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de estadísticas diarias (DailyHotelStats) para un rango de fechas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial YYYY-MM-DD (por defecto la primera reserva)')
+        parser.add_argument('--hasta', help='Fecha final YYYY-MM-DD (por defecto la última salida)')
+        parser.add_argument('--hotel', help='ID o slug del hotel (por defecto todos)')
+        parser.add_argument('--chunk-days', type=int, default=90, help='Días recalculados por bloque')
+
+    def _parse_date(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'--{name} debe tener formato YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        desde = self._parse_date(options.get('desde'), 'desde')
+        hasta = self._parse_date(options.get('hasta'), 'hasta')
+        if desde and hasta and desde > hasta:
+            raise CommandError('--desde debe ser anterior o igual a --hasta')
+
+        hotel_ids = None
+        hotel_param = options.get('hotel')
+        if hotel_param:
+            try:
+                hotel = Hotel.objects.get(id=int(hotel_param))
+            except (ValueError, Hotel.DoesNotExist):
+                hotel = Hotel.objects.filter(slug=str(hotel_param)).first()
+            if hotel is None:
+                raise CommandError(f'Hotel {hotel_param} no encontrado')
+            hotel_ids = [hotel.id]
+
+        written = rebuild_daily_stats(desde, hasta, hotel_ids, chunk_days=max(1, options['chunk_days']))
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas reconstruidas: {written} filas diarias'))
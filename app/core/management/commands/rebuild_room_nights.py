@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from app.administration.models import Hotel
+from app.bookings.availability import rebuild_room_nights
+from app.bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de noches ocupadas (RoomNight) a partir de las reservas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', help='ID o slug del hotel (por defecto todos)')
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.all()
+        hotel_param = options.get('hotel')
+        if hotel_param:
+            try:
+                hotel = Hotel.objects.get(id=int(hotel_param))
+            except (ValueError, Hotel.DoesNotExist):
+                hotel = Hotel.objects.filter(slug=str(hotel_param)).first()
+            if hotel is None:
+                self.stdout.write(self.style.ERROR(f'Hotel {hotel_param} no encontrado'))
+                return
+            bookings = bookings.filter(hotel=hotel)
+        created = rebuild_room_nights(bookings)
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido: {created} noches ocupadas'))
@@ -133,6 +133,11 @@ class Command(BaseCommand):
             self.stdout.write(f'   - Fechas: {tomorrow} a {day_after_tomorrow}')
             self.stdout.write(f'   - Precio: ${booking.total_price}')
             
+            # El email se encola al crear la reserva: entregar la cola ahora
+            from app.core.email_queue import process_queue
+            stats = process_queue()
+            self.stdout.write(f'   - Cola de emails: {stats["sent"]} enviados, {stats["failed"] + stats["retried"]} con error')
+
             # Verificar si se creó el log de email
             from app.core.models import EmailLog
             email_logs = EmailLog.objects.filter(booking=booking).order_by('-created_at')
@@ -1,7 +1,9 @@
 from django.core.management.base import BaseCommand
+from app.core.email_queue import process_queue
 from app.core.services import EmailService
 from app.bookings.models import Booking
 from app.clients.models import Client
+from app.core.models import EmailLog
 
 class Command(BaseCommand):
     help = 'Prueba el envío de emails del sistema'
@@ -20,6 +22,18 @@ class Command(BaseCommand):
             help='ID de la reserva o cliente'
         )
 
+    def deliver(self, result):
+        """Entrega la cola en el acto (los send_* solo encolan) e informa el resultado del lote"""
+        stats = process_queue()
+        self.stdout.write(
+            f'   - Cola: {stats["sent"]} enviados, {stats["retried"]} reintentos, '
+            f'{stats["failed"]} fallidos, {stats["connections"]} conexiones'
+        )
+        email_log = EmailLog.objects.get(pk=result['email_log_id'])
+        if email_log.status != 'sent':
+            result['message'] = email_log.error_message or f'El email quedó en estado {email_log.status}'
+        return email_log.status == 'sent'
+
     def handle(self, *args, **options):
         email_type = options['type']
         obj_id = options['id']
@@ -45,7 +59,7 @@ class Command(BaseCommand):
             
             result = EmailService.send_booking_confirmation(booking_id)
             
-            if result['success']:
+            if result['success'] and self.deliver(result):
                 self.stdout.write(
                     self.style.SUCCESS(f'✅ Email enviado exitosamente a {result["recipient_email"]}')
                 )
@@ -75,7 +89,7 @@ class Command(BaseCommand):
             
             result = EmailService.send_welcome_email(client_id)
             
-            if result['success']:
+            if result['success'] and self.deliver(result):
                 self.stdout.write(
                     self.style.SUCCESS(f'✅ Email de bienvenida enviado exitosamente a {result["recipient_email"]}')
                 )
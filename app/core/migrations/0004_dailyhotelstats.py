@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_hotel_template_id'),
+        ('core', '0003_actionlog_hotel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHotelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('occupied_rooms', models.PositiveIntegerField(default=0, verbose_name='Habitaciones ocupadas')),
+                ('arrivals', models.PositiveIntegerField(default=0, verbose_name='Llegadas')),
+                ('departures', models.PositiveIntegerField(default=0, verbose_name='Salidas')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Ingresos')),
+                ('pending', models.PositiveIntegerField(default=0, verbose_name='Pendientes')),
+                ('confirmed', models.PositiveIntegerField(default=0, verbose_name='Confirmadas')),
+                ('cancelled', models.PositiveIntegerField(default=0, verbose_name='Canceladas')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='Finalizadas')),
+                ('no_show', models.PositiveIntegerField(default=0, verbose_name='No Show')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='administration.hotel', verbose_name='Hotel')),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria de hotel',
+                'verbose_name_plural': 'Estadísticas diarias de hotel',
+                'ordering': ['hotel', 'date'],
+                'indexes': [models.Index(fields=['date'], name='core_dailyh_date_dee5e0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'date'), name='uniq_daily_stats_hotel_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_list_cursor_indexes'),
+        ('clients', '0004_list_cursor_indexes'),
+        ('core', '0004_dailyhotelstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Intentos'),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='email_type',
+            field=models.CharField(choices=[('booking_confirmation', 'Confirmación de reserva'), ('booking_cancellation', 'Cancelación de reserva'), ('payment_confirmation', 'Confirmación de pago'), ('welcome', 'Bienvenida'), ('other', 'Otro')], default='other', max_length=30, verbose_name='Tipo de email'),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Próximo intento'),
+        ),
+        migrations.AddField(
+            model_name='emaillog',
+            name='text_content',
+            field=models.TextField(blank=True, verbose_name='Contenido en texto plano'),
+        ),
+        migrations.AlterField(
+            model_name='emaillog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('failed', 'Fallido')], default='pending', max_length=20, verbose_name='Estado'),
+        ),
+        migrations.AddIndex(
+            model_name='emaillog',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='emaillog_queue_idx'),
+        ),
+    ]
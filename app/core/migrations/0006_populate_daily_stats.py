@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:12
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+STATUS_FIELDS = ('pending', 'confirmed', 'cancelled', 'completed', 'no_show')
+REVENUE_STATUSES = ('confirmed', 'completed')
+SUM_FIELDS = ('occupied_rooms', 'arrivals', 'departures', 'revenue') + STATUS_FIELDS
+
+
+def _empty_row():
+    row = {field: 0 for field in SUM_FIELDS}
+    row['revenue'] = Decimal('0')
+    return row
+
+
+def populate_daily_stats(apps, schema_editor):
+    # Mismas consultas agrupadas que refresh_daily_stats (app/core/services_stats.py)
+    # sobre todo el rango de reservas; las noches vienen de bookings.0004_roomnight
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomNight = apps.get_model('bookings', 'RoomNight')
+    DailyHotelStats = apps.get_model('core', 'DailyHotelStats')
+    bookings = Booking.objects.filter(hotel__isnull=False)
+    rows = defaultdict(_empty_row)
+
+    by_checkin = bookings.values('hotel_id', 'check_in_date', 'status').annotate(total=Count('id'), amount=Sum('total_price'))
+    for item in by_checkin:
+        row = rows[(item['hotel_id'], item['check_in_date'])]
+        if item['status'] in STATUS_FIELDS:
+            row[item['status']] += item['total']
+        if item['status'] in REVENUE_STATUSES:
+            row['arrivals'] += item['total']
+            row['revenue'] += item['amount'] or Decimal('0')
+
+    by_checkout = bookings.filter(status__in=REVENUE_STATUSES).values('hotel_id', 'check_out_date').annotate(total=Count('id'))
+    for item in by_checkout:
+        rows[(item['hotel_id'], item['check_out_date'])]['departures'] += item['total']
+
+    occupancy = (
+        RoomNight.objects.filter(hotel__isnull=False, booking__status='confirmed')
+        .values('hotel_id', 'date')
+        .annotate(total=Count('room_id', distinct=True))
+    )
+    for item in occupancy:
+        rows[(item['hotel_id'], item['date'])]['occupied_rooms'] = item['total']
+
+    DailyHotelStats.objects.all().delete()
+    DailyHotelStats.objects.bulk_create(
+        [DailyHotelStats(hotel_id=hotel_id, date=day, **values) for (hotel_id, day), values in rows.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_roomnight_unique_night'),
+        ('core', '0005_emaillog_queue'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
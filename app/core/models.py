@@ -37,15 +37,26 @@ class EmailLog(models.Model):
     
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
+        ('sending', 'Enviando'),
         ('sent', 'Enviado'),
         ('failed', 'Fallido'),
     ]
+
+    TYPE_CHOICES = [
+        ('booking_confirmation', 'Confirmación de reserva'),
+        ('booking_cancellation', 'Cancelación de reserva'),
+        ('payment_confirmation', 'Confirmación de pago'),
+        ('welcome', 'Bienvenida'),
+        ('other', 'Otro'),
+    ]
     
     # Información del email
     recipient_email = models.EmailField(verbose_name="Email del destinatario")
     recipient_name = models.CharField(max_length=100, blank=True, verbose_name="Nombre del destinatario")
     subject = models.CharField(max_length=200, verbose_name="Asunto")
     content = models.TextField(verbose_name="Contenido del email")
+    text_content = models.TextField(blank=True, verbose_name="Contenido en texto plano")
+    email_type = models.CharField(max_length=30, choices=TYPE_CHOICES, default='other', verbose_name="Tipo de email")
     
     # Estado y tracking
     status = models.CharField(
@@ -56,6 +67,10 @@ class EmailLog(models.Model):
     )
     sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de envío")
     error_message = models.TextField(blank=True, verbose_name="Mensaje de error")
+
+    # Cola de envío (outbox): reintentos con backoff
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name="Próximo intento")
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
@@ -84,6 +99,7 @@ class EmailLog(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
             models.Index(fields=['recipient_email']),
+            models.Index(fields=['status', 'next_attempt_at'], name='emaillog_queue_idx'),
         ]
 
     def __str__(self):
@@ -100,3 +116,50 @@ class EmailLog(models.Model):
         self.status = 'failed'
         self.error_message = error_message
         self.save(update_fields=['status', 'error_message'])
+
+
+class DailyHotelStats(models.Model):
+    """
+    Tabla de hechos diaria por hotel (ocupación, llegadas, salidas, ingresos y
+    reservas por estado). Se mantiene de forma incremental desde el ciclo de vida
+    de las reservas para que los dashboards lean O(días) en lugar de recorrer reservas.
+
+    - occupied_rooms: habitaciones con una reserva confirmada que pernocta esa noche
+    - arrivals / departures: reservas confirmadas o finalizadas que entran / salen ese día
+    - revenue: total de reservas confirmadas o finalizadas con check-in ese día
+    - pending ... no_show: reservas por estado según su fecha de check-in
+    """
+    hotel = models.ForeignKey('administration.Hotel', on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Hotel")
+    date = models.DateField(verbose_name="Fecha")
+
+    occupied_rooms = models.PositiveIntegerField(default=0, verbose_name="Habitaciones ocupadas")
+    arrivals = models.PositiveIntegerField(default=0, verbose_name="Llegadas")
+    departures = models.PositiveIntegerField(default=0, verbose_name="Salidas")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Ingresos")
+
+    pending = models.PositiveIntegerField(default=0, verbose_name="Pendientes")
+    confirmed = models.PositiveIntegerField(default=0, verbose_name="Confirmadas")
+    cancelled = models.PositiveIntegerField(default=0, verbose_name="Canceladas")
+    completed = models.PositiveIntegerField(default=0, verbose_name="Finalizadas")
+    no_show = models.PositiveIntegerField(default=0, verbose_name="No Show")
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Estadística diaria de hotel"
+        verbose_name_plural = "Estadísticas diarias de hotel"
+        ordering = ['hotel', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'date'], name='uniq_daily_stats_hotel_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel_id} - {self.date}"
+
+    @property
+    def total_bookings(self):
+        """Reservas con check-in ese día (todos los estados)"""
+        return self.pending + self.confirmed + self.cancelled + self.completed + self.no_show
@@ -0,0 +1,146 @@
+"""
+Paginación por cursor (keyset) para los listados JSON.
+
+En lugar de OFFSET, cada página se pide a partir de los valores de orden de la
+última (o primera) fila devuelta, de modo que el costo de una página no crece
+con la posición y las altas/bajas concurrentes no desplazan resultados.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no es válido para este listado"""
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, direction):
+    raw = json.dumps({'v': [_serialize(v) for v in values], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, expected_len):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = data['v'], data['d']
+    except Exception:
+        raise InvalidCursor('Cursor inválido')
+    if direction not in ('next', 'prev') or len(values) != expected_len:
+        raise InvalidCursor('Cursor inválido')
+    return values, direction
+
+
+def _model_field(model, path):
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return field
+
+
+def _cursor_values(model, keys, values):
+    """Convierte los valores del cursor al tipo de cada campo; un valor que no parsea invalida el cursor"""
+    parsed = []
+    for key, value in zip(keys, values):
+        try:
+            field = _model_field(model, key)
+            if field.is_relation:
+                field = field.target_field
+            parsed.append(None if value is None else field.to_python(value))
+        except FieldDoesNotExist:
+            parsed.append(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor('Cursor inválido')
+    return parsed
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Convierte el parámetro page_size a un entero entre 1 y `maximum`"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _keyset_filter(ordering, values, forward):
+    """
+    Construye (a > va) | (a = va & b > vb) | ... respetando la dirección de cada campo.
+    `forward` False invierte todas las comparaciones (página anterior).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        # asc hacia adelante -> gt; desc hacia adelante -> lt; hacia atrás se invierte
+        lookup = 'gt' if (not descending) == forward else 'lt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def keyset_paginate(queryset, ordering, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Pagina `queryset` por cursor sobre `ordering` (el último campo debe ser único, p. ej. 'id').
+
+    Args:
+        queryset: QuerySet ya filtrado
+        ordering: campos de orden, con '-' para descendente (p. ej. ['-created_at', '-id'])
+        fields: columnas a proyectar con .values(); deben incluir los campos de orden
+        cursor: cursor 'next' o 'prev' devuelto por una página anterior
+        page_size: tamaño de página
+
+    Returns:
+        dict con 'results' (lista de dicts), 'next' y 'prev' (cursores o None)
+    """
+    keys = [field.lstrip('-') for field in ordering]
+    direction = 'next'
+    qs = queryset
+    if cursor:
+        values, direction = decode_cursor(cursor, len(ordering))
+        values = _cursor_values(queryset.model, keys, values)
+        qs = qs.filter(_keyset_filter(ordering, values, forward=(direction == 'next')))
+
+    order = list(ordering) if direction == 'next' else _reverse(ordering)
+    rows = list(qs.order_by(*order).values(*fields)[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'prev':
+        rows.reverse()
+
+    def position(row):
+        return [row[key] for key in keys]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = encode_cursor(position(rows[-1]), 'next')
+            if cursor:
+                prev_cursor = encode_cursor(position(rows[0]), 'prev')
+        else:
+            next_cursor = encode_cursor(position(rows[-1]), 'next')
+            if has_more:
+                prev_cursor = encode_cursor(position(rows[0]), 'prev')
+    return {'results': rows, 'next': next_cursor, 'prev': prev_cursor}
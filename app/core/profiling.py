@@ -0,0 +1,82 @@
+"""
+Perfil de consultas por operación (modo "save-path profile").
+
+Con SAVE_PATH_PROFILE activo (variable de entorno o setting) cada bloque
+profile_queries('Booking.save') cuenta las consultas SQL y el tiempo que costó,
+lo registra en el logger app.profiling y acumula totales por nombre en el
+proceso (profile_stats()). Desactivado, el bloque no agrega trabajo: sirve
+para dejar medidos los caminos calientes sin pagar nada en producción.
+
+Los bloques se pueden anidar: cada uno cuenta también las consultas de los
+bloques internos (p. ej. Room.change_status dentro de Booking.cancel_booking).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('app.profiling')
+
+_lock = threading.Lock()
+_totals = {}
+
+
+class QueryProfile:
+    """Consultas y duración de un bloque perfilado"""
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = []
+        self.duration = 0.0
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de Django: se invoca por cada consulta de la conexión
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+def profiling_enabled():
+    return bool(getattr(settings, 'SAVE_PATH_PROFILE', False))
+
+
+@contextmanager
+def profile_queries(name, force=False):
+    """
+    Perfila las consultas del bloque. Retorna el QueryProfile (o None si el
+    modo está desactivado y no se pasó force=True).
+    """
+    if not (force or profiling_enabled()):
+        yield None
+        return
+    profile = QueryProfile(name)
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(profile):
+            yield profile
+    finally:
+        profile.duration = time.perf_counter() - started
+        with _lock:
+            calls, queries, seconds = _totals.get(name, (0, 0, 0.0))
+            _totals[name] = (calls + 1, queries + profile.count, seconds + profile.duration)
+        logger.info('%s: %d consultas en %.1f ms', name, profile.count, profile.duration * 1000)
+        for sql in profile.queries:
+            logger.debug('  %s', sql)
+
+
+def profile_stats(reset=False):
+    """{nombre: {'calls', 'queries', 'seconds'}} acumulado en este proceso"""
+    with _lock:
+        stats = {
+            name: {'calls': calls, 'queries': queries, 'seconds': round(seconds, 4)}
+            for name, (calls, queries, seconds) in _totals.items()
+        }
+        if reset:
+            _totals.clear()
+    return stats
@@ -0,0 +1,99 @@
+"""
+Series temporales agrupadas por día, semana o mes.
+
+build_series resuelve la serie completa con una sola consulta GROUP BY
+(periodo[, campo de grupo]) y completa en Python los periodos sin datos,
+en lugar de lanzar una consulta por día.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth, TruncWeek
+
+BUCKETS = ('day', 'week', 'month')
+
+
+def bucket_start(day, bucket):
+    """Primer día del periodo al que pertenece `day`"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def iter_buckets(start, end, bucket):
+    """Inicios de periodo entre start y end (inclusive)"""
+    current = bucket_start(start, bucket)
+    while current <= end:
+        yield current
+        if bucket == 'week':
+            current += timedelta(days=7)
+        elif bucket == 'month':
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+
+
+def _period_expression(date_field, bucket):
+    if bucket == 'week':
+        return TruncWeek(date_field)
+    if bucket == 'month':
+        return TruncMonth(date_field)
+    return F(date_field)
+
+
+def build_series(queryset, date_field, start, end, bucket='day', metrics=None, group_field=None, groups=None):
+    """
+    Construye una serie temporal sobre `queryset` para [start, end].
+
+    Args:
+        queryset: QuerySet base (ya filtrado por hotel, estado, etc.)
+        date_field: campo de fecha usado para agrupar (p. ej. 'check_in_date')
+        bucket: 'day', 'week' o 'month'
+        metrics: dict nombre -> agregado (por defecto {'count': Count('id')})
+        group_field: campo opcional para separar cada periodo (p. ej. 'status')
+        groups: valores de group_field a incluir (siempre presentes, en 0 si no hay datos)
+
+    Returns:
+        Lista ordenada de dicts {'period': date, ...}. Sin group_field las claves son
+        las métricas; con group_field son los grupos (una métrica) o '<grupo>_<métrica>'.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f'Intervalo no soportado: {bucket}')
+    metrics = metrics or {'count': Count('id')}
+    if group_field and not groups:
+        raise ValueError('groups es obligatorio cuando se indica group_field')
+
+    if group_field:
+        if len(metrics) == 1:
+            keys = {(g, m): str(g) for g in groups for m in metrics}
+        else:
+            keys = {(g, m): f'{g}_{m}' for g in groups for m in metrics}
+    else:
+        keys = {(None, m): m for m in metrics}
+
+    rows = {period: {key: 0 for key in keys.values()} for period in iter_buckets(start, end, bucket)}
+
+    values = ['period', group_field] if group_field else ['period']
+    data = (
+        queryset.filter(**{f'{date_field}__gte': start, f'{date_field}__lte': end})
+        .annotate(period=_period_expression(date_field, bucket))
+        .values(*values)
+        .annotate(**{f'series_{name}': expr for name, expr in metrics.items()})
+        .order_by()
+    )
+    for item in data:
+        period = item['period']
+        if hasattr(period, 'date'):
+            period = period.date()
+        row = rows.get(period)
+        if row is None:
+            continue
+        group = item[group_field] if group_field else None
+        for metric in metrics:
+            key = keys.get((group, metric))
+            if key is not None:
+                row[key] += item[f'series_{metric}'] or 0
+
+    return [{'period': period, **row} for period, row in sorted(rows.items())]
@@ -1,7 +1,6 @@
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
+from django.db import transaction
 from django.utils import timezone
+from .email_templates import render_batch, render_email, template_id_for
 from .models import EmailLog
 from app.bookings.models import Booking
 from app.clients.models import Client
@@ -15,685 +14,249 @@ class EmailService:
     @staticmethod
     def send_booking_confirmation(booking_id: int) -> dict:
         """
-        Envía email de confirmación de reserva
-        
+        Registra el email de confirmación de reserva en la cola de envío
+        (aunque ya se haya enviado uno: es un envío pedido explícitamente)
+
         Args:
             booking_id: ID de la reserva
-            
+
         Returns:
-            dict: Resultado del envío
+            dict: Resultado del encolado
         """
-        try:
-            # Obtener la reserva
-            booking = Booking.objects.select_related('client', 'room').get(id=booking_id)
-            
-            # Verificar que el cliente tenga email
-            if not booking.client.email:
-                logger.warning(f"Cliente {booking.client.id} no tiene email configurado")
-                return {
-                    "success": False,
-                    "message": "El cliente no tiene email configurado"
-                }
-            
-            # Preparar datos del email
-            subject = f"Confirmación de Reserva - {booking.room.number}"
-            recipient_email = booking.client.email
-            recipient_name = booking.client.first_name
-            
-            # Crear contenido HTML
-            html_content = EmailService._create_booking_confirmation_html(booking)
-            text_content = EmailService._create_booking_confirmation_text(booking)
-            
-            # Crear registro de email
-            email_log = EmailLog.objects.create(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                subject=subject,
-                content=html_content,
-                booking=booking,
-                client=booking.client
-            )
-            
-            # Enviar email
-            try:
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[recipient_email],
-                    html_message=html_content,
-                    fail_silently=False
-                )
-                
-                # Marcar como enviado
-                email_log.mark_as_sent()
-                
-                logger.info(f"Email de confirmación enviado exitosamente a {recipient_email}")
-                
-                return {
-                    "success": True,
-                    "message": "Email enviado exitosamente",
-                    "email_log_id": email_log.id,
-                    "recipient_email": recipient_email,
-                    "subject": subject
-                }
-                
-            except Exception as e:
-                error_msg = f"Error al enviar email: {str(e)}"
-                email_log.mark_as_failed(error_msg)
-                logger.error(error_msg)
-                
-                return {
-                    "success": False,
-                    "message": error_msg,
-                    "email_log_id": email_log.id
-                }
-                
-        except Booking.DoesNotExist:
-            return {
-                "success": False,
-                "message": "Reserva no encontrada"
-            }
-        except Exception as e:
-            logger.error(f"Error inesperado: {str(e)}")
-            return {
-                "success": False,
-                "message": f"Error interno: {str(e)}"
-            }
+        return EmailService._send_booking_email('booking_confirmation', booking_id)
     
     @staticmethod
     def send_booking_confirmation_async(booking_id: int):
         """
-        Envía email de confirmación de forma asíncrona (para uso en save() del modelo)
-        No retorna resultado para evitar bloquear la creación de la reserva
+        Encola el email de confirmación (para uso en save() del modelo).
+        No hay SMTP en la petición: el worker process_email_queue lo entrega.
         """
-        try:
-            result = EmailService.send_booking_confirmation(booking_id)
-            if not result["success"]:
-                logger.warning(f"Email de confirmación falló para reserva {booking_id}: {result['message']}")
-        except Exception as e:
-            logger.error(f"Error al enviar email de confirmación para reserva {booking_id}: {str(e)}")
-    
+        EmailService.queue_booking_email('booking_confirmation', booking_id)
+
+    # ------------------------------------------------------------------
+    # Cola de envío (outbox): los emails se registran como 'pending' y los
+    # entrega el comando process_email_queue (ver app/core/email_queue.py)
+    # ------------------------------------------------------------------
+
     @staticmethod
-    def send_welcome_email(client_id: int) -> dict:
+    def _booking_email_subject(email_type: str, booking: Booking) -> str:
+        if email_type == 'booking_confirmation':
+            return f"Confirmación de Reserva - {booking.room.number}"
+        if email_type == 'booking_cancellation':
+            return f"Cancelación de Reserva - {booking.room.number}"
+        if email_type == 'payment_confirmation':
+            if booking.payment_status == 'partial':
+                return f"Pago Parcial Registrado - {booking.room.number}"
+            return f"Confirmación de Pago - {booking.room.number}"
+        raise ValueError(f"Tipo de email no soportado: {email_type}")
+
+    @staticmethod
+    def _booking_email_content(email_type: str, booking: Booking) -> tuple:
+        """Devuelve (asunto, html, texto) para un email asociado a una reserva"""
+        subject = EmailService._booking_email_subject(email_type, booking)
+        return (subject, *EmailService.render_booking_email(email_type, booking))
+
+    @staticmethod
+    def enqueue_booking_email(email_type: str, booking_id: int):
         """
-        Envía email de bienvenida a un nuevo cliente
-        
-        Args:
-            client_id: ID del cliente
-            
+        Registra un email de reserva como pendiente de envío.
+
+        La confirmación de reserva no se duplica si ya hay una pendiente o enviada
+        (Booking.save y las vistas de alta pueden encolarla ambas).
+
         Returns:
-            dict: Resultado del envío
+            EmailLog creado, o None si no corresponde enviar
         """
-        try:
-            client = Client.objects.get(id=client_id)
-            
-            subject = "¡Bienvenido a O11CE!"
-            recipient_email = client.email
-            recipient_name = client.first_name
-            
-            html_content = EmailService._create_welcome_html(client)
-            text_content = EmailService._create_welcome_text(client)
-            
-            # Crear registro de email
-            email_log = EmailLog.objects.create(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                subject=subject,
-                content=html_content,
-                client=client
-            )
-            
-            try:
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[recipient_email],
-                    html_message=html_content,
-                    fail_silently=False
-                )
-                
-                email_log.mark_as_sent()
-                
-                return {
-                    "success": True,
-                    "message": "Email de bienvenida enviado exitosamente",
-                    "email_log_id": email_log.id,
-                    "recipient_email": recipient_email
-                }
-                
-            except Exception as e:
-                error_msg = f"Error al enviar email de bienvenida: {str(e)}"
-                email_log.mark_as_failed(error_msg)
-                
-                return {
-                    "success": False,
-                    "message": error_msg,
-                    "email_log_id": email_log.id
-                }
-                
-        except Client.DoesNotExist:
-            return {
-                "success": False,
-                "message": "Cliente no encontrado"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "message": f"Error interno: {str(e)}"
-            }
-    
-    @staticmethod
-    def _create_booking_confirmation_html(booking: Booking) -> str:
-        """Crea el contenido HTML para confirmación de reserva"""
-        hotel = booking.hotel or getattr(booking.room, 'hotel', None)
-        hotel_name = hotel.name if hotel else 'O11CE Hotel'
-        hotel_email = getattr(hotel, 'email_contact', '') if hotel else ''
-        hotel_phone = getattr(hotel, 'phone', '') if hotel else ''
-        hotel_address = getattr(hotel, 'address', '') if hotel else ''
-        return f"""
-        <html>
-        <head>
-            <style>
-                body {{ 
-                    font-family: Arial, sans-serif; 
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                .container {{ 
-                    max-width: 600px; 
-                    margin: 0 auto; 
-                    padding: 20px; 
-                }}
-                .header {{ 
-                    background-color: #009485; 
-                    color: white; 
-                    padding: 30px; 
-                    text-align: center; 
-                    border-radius: 8px 8px 0 0;
-                }}
-                .content {{ 
-                    padding: 30px; 
-                    background-color: #f9f9f9;
-                }}
-                .details {{ 
-                    background-color: white; 
-                    padding: 20px; 
-                    margin: 20px 0; 
-                    border-radius: 8px;
-                    border-left: 4px solid #009485;
-                }}
-                .footer {{ 
-                    text-align: center; 
-                    color: #666; 
-                    font-size: 12px; 
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                    border-radius: 0 0 8px 8px;
-                }}
-                .highlight {{
-                    color: #009485;
-                    font-weight: bold;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>✅ Confirmación de Reserva</h1>
-                    <p>Tu reserva ha sido confirmada exitosamente</p>
-                </div>
-                <div class="content">
-                    <h2>Hola {booking.client.first_name},</h2>
-                    <p>Nos complace confirmar que tu reserva ha sido procesada exitosamente.</p>
-                    
-                    <div class="details">
-                        <h3>📋 Detalles de la Reserva:</h3>
-                        <p><strong>Número de Reserva:</strong> <span class="highlight">#{booking.id}</span></p>
-                        <p><strong>Habitación:</strong> {booking.room.number}</p>
-                        <p><strong>Fecha de Llegada:</strong> {booking.check_in_date}</p>
-                        <p><strong>Fecha de Salida:</strong> {booking.check_out_date}</p>
-                        <p><strong>Número de Personas:</strong> {booking.guests_count}</p>
-                        <p><strong>Estado:</strong> <span class="highlight">{booking.get_status_display()}</span></p>
-                    </div>
-                    
-                    <p>¡Gracias por elegir {hotel_name}! Esperamos tu llegada.</p>
-                    
-                    <p>Si tienes alguna pregunta, no dudes en contactarnos.</p>
-                </div>
-                <div class="footer">
-                    <p>Contacto: {hotel_email} {hotel_phone} • {hotel_address}</p>
-                    <p>Este es un email automático, por favor no respondas a este mensaje.</p>
-                    <p>© 2024 {hotel_name}</p>
-        </div>
-            </div>
-        </body>
-        </html>
-        """
-    
+        booking = Booking.objects.select_related('client', 'room', 'hotel').filter(id=booking_id).first()
+        if booking is None:
+            logger.warning(f"No se encola email {email_type}: reserva {booking_id} no encontrada")
+            return None
+        if not booking.client.email:
+            logger.warning(f"Cliente {booking.client.id} no tiene email configurado")
+            return None
+        if email_type == 'booking_confirmation' and EmailLog.objects.filter(
+            booking=booking, email_type='booking_confirmation'
+        ).exclude(status='failed').exists():
+            return None
+        return EmailService._create_booking_log(email_type, booking)
+
     @staticmethod
-    def _create_booking_confirmation_text(booking: Booking) -> str:
-        """Crea el contenido de texto plano para confirmación de reserva"""
-        return f"""
-        Confirmación de Reserva - O11CE
-        
-        Hola {booking.client.first_name},
-        
-        Tu reserva ha sido confirmada exitosamente.
-        
-        Detalles de la Reserva:
-        - Número de Reserva: #{booking.id}
-        - Habitación: {booking.room.number}
-        - Fecha de Llegada: {booking.check_in_date}
-        - Fecha de Salida: {booking.check_out_date}
-        - Número de Personas: {booking.guests_count}
-        - Estado: {booking.get_status_display()}
-        
-        ¡Gracias por elegir O11CE! Esperamos tu llegada.
-        
-        Si tienes alguna pregunta, no dudes en contactarnos.
-        
-        Este es un email automático, por favor no respondas a este mensaje.
-        © 2024 O11CE - Sistema de Gestión Hotelera
-        """
-    
+    def _create_booking_log(email_type: str, booking: Booking):
+        subject, html_content, text_content = EmailService._booking_email_content(email_type, booking)
+        return EmailLog.objects.create(
+            recipient_email=booking.client.email,
+            recipient_name=booking.client.first_name,
+            subject=subject,
+            content=html_content,
+            text_content=text_content,
+            email_type=email_type,
+            status='pending',
+            next_attempt_at=timezone.now(),
+            booking=booking,
+            client=booking.client
+        )
+
     @staticmethod
-    def _create_welcome_html(client: Client) -> str:
-        """Crea el contenido HTML para email de bienvenida"""
-        return f"""
-        <html>
-        <head>
-            <style>
-                body {{ 
-                    font-family: Arial, sans-serif; 
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                .container {{ 
-                    max-width: 600px; 
-                    margin: 0 auto; 
-                    padding: 20px; 
-                }}
-                .header {{ 
-                    background-color: #009485; 
-                    color: white; 
-                    padding: 30px; 
-                    text-align: center; 
-                    border-radius: 8px 8px 0 0;
-                }}
-                .content {{ 
-                    padding: 30px; 
-                    background-color: #f9f9f9;
-                }}
-                .footer {{ 
-                    text-align: center; 
-                    color: #666; 
-                    font-size: 12px; 
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                    border-radius: 0 0 8px 8px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🎉 ¡Bienvenido a O11CE!</h1>
-                </div>
-                <div class="content">
-                    <h2>Hola {client.first_name},</h2>
-                    <p>¡Bienvenido a nuestro sistema de gestión hotelera!</p>
-                    
-                    <p>Estamos emocionados de tenerte como parte de nuestra comunidad. 
-                    En O11CE encontrarás:</p>
-                    
-                    <ul>
-                        <li>✅ Reservas fáciles y rápidas</li>
-                        <li>✅ Habitaciones de alta calidad</li>
-                        <li>✅ Atención personalizada</li>
-                        <li>✅ Sistema de gestión moderno</li>
-                    </ul>
-                    
-                    <p>¡Esperamos que disfrutes de tu experiencia con nosotros!</p>
-                </div>
-                <div class="footer">
-                    <p>© 2024 O11CE - Sistema de Gestión Hotelera</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    
+    def enqueue_welcome_email(client_id: int):
+        """Registra el email de bienvenida como pendiente de envío"""
+        client = Client.objects.filter(id=client_id).first()
+        if client is None or not client.email:
+            logger.warning(f"No se encola bienvenida: cliente {client_id} inexistente o sin email")
+            return None
+        html_content, text_content = EmailService.render_welcome_email(client)
+        return EmailLog.objects.create(
+            recipient_email=client.email,
+            recipient_name=client.first_name,
+            subject="¡Bienvenido a O11CE!",
+            content=html_content,
+            text_content=text_content,
+            email_type='welcome',
+            status='pending',
+            next_attempt_at=timezone.now(),
+            client=client
+        )
+
     @staticmethod
-    def _create_welcome_text(client: Client) -> str:
-        """Crea el contenido de texto plano para email de bienvenida"""
-        return f"""
-        ¡Bienvenido a O11CE!
-        
-        Hola {client.name},
-        
-        ¡Bienvenido a nuestro sistema de gestión hotelera!
-        
-        Estamos emocionados de tenerte como parte de nuestra comunidad. 
-        En O11CE encontrarás:
-        
-        - Reservas fáciles y rápidas
-        - Habitaciones de alta calidad
-        - Atención personalizada
-        - Sistema de gestión moderno
-        
-        ¡Esperamos que disfrutes de tu experiencia con nosotros!
-        
-        © 2024 O11CE - Sistema de Gestión Hotelera
-        """
-    
+    def _queued_result(email_log, message: str) -> dict:
+        return {
+            "success": True,
+            "message": message,
+            "email_log_id": email_log.id,
+            "recipient_email": email_log.recipient_email,
+            "subject": email_log.subject,
+        }
+
     @staticmethod
-    def send_booking_cancellation(booking_id: int) -> dict:
+    def _send_booking_email(email_type: str, booking_id: int) -> dict:
         """
-        Envía email de cancelación de reserva
-        
-        Args:
-            booking_id: ID de la reserva
-            
-        Returns:
-            dict: Resultado del envío
+        Envío pedido desde la API o el admin: registra el email como pendiente y
+        responde sin SMTP en la petición. Lo entrega process_email_queue junto
+        con el resto del lote por una sola conexión (send_batch).
         """
         try:
-            # Obtener la reserva
-            booking = Booking.objects.select_related('client', 'room').get(id=booking_id)
-            
-            # Verificar que el cliente tenga email
+            booking = Booking.objects.select_related('client', 'room', 'hotel').get(id=booking_id)
             if not booking.client.email:
                 logger.warning(f"Cliente {booking.client.id} no tiene email configurado")
-                return {
-                    "success": False,
-                    "message": "El cliente no tiene email configurado"
-                }
-            
-            # Preparar datos del email
-            subject = f"Cancelación de Reserva - {booking.room.number}"
-            recipient_email = booking.client.email
-            recipient_name = booking.client.first_name
-            
-            # Crear contenido HTML
-            html_content = EmailService._create_booking_cancellation_html(booking)
-            text_content = EmailService._create_booking_cancellation_text(booking)
-            
-            # Crear registro de email
-            email_log = EmailLog.objects.create(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                subject=subject,
-                content=html_content,
-                booking=booking,
-                client=booking.client
-            )
-            
-            # Enviar email
-            try:
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[recipient_email],
-                    html_message=html_content,
-                    fail_silently=False
-                )
-                
-                # Marcar como enviado
-                email_log.mark_as_sent()
-                
-                logger.info(f"Email de cancelación enviado exitosamente a {recipient_email}")
-                
-                return {
-                    "success": True,
-                    "message": "Email enviado exitosamente",
-                    "email_log_id": email_log.id,
-                    "recipient_email": recipient_email,
-                    "subject": subject
-                }
-                
-            except Exception as e:
-                error_msg = f"Error al enviar email: {str(e)}"
-                email_log.mark_as_failed(error_msg)
-                logger.error(error_msg)
-                
-                return {
-                    "success": False,
-                    "message": error_msg,
-                    "email_log_id": email_log.id
-                }
-                
+                return {"success": False, "message": "El cliente no tiene email configurado"}
+            email_log = EmailService._create_booking_log(email_type, booking)
+            logger.info(f"Email {email_type} encolado para {email_log.recipient_email}")
+            return EmailService._queued_result(email_log, "Email encolado para envío")
         except Booking.DoesNotExist:
-            return {
-                "success": False,
-                "message": "Reserva no encontrada"
-            }
+            return {"success": False, "message": "Reserva no encontrada"}
         except Exception as e:
             logger.error(f"Error inesperado: {str(e)}")
-            return {
-                "success": False,
-                "message": f"Error inesperado: {str(e)}"
-            }
-    
+            return {"success": False, "message": f"Error interno: {str(e)}"}
+
     @staticmethod
-    def _create_booking_cancellation_html(booking: Booking) -> str:
-        """Crea el contenido HTML para email de cancelación"""
-        return f"""
-        <html>
-        <head>
-            <style>
-                body {{ 
-                    font-family: Arial, sans-serif; 
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                .container {{ 
-                    max-width: 600px; 
-                    margin: 0 auto; 
-                    padding: 20px; 
-                }}
-                .header {{ 
-                    background-color: #dc3545; 
-                    color: white; 
-                    padding: 30px; 
-                    text-align: center; 
-                    border-radius: 8px 8px 0 0;
-                }}
-                .content {{ 
-                    padding: 30px; 
-                    background-color: #f9f9f9;
-                }}
-                .booking-details {{
-                    background-color: white;
-                    padding: 20px;
-                    border-radius: 8px;
-                    margin: 20px 0;
-                    border-left: 4px solid #dc3545;
-                }}
-                .footer {{ 
-                    text-align: center; 
-                    color: #666; 
-                    font-size: 12px; 
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                    border-radius: 0 0 8px 8px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>❌ Reserva Cancelada</h1>
-                </div>
-                <div class="content">
-                    <h2>Hola {booking.client.first_name},</h2>
-                    <p>Tu reserva ha sido cancelada exitosamente.</p>
-                    
-                    <div class="booking-details">
-                        <h3>Detalles de la Reserva Cancelada:</h3>
-                        <p><strong>Número de Reserva:</strong> #{booking.id}</p>
-                        <p><strong>Habitación:</strong> {booking.room.number} ({booking.room.get_type_display()})</p>
-                        <p><strong>Fechas:</strong> {booking.check_in_date.strftime('%d/%m/%Y')} - {booking.check_out_date.strftime('%d/%m/%Y')}</p>
-                        <p><strong>Número de Personas:</strong> {booking.guests_count}</p>
-                        <p><strong>Precio Total:</strong> ${booking.total_price}</p>
-                    </div>
-                    
-                    <p>Si tienes alguna pregunta sobre la cancelación, no dudes en contactarnos.</p>
-                    
-                    <p>Esperamos verte pronto en O11CE.</p>
-                </div>
-                <div class="footer">
-                    <p>© 2024 O11CE - Sistema de Gestión Hotelera</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def queue_booking_email(email_type: str, booking_id: int):
         """
-    
-    @staticmethod
-    def _create_booking_cancellation_text(booking: Booking) -> str:
-        """Crea el contenido de texto plano para email de cancelación"""
-        return f"""
-        Reserva Cancelada - O11CE
-        
-        Hola {booking.client.first_name},
-        
-        Tu reserva ha sido cancelada exitosamente.
-        
-        Detalles de la Reserva Cancelada:
-        - Número de Reserva: #{booking.id}
-        - Habitación: {booking.room.number} ({booking.room.get_type_display()})
-        - Fechas: {booking.check_in_date.strftime('%d/%m/%Y')} - {booking.check_out_date.strftime('%d/%m/%Y')}
-        - Número de Personas: {booking.guests_count}
-        - Precio Total: ${booking.total_price}
-        
-        Si tienes alguna pregunta sobre la cancelación, no dudes en contactarnos.
-        
-        Esperamos verte pronto en O11CE.
-        
-        Este es un email automático, por favor no respondas a este mensaje.
-        © 2024 O11CE - Sistema de Gestión Hotelera
+        Encola un email de reserva cuando la transacción en curso se confirme.
+        Si la transacción se revierte no se registra nada; fuera de un atomic()
+        se encola en el acto.
         """
+        transaction.on_commit(
+            lambda: EmailService.enqueue_booking_email(email_type, booking_id),
+            robust=True,
+        )
+
+    @staticmethod
+    def queue_welcome_email(client_id: int):
+        """Encola el email de bienvenida al confirmarse la transacción en curso"""
+        transaction.on_commit(lambda: EmailService.enqueue_welcome_email(client_id), robust=True)
     
     @staticmethod
-    def send_payment_confirmation(booking_id: int) -> dict:
-        """Envía email de confirmación/recibo de pago de una reserva"""
+    def send_welcome_email(client_id: int) -> dict:
+        """
+        Registra el email de bienvenida de un cliente en la cola de envío
+
+        Args:
+            client_id: ID del cliente
+
+        Returns:
+            dict: Resultado del encolado
+        """
         try:
-            booking = Booking.objects.select_related('client', 'room').get(id=booking_id)
-            if not booking.client.email:
-                logger.warning(f"Cliente {booking.client.id} no tiene email configurado")
+            if not Client.objects.filter(id=client_id).exists():
+                return {"success": False, "message": "Cliente no encontrado"}
+            email_log = EmailService.enqueue_welcome_email(client_id)
+            if email_log is None:
                 return {"success": False, "message": "El cliente no tiene email configurado"}
+            return EmailService._queued_result(email_log, "Email de bienvenida encolado para envío")
+        except Exception as e:
+            return {"success": False, "message": f"Error interno: {str(e)}"}
+    
+    # ------------------------------------------------------------------
+    # Contenido: plantillas en templates/emails/ (ver app/core/email_templates.py)
+    # ------------------------------------------------------------------
 
-            is_partial = (booking.payment_status == 'partial')
-            subject = (
-                f"Pago Parcial Registrado - {booking.room.number}" if is_partial
-                else f"Confirmación de Pago - {booking.room.number}"
-            )
-            recipient_email = booking.client.email
-            recipient_name = booking.client.first_name
+    @staticmethod
+    def _email_context(hotel, **extra) -> dict:
+        """Contexto común a todos los emails de un hotel"""
+        context = {
+            'hotel': hotel,
+            'hotel_name': hotel.name if hotel else 'O11CE',
+            'hotel_email': (getattr(hotel, 'email_contact', '') or '') if hotel else '',
+            'hotel_phone': (getattr(hotel, 'phone', '') or '') if hotel else '',
+            'hotel_address': (getattr(hotel, 'address', '') or '') if hotel else '',
+            'year': timezone.now().year,
+        }
+        context.update(extra)
+        return context
 
-            html_content = EmailService._create_payment_confirmation_html(booking)
-            text_content = EmailService._create_payment_confirmation_text(booking)
+    @staticmethod
+    def _booking_context(booking: Booking) -> dict:
+        hotel = booking.hotel or getattr(booking.room, 'hotel', None)
+        return EmailService._email_context(
+            hotel,
+            booking=booking,
+            client=booking.client,
+            room=booking.room,
+            status_label='Pago Parcial' if booking.payment_status == 'partial' else 'Pagado',
+        )
 
-            email_log = EmailLog.objects.create(
-                recipient_email=recipient_email,
-                recipient_name=recipient_name,
-                subject=subject,
-                content=html_content,
-                booking=booking,
-                client=booking.client
-            )
+    @staticmethod
+    def render_booking_email(email_type: str, booking: Booking) -> tuple:
+        """Renderiza (html, texto) de un email de reserva con la plantilla del hotel"""
+        hotel = booking.hotel or getattr(booking.room, 'hotel', None)
+        return render_email(email_type, EmailService._booking_context(booking), template_id_for(hotel))
 
-            try:
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[recipient_email],
-                    html_message=html_content,
-                    fail_silently=False
-                )
-                email_log.mark_as_sent()
-                logger.info(f"Email de pago enviado a {recipient_email}")
-                return {"success": True, "message": "Email enviado exitosamente", "email_log_id": email_log.id}
-            except Exception as e:
-                error_msg = f"Error al enviar email: {str(e)}"
-                email_log.mark_as_failed(error_msg)
-                logger.error(error_msg)
-                return {"success": False, "message": error_msg, "email_log_id": email_log.id}
-        except Booking.DoesNotExist:
-            return {"success": False, "message": "Reserva no encontrada"}
-        except Exception as e:
-            logger.error(f"Error inesperado: {str(e)}")
-            return {"success": False, "message": f"Error interno: {str(e)}"}
+    @staticmethod
+    def render_booking_emails(email_type: str, bookings) -> list:
+        """
+        Renderiza (html, texto) para muchas reservas agrupando por plantilla de hotel;
+        cada plantilla se compila una sola vez para todo el lote.
+        """
+        groups = {}
+        for index, booking in enumerate(bookings):
+            hotel = booking.hotel or getattr(booking.room, 'hotel', None)
+            groups.setdefault(template_id_for(hotel), []).append((index, booking))
+        rendered = [None] * sum(len(items) for items in groups.values())
+        for template_id, items in groups.items():
+            contexts = [EmailService._booking_context(booking) for _, booking in items]
+            for (index, _), result in zip(items, render_batch(email_type, contexts, template_id)):
+                rendered[index] = result
+        return rendered
 
     @staticmethod
-    def _create_payment_confirmation_html(booking: Booking) -> str:
-        """Crea HTML para email de confirmación/recibo de pago"""
-        status_label = 'Pago Parcial' if booking.payment_status == 'partial' else 'Pagado'
-        return f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #198754; color: white; padding: 30px; text-align: center; border-radius: 8px 8px 0 0; }}
-                .content {{ padding: 30px; background-color: #f9f9f9; }}
-                .booking-details {{ background-color: white; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #198754; }}
-                .footer {{ text-align: center; color: #666; font-size: 12px; padding: 20px; background-color: #f5f5f5; border-radius: 0 0 8px 8px; }}
-            </style>
-        </head>
-        <body>
-            <div class=\"container\">
-                <div class=\"header\">
-                    <h1>✔ {status_label}</h1>
-                </div>
-                <div class=\"content\">
-                    <h2>Hola {booking.client.first_name},</h2>
-                    <p>Hemos registrado tu {status_label.lower()} para la reserva #{booking.id}.</p>
-                    <div class=\"booking-details\">
-                        <h3>Detalles de la Reserva:</h3>
-                        <p><strong>Número de Reserva:</strong> #{booking.id}</p>
-                        <p><strong>Habitación:</strong> {booking.room.number} ({booking.room.get_type_display()})</p>
-                        <p><strong>Fechas:</strong> {booking.check_in_date.strftime('%d/%m/%Y')} - {booking.check_out_date.strftime('%d/%m/%Y')}</p>
-                        <p><strong>Número de Personas:</strong> {booking.guests_count}</p>
-                        <p><strong>Total:</strong> ${booking.total_price}</p>
-                        <p><strong>Pagado:</strong> ${booking.paid_amount}</p>
-                        <p><strong>Saldo Pendiente:</strong> ${booking.amount_due}</p>
-                        <p><strong>Estado de Pago:</strong> {status_label}</p>
-                    </div>
-                    <p>Gracias por tu confianza en O11CE. ¡Te esperamos!</p>
-                </div>
-                <div class=\"footer\">
-                    <p>© 2024 O11CE - Sistema de Gestión Hotelera</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def render_welcome_email(client: Client) -> tuple:
+        """Renderiza (html, texto) del email de bienvenida"""
+        hotel = getattr(client, 'hotel', None)
+        return render_email('welcome', EmailService._email_context(hotel, client=client), template_id_for(hotel))
+    
+    @staticmethod
+    def send_booking_cancellation(booking_id: int) -> dict:
         """
+        Registra el email de cancelación de reserva en la cola de envío
 
+        Args:
+            booking_id: ID de la reserva
+
+        Returns:
+            dict: Resultado del encolado
+        """
+        return EmailService._send_booking_email('booking_cancellation', booking_id)
+    
     @staticmethod
-    def _create_payment_confirmation_text(booking: Booking) -> str:
-        """Texto plano para email de pago"""
-        status_label = 'Pago Parcial' if booking.payment_status == 'partial' else 'Pagado'
-        return f"""
-        Confirmación de Pago - O11CE
-        
-        Hola {booking.client.first_name},
-        
-        Hemos registrado tu {status_label.lower()} para la reserva #{booking.id}.
-        
-        Detalles:
-         - Habitación: {booking.room.number} ({booking.room.get_type_display()})
-         - Fechas: {booking.check_in_date.strftime('%d/%m/%Y')} - {booking.check_out_date.strftime('%d/%m/%Y')}
-         - Total: ${booking.total_price}
-         - Pagado: ${booking.paid_amount}
-         - Saldo Pendiente: ${booking.amount_due}
-         - Estado de Pago: {status_label}
-         
-         ¡Gracias por tu preferencia!
-         
-         © 2024 O11CE - Sistema de Gestión Hotelera
-        """
\ No newline at end of file
+    def send_payment_confirmation(booking_id: int) -> dict:
+        """Registra el email de confirmación/recibo de pago de una reserva en la cola de envío"""
+        return EmailService._send_booking_email('payment_confirmation', booking_id)
@@ -0,0 +1,201 @@
+"""
+Mantenimiento y lectura de la tabla de hechos DailyHotelStats.
+
+Las estadísticas se recalculan por rango de días con consultas agrupadas
+(hotel, fecha), de modo que actualizar una reserva solo toca los días que
+abarca y los dashboards leen una fila por día en lugar de recorrer reservas.
+
+Las escrituras de reservas recalculan sus días después del commit
+(transaction.on_commit): así el cálculo ve las reservas confirmadas por otras
+transacciones y un error en las estadísticas nunca revierte la reserva. Las
+filas se escriben con upsert sobre (hotel, date), sin borrar y reinsertar.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from app.bookings.models import Booking, RoomNight
+from .models import DailyHotelStats
+
+logger = logging.getLogger(__name__)
+
+# Reservas por estado (según fecha de check-in)
+STATUS_FIELDS = ('pending', 'confirmed', 'cancelled', 'completed', 'no_show')
+# Estados que cuentan como estadía efectiva (ingresos, llegadas y salidas)
+REVENUE_STATUSES = ('confirmed', 'completed')
+# Campos de la reserva que afectan a las estadísticas
+STATS_FIELDS = {'status', 'room', 'room_id', 'check_in_date', 'check_out_date', 'hotel', 'hotel_id', 'total_price'}
+
+SUM_FIELDS = ('occupied_rooms', 'arrivals', 'departures', 'revenue') + STATUS_FIELDS
+
+
+def _empty_row():
+    row = {field: 0 for field in SUM_FIELDS}
+    row['revenue'] = Decimal('0')
+    return row
+
+
+def refresh_daily_stats(start, end, hotel_ids=None):
+    """
+    Recalcula las filas de DailyHotelStats para los días [start, end] (inclusive).
+    Si se indican hotel_ids solo se recalculan esos hoteles; por defecto todos.
+    Retorna la cantidad de filas escritas.
+    """
+    if not start or not end or start > end:
+        return 0
+
+    bookings = Booking.objects.filter(hotel__isnull=False)
+    nights = RoomNight.objects.filter(hotel__isnull=False)
+    existing = DailyHotelStats.objects.filter(date__gte=start, date__lte=end)
+    if hotel_ids is not None:
+        hotel_ids = [h for h in hotel_ids if h]
+        if not hotel_ids:
+            return 0
+        bookings = bookings.filter(hotel_id__in=hotel_ids)
+        nights = nights.filter(hotel_id__in=hotel_ids)
+        existing = existing.filter(hotel_id__in=hotel_ids)
+
+    rows = defaultdict(_empty_row)
+
+    # Reservas por estado, llegadas e ingresos según fecha de check-in
+    by_checkin = (
+        bookings.filter(check_in_date__gte=start, check_in_date__lte=end)
+        .values('hotel_id', 'check_in_date', 'status')
+        .annotate(total=Count('id'), amount=Sum('total_price'))
+    )
+    for item in by_checkin:
+        row = rows[(item['hotel_id'], item['check_in_date'])]
+        if item['status'] in STATUS_FIELDS:
+            row[item['status']] += item['total']
+        if item['status'] in REVENUE_STATUSES:
+            row['arrivals'] += item['total']
+            row['revenue'] += item['amount'] or Decimal('0')
+
+    # Salidas según fecha de check-out
+    by_checkout = (
+        bookings.filter(check_out_date__gte=start, check_out_date__lte=end, status__in=REVENUE_STATUSES)
+        .values('hotel_id', 'check_out_date')
+        .annotate(total=Count('id'))
+    )
+    for item in by_checkout:
+        rows[(item['hotel_id'], item['check_out_date'])]['departures'] += item['total']
+
+    # Ocupación por noche a partir del índice de noches ocupadas
+    occupancy = (
+        nights.filter(date__gte=start, date__lte=end, booking__status='confirmed')
+        .values('hotel_id', 'date')
+        .annotate(total=Count('room_id', distinct=True))
+    )
+    for item in occupancy:
+        rows[(item['hotel_id'], item['date'])]['occupied_rooms'] = item['total']
+
+    # auto_now no se aplica en la rama de update del upsert: updated_at va explícito
+    now = timezone.now()
+    stats = [
+        DailyHotelStats(hotel_id=hotel_id, date=day, updated_at=now, **values)
+        for (hotel_id, day), values in rows.items()
+    ]
+    days_by_hotel = defaultdict(list)
+    for hotel_id, day in rows:
+        days_by_hotel[hotel_id].append(day)
+    with transaction.atomic():
+        # Upsert: dos recálculos concurrentes del mismo día no chocan con la restricción única
+        DailyHotelStats.objects.bulk_create(
+            stats, batch_size=1000, update_conflicts=True,
+            unique_fields=['hotel', 'date'], update_fields=[*SUM_FIELDS, 'updated_at'],
+        )
+        # Días del rango que quedaron sin datos
+        existing.exclude(hotel_id__in=list(days_by_hotel)).delete()
+        for hotel_id, days in days_by_hotel.items():
+            existing.filter(hotel_id=hotel_id).exclude(date__in=days).delete()
+    return len(stats)
+
+
+def _booking_span(hotel_id, check_in, check_out):
+    if not hotel_id or not check_in or not check_out:
+        return None
+    return hotel_id, min(check_in, check_out), max(check_in, check_out)
+
+
+def _refresh_spans(spans):
+    for hotel_id, start, end in spans:
+        try:
+            refresh_daily_stats(start, end, [hotel_id])
+        except Exception:
+            # Las estadísticas se pueden reconstruir (rebuild_daily_stats); la escritura ya está hecha
+            logger.exception('No se pudieron recalcular las estadísticas del hotel %s (%s a %s)', hotel_id, start, end)
+
+
+def _refresh_on_commit(spans):
+    spans = [span for span in spans if span]
+    if spans:
+        transaction.on_commit(lambda: _refresh_spans(spans))
+
+
+def refresh_stats_for_booking(booking, previous=None):
+    """
+    Recalcula, tras el commit, los días afectados por una reserva. `previous`
+    es el estado anterior (dict con hotel_id, check_in_date, check_out_date)
+    para cubrir también las fechas que la reserva dejó de ocupar.
+    """
+    spans = {_booking_span(booking.hotel_id, booking.check_in_date, booking.check_out_date)}
+    if previous:
+        spans.add(_booking_span(previous.get('hotel_id'), previous.get('check_in_date'), previous.get('check_out_date')))
+    _refresh_on_commit(spans)
+
+
+def refresh_stats_for_bookings(booking_ids):
+    """Recalcula, tras el commit, los días afectados por un conjunto de reservas (p. ej. tras un update() masivo)"""
+    spans = (
+        Booking.objects.filter(id__in=list(booking_ids), hotel__isnull=False)
+        .values('hotel_id')
+        .annotate(start=Min('check_in_date'), end=Max('check_out_date'))
+    )
+    _refresh_on_commit([(span['hotel_id'], span['start'], span['end']) for span in spans])
+
+
+def rebuild_daily_stats(start=None, end=None, hotel_ids=None, chunk_days=90):
+    """
+    Reconstruye la tabla para un rango (por defecto todo el rango cubierto por reservas),
+    procesando bloques de `chunk_days` días. Retorna la cantidad de filas escritas.
+    """
+    bookings = Booking.objects.filter(hotel__isnull=False)
+    if hotel_ids is not None:
+        bookings = bookings.filter(hotel_id__in=hotel_ids)
+    if start is None or end is None:
+        bounds = bookings.aggregate(start=Min('check_in_date'), end=Max('check_out_date'))
+        start = start or bounds['start']
+        end = end or bounds['end']
+    if not start or not end:
+        return 0
+    written = 0
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(end, cursor + timedelta(days=chunk_days - 1))
+        written += refresh_daily_stats(cursor, chunk_end, hotel_ids)
+        cursor = chunk_end + timedelta(days=1)
+    return written
+
+
+def stats_queryset(start, end=None, hotel=None):
+    """Filas de estadísticas para [start, end] (end=None: sin límite superior), opcionalmente de un hotel"""
+    qs = DailyHotelStats.objects.filter(date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    if hotel is not None:
+        qs = qs.filter(hotel=hotel)
+    return qs
+
+
+def summarize_stats(start, end=None, hotel=None):
+    """Totales del rango [start, end] (suma de todas las filas diarias)"""
+    agg = stats_queryset(start, end, hotel).aggregate(**{field: Sum(field) for field in SUM_FIELDS})
+    summary = {field: agg[field] or 0 for field in SUM_FIELDS}
+    summary['revenue'] = agg['revenue'] or Decimal('0')
+    summary['total_bookings'] = sum(summary[field] for field in STATUS_FIELDS)
+    return summary
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.rooms.models import Room, RoomImage
+from .cache import ALL_HOTELS, invalidate_hotel
+from .versions import bump_on_commit
+
+
+def _invalidate_on_commit(hotel_id):
+    # Tras el commit: si se invalidara antes, una petición concurrente podría
+    # recachear los datos viejos bajo la versión nueva
+    if hotel_id:
+        transaction.on_commit(lambda: invalidate_hotel(hotel_id))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def invalidate_hotel_cache(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_cache(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.hotel_id)
+    # Candidatos a destacada de la portada general (app/rooms/featured.py)
+    transaction.on_commit(lambda: invalidate_hotel(ALL_HOTELS))
+
+
+@receiver(post_save, sender=RoomImage)
+@receiver(post_delete, sender=RoomImage)
+def invalidate_room_image_cache(sender, instance, **kwargs):
+    hotel_id = Room.objects.filter(pk=instance.room_id).values_list('hotel_id', flat=True).first()
+    _invalidate_on_commit(hotel_id)
+    bump_on_commit(hotel_id)
+
+
+# Versiones de datos para los GET condicionales (app/core/versions.py);
+# las imágenes suben la versión en invalidate_room_image_cache
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_booking_version(sender, instance, **kwargs):
+    previous = getattr(instance, 'previous_state', None) or {}
+    bump_on_commit(instance.hotel_id, previous.get('hotel_id'))
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_hotel_data_version(sender, instance, **kwargs):
+    bump_on_commit(instance.hotel_id)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def bump_hotel_version(sender, instance, **kwargs):
+    bump_on_commit(instance.pk)
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.administration.resolver import HotelResolverMiddleware, aresolve_hotel, hotel_cache
+from app.bookings.availability import asearch_available_rooms, search_available_rooms
+from app.bookings.models import Booking
+from app.bookings.occupancy import aoccupancy_masks, occupancy_masks
+from app.clients.models import Client
+from app.core import cache as portal_cache
+from app.rooms.models import Room
+
+
+class AsyncPortalTestCase(TestCase):
+    """Endpoints públicos de lectura servidos por vistas async (ORM asíncrono)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.rooms = [
+            Room.objects.create(hotel=cls.hotel, number=f'{100 + i}', price=Decimal(100 + i), capacity=2)
+            for i in range(3)
+        ]
+        guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=cls.hotel
+        )
+        cls.check_in = timezone.localdate() + timedelta(days=3)
+        cls.check_out = cls.check_in + timedelta(days=2)
+        Booking.objects.create(
+            hotel=cls.hotel, client=guest, room=cls.rooms[0], status='confirmed', total_price=Decimal('200'),
+            check_in_date=cls.check_in, check_out_date=cls.check_out,
+        )
+        cls.user = get_user_model().objects.create_user('huesped', 'huesped@example.com', 'secret')
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+
+    async def test_async_search_matches_sync(self):
+        hotel = await aresolve_hotel(self.hotel.slug)
+        self.assertEqual(hotel.pk, self.hotel.pk)
+        rows, next_cursor = await asearch_available_rooms(self.check_in, self.check_out, 2, hotel=hotel, limit=1)
+        expected = await asearch_available_rooms(self.check_in, self.check_out, 2, hotel=hotel)
+        self.assertEqual([row['id'] for row in rows], [self.rooms[1].pk])
+        self.assertIsNotNone(next_cursor)
+        self.assertEqual([row['id'] for row in expected[0]], [self.rooms[1].pk, self.rooms[2].pk])
+
+        room_ids = [room.pk for room in self.rooms]
+        masks = await aoccupancy_masks(room_ids, self.check_in, self.check_out)
+        self.assertEqual(masks[self.rooms[0].pk], bytearray(b'\x01\x01\x00'))
+        self.assertEqual(masks[self.rooms[1].pk], bytearray(3))
+
+    def test_sync_and_async_helpers_agree(self):
+        rows, _ = search_available_rooms(self.check_in, self.check_out, 2, hotel=self.hotel)
+        self.assertEqual([row['id'] for row in rows], [self.rooms[1].pk, self.rooms[2].pk])
+        masks = occupancy_masks([self.rooms[0].pk], self.check_in, self.check_out)
+        self.assertEqual(masks[self.rooms[0].pk], bytearray(b'\x01\x01\x00'))
+
+    async def test_available_rooms_api(self):
+        response = await self.async_client.get('/api/habitaciones-disponibles/', {
+            'fecha_inicio': self.check_in, 'fecha_fin': self.check_out, 'personas': 2, 'hotel': self.hotel.slug,
+        })
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual([room['number'] for room in data['rooms']], ['101', '102'])
+
+        response = await self.async_client.get('/api/habitaciones-disponibles/', {
+            'fecha_inicio': self.check_in, 'fecha_fin': self.check_out, 'personas': 2, 'hotel': 'no-existe',
+        })
+        self.assertEqual(response.json()['message'], 'Hotel no encontrado')
+
+    async def test_room_availability(self):
+        url = reverse('room_availability', args=[self.rooms[0].pk])
+        response = await self.async_client.get(url, {'start_date': self.check_in, 'end_date': self.check_out})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['runs'], [
+            [self.check_in.isoformat(), 2, False], [self.check_out.isoformat(), 1, True],
+        ])
+        response = await self.async_client.get(reverse('room_availability', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(reverse('rooms_availability'), {
+            'hotel': self.hotel.slug, 'start_date': self.check_in, 'end_date': self.check_in,
+        })
+        self.assertEqual(response.json()['free_rooms'], [[self.check_in.isoformat(), 1, 2]])
+
+    async def test_portal_rooms_list_uses_async_cache(self):
+        url = reverse('client_rooms_hotel', args=[self.hotel.slug])
+        for _ in range(2):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, '102')
+        stats = portal_cache.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('client_rooms_hotel', args=['no-existe']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_resolver_middleware_supports_both_modes(self):
+        async def async_view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(HotelResolverMiddleware(async_view)))
+        self.assertFalse(iscoroutinefunction(HotelResolverMiddleware(lambda request: HttpResponse())))
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.administration.resolver import hotel_cache
+from app.bookings.models import Booking
+from app.bookings.state import bulk_transition
+from app.clients.models import Client
+from app.core.versions import data_version, versions_shared
+from app.rooms.models import Room
+
+
+# Las versiones solo habilitan 304 con un backend compartido entre procesos
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'o11ce-test-cache'),
+    }
+}
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ConditionalGetTestCase(TestCase):
+    """ETag/Last-Modified por versión de datos del hotel en las APIs que consulta el panel"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.other = Hotel.objects.create(name='Hotel Otro', slug='hotel-otro')
+        cls.room = Room.objects.create(hotel=cls.hotel, number='101', price=Decimal('100'), capacity=2)
+        cls.other_room = Room.objects.create(hotel=cls.other, number='900', price=Decimal('50'), capacity=2)
+        cls.guest = Client.objects.create(
+            first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678', hotel=cls.hotel
+        )
+        cls.user = get_user_model().objects.create_superuser('root', 'root@example.com', 'secret')
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def book(self, room, status='pending'):
+        today = timezone.now().date()
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                hotel=room.hotel, client=self.guest, room=room, status=status, total_price=Decimal('100'),
+                check_in_date=today + timedelta(days=1), check_out_date=today + timedelta(days=2),
+            )
+
+    def test_unchanged_data_returns_304_without_data_queries(self):
+        url = reverse('bookings_api_collection') + f'?hotel={self.hotel.slug}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(2):  # sesión y usuario
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        self.book(self.room)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_versions_are_per_hotel(self):
+        url = reverse('rooms_api_collection') + f'?hotel={self.hotel.pk}'
+        etag = self.client.get(url)['ETag']
+        global_version = data_version()
+
+        self.book(self.other_room)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(data_version(), global_version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.hotel, number='102', price=Decimal('90'), capacity=2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_dashboard_metrics_short_circuit(self):
+        url = reverse('dashboard_metrics_api')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guest.phone = '555-1234'
+            self.guest.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_superadmin_endpoints_and_bulk_writes(self):
+        booking = self.book(self.room)
+        url = '/api/superadmin/kpis'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        # update() no dispara señales: la transición masiva sube la versión por su cuenta
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(Booking.objects.filter(pk=booking.pk), 'confirm')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('bookings_api_collection')
+        etag = self.client.get(url)['ETag']
+        staff = get_user_model().objects.create_user('staff', 'staff@example.com', 'secret', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_process_local_cache_never_answers_304(self):
+        self.assertFalse(versions_shared())
+        for url in (reverse('bookings_api_collection'), '/api/superadmin/kpis'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('ETag', response)
@@ -0,0 +1,59 @@
+import csv
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.rooms.models import Room
+
+
+class StreamingCsvExportTestCase(TestCase):
+    """Tests de las exportaciones CSV en streaming"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.room = Room.objects.create(hotel=cls.hotel, number='101', price=Decimal('100'), capacity=2, description='Vista\nal mar')
+        cls.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        start = date(2030, 1, 1)
+        Booking.objects.bulk_create([
+            Booking(
+                hotel=cls.hotel, client=cls.guest, room=cls.room, status='confirmed', total_price=Decimal('100'),
+                check_in_date=start + timedelta(days=i), check_out_date=start + timedelta(days=i + 2),
+            )
+            for i in range(1200)
+        ])
+        cls.admin = get_user_model().objects.create_superuser(
+            username='root', email='root@example.com', password='testpass123'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_superadmin_export_has_no_row_cap(self):
+        rows = self.read_csv(self.client.get(reverse('superadmin_export_bookings_csv')))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(len(rows), 1201)
+        self.assertEqual(rows[1][1:4], ['Hotel Test', '101', 'Ana Pérez'])
+
+    def test_bookings_export_filters_and_search(self):
+        response = self.client.get(reverse('export_bookings_csv'), {'hotel': self.hotel.slug, 'search': 'Pérez'})
+        rows = self.read_csv(response)
+        self.assertEqual(len(rows), 1201)
+        self.assertEqual(rows[1][6], '2')
+        self.assertEqual(rows[1][8], 'Confirmada')
+
+    def test_rooms_export(self):
+        rows = self.read_csv(self.client.get(reverse('rooms_export_csv')))
+        self.assertEqual(rows[1], ['101', 'Individual', '2', '1', '100.00', 'Libre', 'Sí', 'Vista al mar'])
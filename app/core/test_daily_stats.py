@@ -0,0 +1,169 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core.models import DailyHotelStats
+from app.core.services_stats import rebuild_daily_stats, summarize_stats
+from app.rooms.models import Room
+
+
+class DailyHotelStatsTestCase(TestCase):
+    """Tests de la tabla de estadísticas diarias mantenida desde las reservas"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100.00'), capacity=2)
+        self.other_room = Room.objects.create(hotel=self.hotel, number='102', price=Decimal('50.00'), capacity=2)
+        self.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        self.today = timezone.now().date()
+
+    def day(self, offset):
+        return self.today + timedelta(days=offset)
+
+    def create_booking(self, room, start, nights, status='confirmed'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                hotel=self.hotel, client=self.guest, room=room,
+                check_in_date=self.day(start), check_out_date=self.day(start + nights),
+                status=status, total_price=Decimal('0'),
+            )
+
+    def stats(self, offset):
+        return DailyHotelStats.objects.filter(hotel=self.hotel, date=self.day(offset)).first()
+
+    def test_confirmed_booking_fills_occupancy_arrivals_and_revenue(self):
+        self.create_booking(self.room, 1, 2)
+        arrival = self.stats(1)
+        self.assertEqual((arrival.occupied_rooms, arrival.arrivals, arrival.confirmed), (1, 1, 1))
+        self.assertEqual(arrival.revenue, Decimal('200.00'))
+        self.assertEqual(self.stats(2).occupied_rooms, 1)
+        departure = self.stats(3)
+        self.assertEqual((departure.occupied_rooms, departure.departures), (0, 1))
+
+    def test_status_and_date_changes_are_applied_incrementally(self):
+        booking = self.create_booking(self.room, 1, 2, status='pending')
+        self.assertEqual((self.stats(1).pending, self.stats(1).occupied_rooms), (1, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.confirm_booking()
+        self.assertEqual((self.stats(1).pending, self.stats(1).confirmed, self.stats(1).occupied_rooms), (0, 1, 1))
+
+        booking.check_in_date = self.day(5)
+        booking.check_out_date = self.day(6)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertIsNone(self.stats(1))
+        self.assertEqual(self.stats(5).occupied_rooms, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel_booking('Prueba')
+        self.assertEqual((self.stats(5).cancelled, self.stats(5).occupied_rooms, self.stats(5).revenue), (1, 0, 0))
+
+    def test_upsert_refreshes_updated_at(self):
+        self.create_booking(self.room, 1, 1)
+        stale = timezone.now() - timedelta(days=1)
+        DailyHotelStats.objects.filter(hotel=self.hotel).update(updated_at=stale)
+        self.create_booking(self.other_room, 1, 1)
+        self.assertEqual(self.stats(1).occupied_rooms, 2)
+        self.assertGreater(self.stats(1).updated_at, stale + timedelta(hours=23))
+
+    def test_delete_removes_rows(self):
+        booking = self.create_booking(self.room, 1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertFalse(DailyHotelStats.objects.filter(hotel=self.hotel).exists())
+
+    def test_rebuild_matches_incremental_and_summary_reads_rows(self):
+        self.create_booking(self.room, 0, 3)
+        self.create_booking(self.other_room, 1, 1)
+        self.create_booking(self.other_room, 4, 1, status='pending')
+        incremental = list(DailyHotelStats.objects.order_by('date').values('date', 'occupied_rooms', 'revenue', 'pending'))
+
+        DailyHotelStats.objects.all().delete()
+        rebuild_daily_stats()
+        rebuilt = list(DailyHotelStats.objects.order_by('date').values('date', 'occupied_rooms', 'revenue', 'pending'))
+        self.assertEqual(incremental, rebuilt)
+
+        summary = summarize_stats(self.day(0), self.day(5), self.hotel)
+        self.assertEqual(summary['total_bookings'], 3)
+        self.assertEqual(summary['revenue'], Decimal('350.00'))
+        self.assertEqual(summarize_stats(self.day(1), self.day(1), self.hotel)['occupied_rooms'], 2)
+
+    def test_stats_are_refreshed_after_commit_and_errors_do_not_roll_back(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Booking.objects.create(
+                hotel=self.hotel, client=self.guest, room=self.room, status='confirmed',
+                check_in_date=self.day(1), check_out_date=self.day(2), total_price=Decimal('0'),
+            )
+        self.assertIsNone(self.stats(1))
+
+        with mock.patch('app.core.services_stats.refresh_daily_stats', side_effect=RuntimeError('fallo')):
+            with self.assertLogs('app.core.services_stats', 'ERROR'):
+                for callback in callbacks:
+                    callback()
+        self.assertEqual(Booking.objects.count(), 1)
+
+        # El upsert sobre filas existentes no choca con la restricción única
+        for _ in range(2):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(self.stats(1).arrivals, 1)
+        self.assertEqual(DailyHotelStats.objects.filter(hotel=self.hotel, date=self.day(1)).count(), 1)
+
+
+class PopulateDailyStatsMigrationTestCase(TransactionTestCase):
+    """core.0006 llena la tabla con las reservas y noches existentes al actualizar"""
+
+    before = [('core', '0005_emaillog_queue')]
+    after = [('core', '0006_populate_daily_stats')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_backfill_matches_rebuild(self):
+        apps = self.migrate(self.before)
+        Hotel = apps.get_model('administration', 'Hotel')
+        Room = apps.get_model('rooms', 'Room')
+        Client = apps.get_model('clients', 'Client')
+        Booking = apps.get_model('bookings', 'Booking')
+        RoomNight = apps.get_model('bookings', 'RoomNight')
+        hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        room = Room.objects.create(hotel=hotel, number='101', price=Decimal('100.00'), capacity=2)
+        guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        today = timezone.now().date()
+        # Los modelos históricos no disparan señales: las noches se cargan a mano como en bookings.0004
+        for status, offset, price in [('confirmed', 0, '200.00'), ('completed', -5, '150.00'), ('pending', 3, '80.00')]:
+            check_in = today + timedelta(days=offset)
+            booking = Booking.objects.create(
+                hotel=hotel, client=guest, room=room, status=status, total_price=Decimal(price),
+                check_in_date=check_in, check_out_date=check_in + timedelta(days=2),
+            )
+            if status in ('pending', 'confirmed'):
+                RoomNight.objects.bulk_create([
+                    RoomNight(hotel=hotel, room=room, booking=booking, date=check_in + timedelta(days=i)) for i in range(2)
+                ])
+        self.assertFalse(DailyHotelStats.objects.exists())
+
+        self.migrate(self.after)
+        summary = summarize_stats(today - timedelta(days=30))
+        self.assertEqual(summary['revenue'], Decimal('350.00'))
+        self.assertEqual((summary['confirmed'], summary['completed'], summary['pending']), (1, 1, 1))
+        self.assertEqual(summary['occupied_rooms'], 2)
+        self.assertEqual(summary['departures'], 2)
+
+        fields = ('hotel_id', 'date', 'occupied_rooms', 'arrivals', 'departures', 'revenue', 'pending', 'confirmed')
+        migrated = sorted(DailyHotelStats.objects.values_list(*fields))
+        DailyHotelStats.objects.all().delete()
+        rebuild_daily_stats()
+        self.assertEqual(migrated, sorted(DailyHotelStats.objects.values_list(*fields)))
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app.administration.models import Hotel, HotelStaff
+from app.administration.resolver import hotel_cache
+from app.core.events import EventBus, bus, metric_deltas
+from app.core.versions import bump_data_version
+from app.rooms.models import Room
+
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines())
+    return fields.get('event'), json.loads(fields['data'])
+
+
+class EventBusTestCase(TestCase):
+    """Pub/sub en proceso de los eventos del dashboard"""
+
+    async def test_publish_from_another_thread_wakes_subscriber(self):
+        local_bus = EventBus()
+        subscription = local_bus.subscribe(7)
+        other = local_bus.subscribe(8)
+        self.assertFalse(await subscription.wait(0.01))
+
+        thread = threading.Thread(target=local_bus.publish, args=(7,))
+        thread.start()
+        thread.join()
+        self.assertTrue(await subscription.wait(1))
+        self.assertFalse(await other.wait(0.01))
+
+        # Varios avisos pendientes se atienden con una sola espera
+        local_bus.publish(7)
+        local_bus.publish(7)
+        self.assertTrue(await subscription.wait(1))
+        self.assertFalse(await subscription.wait(0.01))
+
+        subscription.close()
+        other.close()
+        self.assertEqual(local_bus.subscriber_count(), 0)
+
+    def test_metric_deltas(self):
+        self.assertEqual(metric_deltas(None, {'a': 1}), {'a': 1})
+        self.assertEqual(metric_deltas({'a': 1, 'b': 2}, {'a': 1, 'b': 3}), {'b': 3})
+
+
+@override_settings(DASHBOARD_EVENTS_HEARTBEAT=0.05)
+class DashboardEventsTestCase(TestCase):
+    """SSE del dashboard: métricas completas al conectar y luego solo los cambios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.room = Room.objects.create(hotel=cls.hotel, number='101', price=Decimal('100'), capacity=2)
+        cls.user = get_user_model().objects.create_user('recepcion', 'recepcion@example.com', 'secret')
+        HotelStaff.objects.create(user=cls.user, hotel=cls.hotel)
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard_events'), {'hotel': self.hotel.slug})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+
+        event, snapshot = parse_event(await anext(chunks))
+        self.assertEqual(event, 'metrics')
+        self.assertEqual(snapshot['total_rooms'], 1)
+        self.assertEqual(bus.subscriber_count(self.hotel.pk), 1)
+
+        # Sin cambios: solo keep-alive, y la conexión a la base se libera tras cada lectura
+        with mock.patch('app.core.views.close_old_connections', wraps=close_old_connections) as release:
+            self.assertEqual(await anext(chunks), b': ping\n\n')
+        release.assert_called_once_with()
+
+        await Room.objects.acreate(hotel=self.hotel, number='102', price=Decimal('80'), capacity=2)
+        await sync_to_async(bump_data_version)(self.hotel.pk)
+        event, delta = parse_event(await asyncio.wait_for(anext(chunks), 1))
+        self.assertEqual(delta, {'total_rooms': 2, 'available_rooms': 2})
+
+        # Desconexión del cliente: el servidor ASGI cancela la tarea que espera el próximo evento
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(bus.subscriber_count(self.hotel.pk), 0)
+
+    def test_wsgi_requests_fall_back_to_polling(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('dashboard_events')).status_code, 501)
+
+    async def test_requires_hotel_access(self):
+        other = await Hotel.objects.acreate(name='Hotel Otro', slug='hotel-otro')
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard_events'), {'hotel': other.slug})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(bus.subscriber_count(other.pk), 0)
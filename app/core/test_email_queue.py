@@ -0,0 +1,234 @@
+import socketserver
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core.email_queue import claim_batch, process_queue, send_batch
+from app.core.models import EmailLog
+from app.core.services import EmailService
+from app.rooms.models import Room
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo de prueba: acepta todo y guarda los mensajes"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 localhost listo')
+        while True:
+            line = self.rfile.readline().decode(errors='replace').strip()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'DATA':
+                self.reply('354 fin con .')
+                lines = []
+                while (data := self.rfile.readline()) not in (b'.\r\n', b''):
+                    lines.append(data)
+                if server.reject_next:
+                    server.reject_next -= 1
+                    self.reply('554 rechazado')
+                else:
+                    server.messages.append(b''.join(lines))
+                    self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 adiós')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.reject_next = 0
+
+
+class EmailQueueTestCase(TestCase):
+    """Tests de la cola de envío de emails (outbox sobre EmailLog)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.room = Room.objects.create(hotel=cls.hotel, number='101', price=Decimal('100'), capacity=2)
+        cls.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+
+    def create_booking(self):
+        check_in = date.today() + timedelta(days=30)
+        return Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=self.room, status='confirmed',
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=2), guests_count=1,
+        )
+
+    def test_booking_save_enqueues_on_commit_without_smtp(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking = self.create_booking()
+        # Antes del commit no hay registro ni envío
+        self.assertFalse(EmailLog.objects.exists())
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(len(mail.outbox), 0)
+        email_log = EmailLog.objects.get()
+        self.assertEqual((email_log.status, email_log.email_type, email_log.booking_id),
+                         ('pending', 'booking_confirmation', booking.id))
+
+        stats = process_queue(workers=2)
+        self.assertEqual((stats['claimed'], stats['sent'], stats['retried'], stats['failed']), (1, 1, 0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['ana@example.com'])
+        email_log.refresh_from_db()
+        self.assertEqual((email_log.status, email_log.attempts), ('sent', 1))
+        self.assertIsNotNone(email_log.sent_at)
+
+    def test_confirmation_is_not_duplicated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create_booking()
+            EmailService.queue_booking_email('booking_confirmation', booking.id)
+            EmailService.queue_booking_email('booking_cancellation', booking.id)
+        self.assertEqual(
+            sorted(EmailLog.objects.values_list('email_type', flat=True)),
+            ['booking_cancellation', 'booking_confirmation'],
+        )
+
+    def test_explicit_sends_only_enqueue_and_share_the_batch_connection(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create_booking()
+        with mock.patch('django.core.mail.get_connection', wraps=mail.get_connection) as connect, \
+                mock.patch('app.core.email_queue.get_connection', wraps=mail.get_connection) as batch_connect:
+            results = [
+                EmailService.send_booking_confirmation(booking.id),
+                EmailService.send_booking_cancellation(booking.id),
+                EmailService.send_payment_confirmation(booking.id),
+                EmailService.send_welcome_email(self.guest.id),
+                self.client.post('/api/manda_email_cliente/', {'reserva_id': booking.id},
+                                 content_type='application/json').json(),
+                self.client.post('/api/manda_email_bienvenida/', {'client_id': self.guest.id},
+                                 content_type='application/json').json(),
+                self.client.post(f'/api/reservas/{booking.id}/reenviar-email/').json(),
+            ]
+            self.assertTrue(all(result['success'] for result in results))
+            # Nada se envía en la petición: todo queda pendiente para el worker
+            self.assertEqual(len(mail.outbox), 0)
+            connect.assert_not_called()
+            batch_connect.assert_not_called()
+            # La confirmación explícita se registra aunque Booking.save ya la haya encolado
+            self.assertEqual(EmailLog.objects.filter(status='pending').count(), 8)
+
+            stats = process_queue(workers=1)
+        self.assertEqual(stats['sent'], 8)
+        self.assertEqual(batch_connect.call_count, 1)
+        self.assertEqual(len(mail.outbox), 8)
+
+    def test_explicit_sends_report_missing_targets(self):
+        self.assertEqual(EmailService.send_booking_confirmation(999999)['message'], 'Reserva no encontrada')
+        self.assertEqual(EmailService.send_welcome_email(999999)['message'], 'Cliente no encontrado')
+        self.assertFalse(EmailLog.objects.exists())
+
+    def test_failures_are_retried_with_backoff_then_failed(self):
+        email_log = EmailService.enqueue_welcome_email(self.guest.id)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=ConnectionError('smtp caído')):
+            stats = process_queue(max_attempts=2)
+            self.assertEqual(stats['retried'], 1)
+            email_log.refresh_from_db()
+            self.assertEqual((email_log.status, email_log.attempts), ('pending', 1))
+            self.assertGreater(email_log.next_attempt_at, timezone.now() + timedelta(seconds=50))
+            self.assertIn('smtp caído', email_log.error_message)
+
+            # Aún no vence el reintento
+            self.assertEqual(process_queue(max_attempts=2)['claimed'], 0)
+
+            EmailLog.objects.filter(pk=email_log.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(process_queue(max_attempts=2)['failed'], 1)
+        email_log.refresh_from_db()
+        self.assertEqual((email_log.status, email_log.attempts), ('failed', 2))
+
+    def test_claimed_rows_are_not_claimed_twice_until_lease_expires(self):
+        email_log = EmailService.enqueue_welcome_email(self.guest.id)
+        self.assertEqual([e.id for e in claim_batch()], [email_log.id])
+        self.assertEqual(claim_batch(), [])
+
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual([e.id for e in claim_batch(now=later)], [email_log.id])
+
+    def test_command_drains_queue(self):
+        for _ in range(3):
+            EmailService.enqueue_welcome_email(self.guest.id)
+        out = StringIO()
+        call_command('process_email_queue', '--workers', '2', '--batch-size', '2', stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(EmailLog.objects.exclude(status='sent').exists())
+        self.assertIn('3 enviados', out.getvalue())
+
+
+class SMTPBatchSenderTestCase(TestCase):
+    """Tests del envío por lotes contra un servidor SMTP local"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = LocalSMTPServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections = 0
+        self.server.messages = []
+        self.server.reject_next = 0
+        override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_USE_SSL=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.logs = [
+            EmailLog.objects.create(recipient_email=f'huesped{i}@example.com', subject=f'Aviso {i}',
+                                    content=f'<p>Hola {i}</p>', status='pending', email_type='other')
+            for i in range(6)
+        ]
+
+    def test_batch_reuses_one_connection(self):
+        errors, metrics = send_batch(self.logs)
+        self.assertEqual(errors, [None] * 6)
+        self.assertEqual((metrics['sent'], metrics['connections']), (6, 1))
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 6)
+        self.assertIn(b'text/html', self.server.messages[0])
+
+    def test_process_queue_one_connection_per_worker_and_bulk_update(self):
+        self.server.reject_next = 1
+        with self.assertNumQueries(1 + 1 + 6 + 1 + 1):
+            # liberar vencidos, candidatos, 6 reclamos, recarga del lote y un solo bulk_update
+            stats = process_queue(workers=2)
+        self.assertEqual((stats['sent'], stats['retried'], stats['connections']), (5, 1, 2))
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(EmailLog.objects.filter(status='sent').count(), 5)
+        self.assertIn('554', EmailLog.objects.get(status='pending').error_message)
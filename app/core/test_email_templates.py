@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core import email_templates
+from app.core.email_templates import get_email_template, inline_css, render_batch
+from app.core.services import EmailService
+from app.rooms.models import Room
+
+
+class EmailTemplatesTestCase(SimpleTestCase):
+    """Tests de las plantillas de email compiladas y en caché"""
+
+    def setUp(self):
+        email_templates.clear_cache()
+        self.addCleanup(email_templates.clear_cache)
+        self.hotel = Hotel(id=1, name='Hotel <Sol>', slug='sol', email_contact='sol@example.com', template_id='client')
+        self.room = Room(id=1, hotel=self.hotel, number='101', price=Decimal('100'))
+
+    def booking(self, index=1, **extra):
+        client = Client(id=index, first_name=f'Ana{index}', email=f'ana{index}@example.com')
+        return Booking(
+            id=index, hotel=self.hotel, room=self.room, client=client, status='confirmed',
+            check_in_date=date(2030, 1, 1), check_out_date=date(2030, 1, 3), total_price=Decimal('200.00'), **extra
+        )
+
+    def test_inline_css_by_specificity(self):
+        css = '.box { color: red; padding: 1px } div.box.alt { color: blue } p { margin: 0 }'
+        html = inline_css('<div class="box alt" style="padding: 2px"><p>x</p><span class="other">y</span></div>', css)
+        self.assertEqual(
+            html,
+            '<div class="box alt" style="color: red; padding: 1px; color: blue; padding: 2px">'
+            '<p style="margin: 0">x</p><span class="other">y</span></div>'
+        )
+
+    def test_render_inlines_styles_and_escapes_only_html(self):
+        html, text = EmailService.render_booking_email('booking_confirmation', self.booking())
+        self.assertNotIn('<style', html)
+        self.assertIn('class="header" style="background-color: #009485', html)
+        self.assertIn('Hotel &lt;Sol&gt;', html)
+        self.assertIn('¡Gracias por elegir Hotel <Sol>!', text)
+        self.assertIn('- Fecha de Llegada: 01/01/2030', text)
+
+    def test_templates_compiled_once_and_batch_renders_without_queries(self):
+        first = get_email_template('client', 'payment_confirmation', 'html')
+        self.assertIs(get_email_template('client', 'payment_confirmation', 'html'), first)
+
+        bookings = [self.booking(i, payment_status='partial', paid_amount=Decimal('50')) for i in range(1, 4)]
+        rendered = EmailService.render_booking_emails('payment_confirmation', bookings)
+        self.assertEqual(len(rendered), 3)
+        self.assertIn('Hola Ana2,', rendered[1][0])
+        self.assertIn('Saldo Pendiente: $150.00', rendered[2][1])
+        self.assertEqual(get_email_template.cache_info().currsize, 2)
+
+    def test_welcome_text_uses_first_name(self):
+        _, text = EmailService.render_welcome_email(Client(first_name='Luz', email='luz@example.com'))
+        self.assertIn('Hola Luz,', text)
+
+
+class HotelTemplateOverrideTestCase(SimpleTestCase):
+    """Un hotel puede sobreescribir plantillas o estilos por template_id"""
+
+    def setUp(self):
+        email_templates.clear_cache()
+        self.addCleanup(email_templates.clear_cache)
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        (self.tmp / 'emails' / 'lujo').mkdir(parents=True)
+        (self.tmp / 'emails' / 'lujo' / 'styles.css').write_text('.header { background-color: #000; }')
+        (self.tmp / 'emails' / 'lujo' / 'welcome.txt').write_text('Bienvenida de lujo, {{ client.first_name }}')
+        templates = [dict(settings.TEMPLATES[0], DIRS=[self.tmp, *settings.TEMPLATES[0]['DIRS']])]
+        override = override_settings(TEMPLATES=templates)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_override_with_fallback_to_default(self):
+        contexts = [{'client': Client(first_name='Eva'), 'hotel_name': 'Lujo', 'year': 2030}]
+        html, text = render_batch('welcome', contexts, template_id='lujo')[0]
+        self.assertEqual(text, 'Bienvenida de lujo, Eva\n')
+        # HTML de la plantilla por defecto con los estilos del hotel
+        self.assertIn('class="header" style="background-color: #000"', html)
+        self.assertIn('Hola Eva,', html)
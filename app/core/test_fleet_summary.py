@@ -0,0 +1,140 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.rooms.models import Room
+from app.superadmin.services import get_fleet_summary
+
+
+class FleetSummaryTestCase(TestCase):
+    """Tests del resumen por hotel del panel superadmin"""
+
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.hotel_count = 0
+        self.add_hotels(2)
+        self.admin = get_user_model().objects.create_superuser(
+            username='root', email='root@example.com', password='testpass123'
+        )
+
+    def add_hotels(self, count):
+        for _ in range(count):
+            self.hotel_count += 1
+            n = self.hotel_count
+            hotel = Hotel.objects.create(name=f'Hotel {n:02d}', slug=f'hotel-{n}')
+            room = Room.objects.create(hotel=hotel, number='101', price=Decimal('100'), capacity=2)
+            Room.objects.create(hotel=hotel, number='102', price=Decimal('100'), capacity=2)
+            guest = Client.objects.create(first_name='Ana', last_name=str(n), email=f'ana{n}@example.com', dni=f'DNI{n}')
+            with self.captureOnCommitCallbacks(execute=True):
+                Booking.objects.create(
+                    hotel=hotel, client=guest, room=room, status='confirmed', total_price=Decimal('0'),
+                    check_in_date=self.today, check_out_date=self.today + timedelta(days=2),
+                )
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx)
+
+    def test_counters_per_hotel(self):
+        summary = get_fleet_summary()
+        first = summary['hotels'][0]
+        self.assertEqual(first['hotel'].slug, 'hotel-1')
+        self.assertEqual(
+            {k: first[k] for k in ('rooms', 'occupied_rooms', 'arrivals_today', 'confirmed_today', 'bookings_this_week')},
+            {'rooms': 2, 'occupied_rooms': 1, 'arrivals_today': 1, 'confirmed_today': 1, 'bookings_this_week': 1},
+        )
+        self.assertEqual(summary['totals']['rooms'], 4)
+
+    def test_total_bookings_today_counts_every_status(self):
+        # Como antes del resumen agrupado: cualquier estado, incluido el día de salida
+        room = Room.objects.get(hotel__slug='hotel-1', number='102')
+        guest = Client.objects.get(email='ana1@example.com')
+        for status, check_in, check_out in (
+            ('cancelled', self.today, self.today + timedelta(days=1)),
+            ('completed', self.today - timedelta(days=3), self.today),
+        ):
+            Booking.objects.create(
+                hotel=room.hotel, client=guest, room=room, status=status, total_price=Decimal('0'),
+                check_in_date=check_in, check_out_date=check_out,
+            )
+        self.assertEqual(get_fleet_summary()['hotels'][0]['bookings_today'], 3)
+        self.client.force_login(self.admin)
+        context = self.client.get(reverse('superadmin_dashboard')).context
+        self.assertEqual(context['total_reservas_hoy'], 4)
+        self.assertEqual((context['pendientes_hoy'], context['confirmadas_hoy']), (0, 2))
+
+    def test_hotels_api_counts_confirmed_checkouts_today(self):
+        # Como antes del resumen agrupado: confirmadas con check_out >= hoy, no solo las que pernoctan
+        guest = Client.objects.get(email='ana1@example.com')
+        for status, number in (('confirmed', '102'), ('pending', '101')):
+            room = Room.objects.get(hotel__slug='hotel-1', number=number)
+            Booking.objects.create(
+                hotel=room.hotel, client=guest, room=room, status=status, total_price=Decimal('0'),
+                check_in_date=self.today - timedelta(days=2), check_out_date=self.today,
+            )
+        self.client.force_login(self.admin)
+        hotels = {h['slug']: h for h in self.client.get('/api/superadmin/hotels').json()['hotels']}
+        self.assertEqual(hotels['hotel-1']['bookings_today'], 2)
+        self.assertEqual(hotels['hotel-2']['bookings_today'], 1)
+        self.assertEqual(get_fleet_summary()['hotels'][0]['confirmed_today'], 1)
+
+    def test_query_count_is_constant_as_hotels_grow(self):
+        self.client.force_login(self.admin)
+        summary_before = self.count_queries(get_fleet_summary)
+        view_before = self.count_queries(lambda: self.client.get(reverse('superadmin_dashboard')))
+        api_before = self.count_queries(lambda: self.client.get('/api/superadmin/hotels'))
+
+        self.add_hotels(5)
+
+        self.assertEqual(self.count_queries(get_fleet_summary), summary_before)
+        self.assertEqual(self.count_queries(lambda: self.client.get(reverse('superadmin_dashboard'))), view_before)
+        response = self.client.get('/api/superadmin/hotels')
+        self.assertEqual(len(response.json()['hotels']), 7)
+        self.assertEqual(self.count_queries(lambda: self.client.get('/api/superadmin/hotels')), api_before)
+
+    def test_kpis_count_active_bookings_not_rooms(self):
+        # Una reserva que sale hoy sigue activa aunque no ocupe la noche; la pendiente no cuenta
+        guest = Client.objects.get(email='ana1@example.com')
+        stays = (
+            ('hotel-1', 'confirmed', self.today - timedelta(days=2), self.today),
+            ('hotel-2', 'pending', self.today, self.today + timedelta(days=1)),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for slug, status, check_in, check_out in stays:
+                room = Room.objects.get(hotel__slug=slug, number='102')
+                Booking.objects.create(
+                    hotel=room.hotel, client=guest, room=room, status=status, total_price=Decimal('0'),
+                    check_in_date=check_in, check_out_date=check_out,
+                )
+        self.client.force_login(self.admin)
+        kpis = self.client.get('/api/superadmin/kpis').json()
+        self.assertEqual(kpis['active_bookings'], 3)
+        self.assertEqual(kpis['occupancy_rate'], 0.5)
+
+    def test_kpis_revenue_today_counts_only_confirmed(self):
+        # Como antes de leer de DailyHotelStats: las finalizadas no suman al ingreso estimado del día
+        guest = Client.objects.get(email='ana1@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            for slug, status in (('hotel-1', 'confirmed'), ('hotel-2', 'completed')):
+                room = Room.objects.get(hotel__slug=slug, number='102')
+                Booking.objects.create(
+                    hotel=room.hotel, client=guest, room=room, status=status, total_price=Decimal('0'),
+                    check_in_date=self.today, check_out_date=self.today + timedelta(days=1),
+                )
+        arrivals = Booking.objects.filter(check_in_date=self.today)
+        confirmed = sum(b.total_price for b in arrivals if b.status == 'confirmed')
+        completed = sum(b.total_price for b in arrivals if b.status == 'completed')
+        self.assertGreater(completed, 0)
+        self.client.force_login(self.admin)
+        kpis = self.client.get('/api/superadmin/kpis').json()
+        self.assertEqual(Decimal(kpis['estimated_revenue_today']), confirmed)
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core.pagination import encode_cursor
+from app.rooms.models import Room
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Tests de los listados JSON paginados por cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.rooms = [
+            Room.objects.create(hotel=cls.hotel, number=f'{100 + i}', price=Decimal('100'), capacity=2,
+                                status='maintenance' if i == 3 else 'available')
+            for i in range(7)
+        ]
+        cls.guests = [
+            Client.objects.create(first_name=name, last_name='Test', email=f'{name.lower()}{i}@example.com', dni=f'DNI{i}', hotel=cls.hotel)
+            for i, name in enumerate(['Beto', 'Ana', 'Carla', 'Ana'])
+        ]
+        start = date(2030, 1, 1)
+        Booking.objects.bulk_create([
+            Booking(
+                hotel=cls.hotel, client=cls.guests[i % 4], room=cls.rooms[i], total_price=Decimal('100'),
+                check_in_date=start, check_out_date=start + timedelta(days=1),
+                status='cancelled' if i == 0 else 'confirmed',
+            )
+            for i in range(7)
+        ])
+        cls.user = get_user_model().objects.create_user(username='staff', password='testpass123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, url, params, page_size=2):
+        pages = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=page_size)
+            if cursor:
+                query['cursor'] = cursor
+            page = self.client.get(url, query).json()
+            pages.append(page)
+            cursor = page['next']
+            if not cursor:
+                return pages
+
+    def test_rooms_forward_and_back(self):
+        pages = self.walk('/api/rooms/', {'hotel': self.hotel.slug, 'status': 'available'})
+        numbers = [r['number'] for p in pages for r in p['results']]
+        self.assertEqual(numbers, ['100', '101', '102', '104', '105', '106'])
+        self.assertIsNone(pages[0]['prev'])
+
+        previous = self.client.get('/api/rooms/', {'hotel': self.hotel.slug, 'status': 'available',
+                                                   'page_size': 2, 'cursor': pages[2]['prev']}).json()
+        self.assertEqual(previous['results'], pages[1]['results'])
+        self.assertIsNotNone(previous['prev'])
+        self.assertIsNotNone(previous['next'])
+
+    def test_bookings_newest_first_without_duplicates(self):
+        pages = self.walk('/api/bookings/', {'hotel': self.hotel.id, 'status': 'confirmed'}, page_size=4)
+        ids = [b['id'] for p in pages for b in p['results']]
+        expected = list(Booking.objects.filter(status='confirmed').order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(set(pages[0]['results'][0]), {
+            'id', 'client', 'room', 'check_in_date', 'check_out_date', 'duration', 'total_price',
+            'status', 'payment_status', 'guests_count', 'special_requests', 'created_at',
+        })
+
+    def test_clients_ordered_by_name_with_ties(self):
+        pages = self.walk('/api/clients/', {'hotel': self.hotel.slug}, page_size=1)
+        names = [(c['full_name'], c['id']) for p in pages for c in p['results']]
+        self.assertEqual([n for n, _ in names], ['Ana Test', 'Ana Test', 'Beto Test', 'Carla Test'])
+        self.assertLess(names[0][1], names[1][1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/rooms/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_unparseable_values_is_rejected(self):
+        # Cursores bien formados pero con valores que no corresponden al tipo de cada campo
+        for url, values in (
+            ('/api/bookings/', ['no-es-una-fecha', 1]),
+            ('/api/bookings/', ['2030-01-01T00:00:00', 'x']),
+            ('/api/bookings/', [[1], 1]),
+        ):
+            response = self.client.get(url, {'cursor': encode_cursor(values, 'next')})
+            self.assertEqual(response.status_code, 400, values)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from app.administration.models import Hotel
+from app.administration.resolver import hotel_cache
+from app.core.cache import cache_stats, hotel_version
+from app.rooms.models import Room, RoomImage
+
+
+class PortalCacheTestCase(TestCase):
+    """Tests de la caché por hotel de las páginas públicas del portal"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.other = Hotel.objects.create(name='Hotel Otro', slug='hotel-otro')
+        cls.rooms = [
+            Room.objects.create(hotel=cls.hotel, number=f'{100 + i}', price=Decimal(100 + i), capacity=2)
+            for i in range(4)
+        ]
+        Room.objects.create(hotel=cls.other, number='900', price=Decimal('50'), capacity=2)
+        RoomImage.objects.bulk_create([
+            RoomImage(room=cls.rooms[0], image='rooms/a.jpg', order=1),
+            RoomImage(room=cls.rooms[0], image='rooms/principal.jpg', is_main=True, order=2),
+        ])
+
+    def setUp(self):
+        hotel_cache.clear()
+        cache.clear()
+
+    def test_pages_are_served_without_queries_once_warm(self):
+        urls = [
+            reverse('client_index_hotel', args=[self.hotel.slug]),
+            reverse('client_rooms_hotel', args=[self.hotel.slug]),
+            # Los detalles dejan en caché las filas que usan las destacadas de la portada
+            *[reverse('client_room_detail_hotel', args=[self.hotel.slug, room.id]) for room in reversed(self.rooms)],
+        ]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        misses = cache_stats()['misses']
+
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'rooms/principal.jpg')
+        stats = cache_stats()
+        self.assertEqual(stats['misses'], misses)
+        self.assertGreaterEqual(stats['hits'], 3)
+
+    def test_room_changes_invalidate_only_their_hotel(self):
+        url = reverse('client_rooms_hotel', args=[self.hotel.slug])
+        self.client.get(url)
+        other_version = hotel_version(self.other.id)
+
+        room = self.rooms[1]
+        room.status = 'maintenance'
+        with self.captureOnCommitCallbacks(execute=True):
+            room.save()
+
+        self.assertEqual(hotel_version(self.other.id), other_version)
+        response = self.client.get(url)
+        self.assertEqual(response.context['total_rooms'], 3)
+        self.assertNotIn(room, response.context['rooms'])
+
+    def test_filters_are_cached_separately(self):
+        url = reverse('client_rooms_hotel', args=[self.hotel.slug])
+        self.assertEqual(self.client.get(url, {'min_price': '102'}).context['total_rooms'], 2)
+        self.assertEqual(self.client.get(url).context['total_rooms'], 4)
+
+    def test_renamed_hotel_slug_stops_resolving(self):
+        url = reverse('client_index_hotel', args=[self.hotel.slug])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Hotel.objects.filter(pk=self.hotel.pk).update(slug='nuevo-slug')
+            Hotel.objects.get(pk=self.hotel.pk).save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('client_index_hotel', args=['nuevo-slug'])).status_code, 200)
+
+    def test_main_image_uses_prefetch(self):
+        room = Room.objects.prefetch_related('images').get(pk=self.rooms[0].pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(room.main_image.endswith('rooms/principal.jpg'))
+            self.assertEqual(len(room.all_images), 2)
+        self.assertTrue(self.rooms[0].main_image.endswith('rooms/principal.jpg'))
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+from app.administration.models import Hotel
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.core.series import build_series, iter_buckets
+from app.core.views import _series_daily_bookings
+from app.rooms.models import Room
+
+
+class SeriesBuilderTestCase(TestCase):
+    """Tests del constructor de series temporales agrupadas"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal('100'), capacity=2)
+        self.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        self.start = date(2030, 1, 1)  # martes
+        Booking.objects.bulk_create([
+            Booking(
+                hotel=self.hotel, client=self.guest, room=self.room, status=status, total_price=Decimal('100'),
+                check_in_date=self.start + timedelta(days=offset), check_out_date=self.start + timedelta(days=offset + 1),
+            )
+            for offset, status in [(0, 'pending'), (0, 'confirmed'), (3, 'cancelled'), (10, 'confirmed'), (40, 'confirmed')]
+        ])
+
+    def test_buckets(self):
+        self.assertEqual(list(iter_buckets(date(2030, 1, 30), date(2030, 3, 1), 'month')),
+                         [date(2030, 1, 1), date(2030, 2, 1), date(2030, 3, 1)])
+        self.assertEqual(list(iter_buckets(date(2030, 1, 1), date(2030, 1, 8), 'week')),
+                         [date(2029, 12, 31), date(2030, 1, 7)])
+
+    def test_daily_series_is_gap_filled_with_single_query(self):
+        end = self.start + timedelta(days=89)
+        with self.assertNumQueries(1):
+            series = _series_daily_bookings(self.start, end, self.hotel)
+        self.assertEqual(len(series), 90)
+        self.assertEqual(series[0], {'date': '2030-01-01', 'pending': 1, 'confirmed': 1, 'cancelled': 0})
+        self.assertEqual(series[1], {'date': '2030-01-02', 'pending': 0, 'confirmed': 0, 'cancelled': 0})
+        self.assertEqual(series[3]['cancelled'], 1)
+
+    def test_weekly_and_monthly_metrics(self):
+        qs = Booking.objects.filter(status='confirmed')
+        weekly = build_series(qs, 'check_in_date', self.start, self.start + timedelta(days=13), bucket='week',
+                              metrics={'count': Count('id'), 'revenue': Sum('total_price')})
+        self.assertEqual([(row['period'], row['count'], row['revenue']) for row in weekly], [
+            (date(2029, 12, 31), 1, Decimal('100')),
+            (date(2030, 1, 7), 1, Decimal('100')),
+            (date(2030, 1, 14), 0, 0),
+        ])
+        monthly = build_series(Booking.objects.all(), 'check_in_date', self.start, date(2030, 2, 28), bucket='month')
+        self.assertEqual([row['count'] for row in monthly], [4, 1])
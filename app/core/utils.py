@@ -1,5 +1,12 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
 from .models import ActionLog
 
+# Filas por lectura de la base y por bloque enviado al cliente en exportaciones CSV
+CSV_CHUNK_SIZE = 2000
+
 def log_user_action(user, action, description="", request=None, hotel=None):
     """
     Función utilitaria para registrar acciones del usuario
@@ -32,4 +39,39 @@ def log_user_action(user, action, description="", request=None, hotel=None):
         ip_address=ip_address,
         user_agent=user_agent,
         hotel=hotel
-    )
\ No newline at end of file
+    )
+
+class _EchoBuffer:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de acumularla"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv_response(rows, header, filename, chunk_rows=CSV_CHUNK_SIZE):
+    """
+    Devuelve un StreamingHttpResponse que genera el CSV a medida que se consume.
+
+    Args:
+        rows: iterable de filas (listas/tuplas); idealmente un generador sobre
+              queryset.values_list(...).iterator(chunk_size=...) para no cargar la tabla en memoria
+        header: fila de encabezados
+        filename: nombre de archivo sugerido al navegador
+        chunk_rows: filas agrupadas por cada bloque enviado
+    """
+    writer = csv.writer(_EchoBuffer())
+
+    def generate():
+        yield writer.writerow(header)
+        chunk = []
+        for row in rows:
+            chunk.append(writer.writerow(row))
+            if len(chunk) >= chunk_rows:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,158 @@
+"""
+Versión de datos por hotel (tenant) para GET condicionales.
+
+Cada hotel tiene un contador en caché que se incrementa con cada escritura de
+Booking, Room, RoomImage, Client o Hotel (señales de app/core/signals.py) y en
+los caminos que escriben con update()/bulk_create (transiciones masivas,
+importación). Las escrituras también incrementan el ámbito ALL_HOTELS, que
+usan los endpoints que agregan todos los hoteles (superadmin).
+
+Las APIs que el panel consulta periódicamente arman su ETag y Last-Modified
+con estas versiones y responden 304 sin ejecutar ninguna consulta de datos
+(conditional_on_versions para vistas Django, not_modified para ninja).
+
+Cada incremento se publica además en el bus de app/core/events.py para las
+conexiones SSE del dashboard.
+
+Las versiones viven en el backend de la caché del portal (PORTAL_CACHE_ALIAS).
+Con locmem cada proceso solo ve sus propias escrituras y otra instancia podría
+responder 304 con datos viejos, así que los validadores y los 304 solo se
+activan con un backend compartido (redis/file); con locmem las vistas
+responden siempre 200.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from app.administration.resolver import resolve_hotel
+
+from .cache import ALL_HOTELS, _cache
+from .events import bus
+
+KEY_PREFIX = 'data'
+
+# Backends que no comparten sus datos entre procesos
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def _key(hotel_id, name):
+    return f'{KEY_PREFIX}:h{hotel_id}:{name}'
+
+
+def data_version(hotel_id=ALL_HOTELS):
+    """
+    (versión, timestamp de la última escritura) del hotel.
+
+    Si la clave no existe (primer uso o expiró del backend) arranca desde el
+    reloj en milisegundos: una versión reiniciada nunca repite una anterior y
+    un ETag viejo no puede validar datos nuevos.
+    """
+    cache = _cache()
+    keys = [_key(hotel_id, 'version'), _key(hotel_id, 'modified')]
+    values = cache.get_many(keys)
+    version = values.get(keys[0])
+    if version is None:
+        now = time.time()
+        cache.add(keys[0], int(now * 1000), timeout=None)
+        cache.add(keys[1], now, timeout=None)
+        values = cache.get_many(keys)
+        version = values.get(keys[0]) or int(now * 1000)
+    return version, values.get(keys[1]) or time.time()
+
+
+def versions_shared():
+    """True si las versiones se guardan en un backend que ven todos los procesos"""
+    return not isinstance(_cache(), LOCAL_BACKENDS)
+
+
+def bump_data_version(*hotel_ids):
+    """Marca como modificados los hoteles dados (y el ámbito global) y avisa a los dashboards en vivo"""
+    cache = _cache()
+    now = time.time()
+    scopes = {*hotel_ids, ALL_HOTELS} - {None}
+    for hotel_id in scopes:
+        key = _key(hotel_id, 'version')
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(now * 1000), timeout=None)
+        cache.set(_key(hotel_id, 'modified'), now, timeout=None)
+    bus.publish(*scopes)
+
+
+def bump_on_commit(*hotel_ids):
+    # Tras el commit, como la caché del portal: antes, un 304 podría confirmar datos viejos
+    transaction.on_commit(lambda: bump_data_version(*hotel_ids))
+
+
+def version_validators(request, hotel_id=ALL_HOTELS, name=''):
+    """
+    (etag, last_modified) de la respuesta para el usuario, la URL y la versión
+    del hotel. Incluye la fecha: las métricas "de hoy" cambian a medianoche.
+    """
+    version, modified = data_version(hotel_id)
+    user_id = getattr(getattr(request, 'user', None), 'pk', None)
+    raw = f'{name}|{request.get_full_path()}|{user_id}|{hotel_id}:{version}|{timezone.localdate()}'
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest()), int(modified)
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # El navegador puede guardar la respuesta pero siempre revalida
+    response['Cache-Control'] = 'private, no-cache'
+
+
+def not_modified(request, hotel_id=ALL_HOTELS, name='', response=None):
+    """
+    Respuesta 304 si el cliente ya tiene la versión vigente; si no, None.
+    Con `response` (la respuesta temporal de ninja) deja puestos ETag y Last-Modified.
+    Sin backend compartido siempre devuelve None y no pone validadores.
+    """
+    if not versions_shared():
+        return None
+    etag, last_modified = version_validators(request, hotel_id, name)
+    cached = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    for target in (response, cached):
+        if target is not None:
+            _set_validators(target, etag, last_modified)
+    return cached
+
+
+def hotel_param(request):
+    """Id del hotel de ?hotel=<id|slug> (None si no viene o no existe: ámbito global)"""
+    hotel = resolve_hotel(request.GET.get('hotel'))
+    return hotel.pk if hotel is not None else None
+
+
+def conditional_on_versions(hotel_from_request=None):
+    """
+    Decorador para vistas GET: responde 304 antes de ejecutar la vista si los
+    datos del hotel no cambiaron. hotel_from_request(request) devuelve el id
+    del hotel consultado o None para el ámbito global.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not versions_shared():
+                return view(request, *args, **kwargs)
+            hotel_id = hotel_from_request(request) if hotel_from_request else None
+            if hotel_id is None:
+                hotel_id = ALL_HOTELS
+            etag, last_modified = version_validators(request, hotel_id, view.__name__)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
@@ -8,17 +8,26 @@ from django.db.models import Count, Q
 import json
 from django.core.cache import cache
 from app.core.services_ia import call_n8n_ia_analyst, IAServiceError, IAServiceNotConfigured
-from app.superadmin.services import get_dashboard_data
+from app.superadmin.services import get_dashboard_data, get_fleet_summary
 from django.contrib.auth.forms import UserCreationForm
 from app.clients.forms import ClientRegistrationForm
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Q
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Count, Q
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.http import HttpResponseForbidden
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections
 from django.views.decorators.http import require_http_methods
 from datetime import datetime, timedelta
 import locale
-from .utils import log_user_action
+from .utils import CSV_CHUNK_SIZE, log_user_action, stream_csv_response
+from .services_stats import summarize_stats
+from .series import build_series
+from . import cache as portal_cache
+from . import events
+from .versions import conditional_on_versions, data_version
 from app.bookings.views import booking_step1, booking_step2, booking_step3, booking_step4
 
 # Configurar locale para formato de moneda colombiana
@@ -35,10 +44,16 @@ except locale.Error:
 
 # Importar modelos de las apps
 from app.rooms.models import Room
-from app.bookings.models import Booking
+from app.rooms import featured
+from app.bookings import occupancy
+from app.bookings.models import Booking, RoomNight
+from app.bookings.services import BookingService, split_full_name
 from app.clients.models import Client
 from app.administration.models import Hotel
 from app.administration.models import HotelAdmin, HotelStaff
+from app.administration.resolver import (
+    aget_default_hotel, aget_request_hotel, aresolve_hotel, get_default_hotel, get_request_hotel, resolve_hotel,
+)
 try:
     from app.cleaning.models import CleaningTask
 except ImportError:
@@ -125,21 +140,9 @@ def get_dashboard_metrics(hotel=None):
             maintenance=Count('id', filter=Q(status='maintenance'))
         )
         
-        # Calcular habitaciones ocupadas basándose en reservas activas
-        try:
-            from app.bookings.models import Booking as BookingModel
-            today = datetime.now().date()
-            qs_bookings = BookingModel.objects.all()
-            if hotel:
-                qs_bookings = qs_bookings.filter(hotel=hotel)
-            today = datetime.now().date()
-            occupied_rooms = qs_bookings.filter(
-                check_in_date__lte=today,
-                check_out_date__gte=today,
-                status='confirmed'
-            ).values('room').distinct().count()
-        except ImportError:
-            occupied_rooms = RoomModel.objects.filter(status='occupied').count()
+        # Habitaciones ocupadas esta noche según la tabla de estadísticas diarias
+        today = timezone.now().date()
+        occupied_rooms = summarize_stats(today, today, hotel)['occupied_rooms']
         
         metrics.update({
             'total_rooms': room_stats['total'],
@@ -166,21 +169,12 @@ def get_dashboard_metrics(hotel=None):
         qs_bookings = BookingModel.objects.all()
         if hotel:
             qs_bookings = qs_bookings.filter(hotel=hotel)
-        booking_stats = qs_bookings.aggregate(
-            active_bookings=Count('id', filter=Q(
-                check_in_date__lte=today,
-                check_out_date__gte=today,
-                status='confirmed'
-            )),
-            total_revenue=Sum('total_price', filter=Q(
-                check_in_date__gte=start_of_month,
-                status__in=['confirmed', 'completed']
-            ))
-        )
+        # Ingresos de reservas con check-in desde el día 1 del mes (tabla de estadísticas diarias)
+        month_stats = summarize_stats(start_of_month, None, hotel)
         
         metrics.update({
-            'active_bookings': booking_stats['active_bookings'] or 0,
-            'total_revenue': booking_stats['total_revenue'] or 0,
+            'active_bookings': metrics.get('occupied_rooms', 0),
+            'total_revenue': month_stats['revenue'],
             'recent_bookings': qs_bookings.select_related('client', 'room').order_by('-created_at')[:10]
         })
     except ImportError:
@@ -213,30 +207,117 @@ def get_dashboard_metrics(hotel=None):
     return metrics
 
 
+def dashboard_metrics_payload(hotel=None):
+    """Métricas del dashboard serializables a JSON (las que muestran las tarjetas)"""
+    metrics = get_dashboard_metrics(hotel)
+    return {
+        'total_rooms': metrics['total_rooms'],
+        'available_rooms': metrics['available_rooms'],
+        'occupied_rooms': metrics['occupied_rooms'],
+        'cleaning_rooms': metrics['cleaning_rooms'],
+        'maintenance_rooms': metrics['maintenance_rooms'],
+        'total_revenue': float(metrics['total_revenue']),
+        'active_bookings': metrics['active_bookings'],
+        'total_clients': metrics['total_clients'],
+    }
+
+
 @login_required
+@conditional_on_versions()
 def dashboard_metrics_api(request):
     """API endpoint para obtener métricas del dashboard en tiempo real"""
     try:
-        metrics = get_dashboard_metrics()
-        
-        # Formatear datos para JSON
-        response_data = {
-            'total_rooms': metrics['total_rooms'],
-            'available_rooms': metrics['available_rooms'],
-            'occupied_rooms': metrics['occupied_rooms'],
-            'cleaning_rooms': metrics['cleaning_rooms'],
-            'maintenance_rooms': metrics['maintenance_rooms'],
-            'total_revenue': float(metrics['total_revenue']),
-            'active_bookings': metrics['active_bookings'],
-            'total_clients': metrics['total_clients'],
-            'timestamp': datetime.now().isoformat()
-        }
-        
+        response_data = dashboard_metrics_payload()
+        response_data['timestamp'] = datetime.now().isoformat()
         return JsonResponse(response_data)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _live_dashboard_metrics(hotel, version):
+    """
+    Métricas del hotel para la versión de datos dada, calculadas una sola vez
+    por versión y día aunque haya muchos dashboards conectados.
+    """
+    scope = hotel.pk if hotel is not None else portal_cache.ALL_HOTELS
+    key = f'dashboard:h{scope}:v{version}:{timezone.localdate()}'
+    metrics = cache.get(key)
+    if metrics is None:
+        metrics = dashboard_metrics_payload(hotel)
+        cache.set(key, metrics, events.heartbeat_seconds() * 4)
+    return metrics
+
+
+def _dashboard_tick(hotel, scope, version):
+    """
+    (versión vigente, métricas o None si la versión no cambió) para el stream SSE.
+
+    Cierra la conexión a la base al terminar: el stream puede durar horas y
+    entre avisos no debe retener una conexión abierta.
+    """
+    try:
+        current, _ = data_version(scope)
+        if current == version:
+            return current, None
+        return current, _live_dashboard_metrics(hotel, current)
+    finally:
+        close_old_connections()
+
+
+def _can_view_dashboard(user, hotel):
+    """Personal o administradores del hotel; el ámbito global (sin hotel) solo superadmin"""
+    if hotel is None:
+        return is_superadmin(user)
+    return is_hotel_staff(user, hotel) or is_hotel_admin(user, hotel) or is_superadmin(user)
+
+
+@login_required
+async def dashboard_events_view(request):
+    """
+    Server-sent events del dashboard: envía las métricas del hotel activo al
+    conectar y después solo los campos que cambian (evento `metrics`), cuando
+    cambian reservas, habitaciones o clientes del hotel.
+
+    Requiere el servidor ASGI (config/asgi.py): cada conexión ociosa es una
+    corrutina esperando un aviso del bus de app/core/events.py, sin hilo propio.
+    Bajo WSGI responde 501 y el dashboard sigue consultando dashboard_metrics_api.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Los eventos en vivo requieren el servidor ASGI'}, status=501)
+    hotel = await sync_to_async(get_hotel_activo)(request)
+    if not await sync_to_async(_can_view_dashboard)(request.user, hotel):
+        return HttpResponseForbidden()
+    scope = hotel.pk if hotel is not None else portal_cache.ALL_HOTELS
+
+    async def stream():
+        subscription = events.bus.subscribe(scope)
+        previous = None
+        version = None
+        notified = True
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                # Leer la versión también al vencer el heartbeat: cubre escrituras de otros procesos
+                current, metrics = await sync_to_async(_dashboard_tick)(hotel, scope, version)
+                if current != version:
+                    version = current
+                    delta = events.metric_deltas(previous, metrics)
+                    previous = metrics
+                    if delta:
+                        yield events.format_sse(json.dumps(delta), event='metrics', event_id=version)
+                elif not notified:
+                    yield ': ping\n\n'
+                notified = await subscription.wait(events.heartbeat_seconds())
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sin buffer en proxies (nginx) para que cada evento salga al instante
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def dashboard_view(request):
     """Vista del dashboard principal"""
@@ -335,7 +416,7 @@ def bookings_view(request):
         qs = Booking.objects.select_related('client', 'room', 'hotel')
         if hotel_slug:
             try:
-                hotel = Hotel.objects.get(slug=hotel_slug)
+                hotel = get_request_hotel(request, hotel_slug)
                 qs = qs.filter(hotel=hotel)
             except Hotel.DoesNotExist:
                 qs = qs.none()
@@ -403,12 +484,10 @@ def client_index_view(request):
         available_rooms = Room.objects.filter(
             status='available',
             active=True
-        ).order_by('price')[:6]
+        ).with_main_image().order_by('price')[:6]
         
-        # Habitaciones destacadas
-        featured_rooms = Room.objects.filter(
-            active=True
-        ).order_by('?')[:3]  # Aleatorio
+        # Habitaciones destacadas (sorteadas en Python, sin order_by('?'))
+        featured_rooms = featured.featured_rooms(count=3)
     else:
         available_rooms = []
         featured_rooms = []
@@ -420,15 +499,24 @@ def client_index_view(request):
     
     return render(request, 'client/index.html', context)
 
+def _portal_index_data(hotel):
+    """Habitaciones de la portada del hotel (con imágenes precargadas para la caché)"""
+    base = Room.objects.filter(active=True, hotel=hotel).with_main_image()
+    return {
+        'available_rooms': list(base.filter(status='available').order_by('price')[:6]),
+    }
+
+
 def client_index_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse("Hotel no encontrado", status=404)
     if Room:
-        base = Room.objects.filter(active=True, hotel=hotel)
-        available_rooms = base.filter(status='available').order_by('price')[:6]
-        featured_rooms = base.order_by('?')[:3]
+        data = portal_cache.cached_for_hotel(hotel.id, 'index', lambda: _portal_index_data(hotel))
+        available_rooms = data['available_rooms']
+        # Sorteo en cada visita sobre los ids cacheados del hotel
+        featured_rooms = featured.featured_rooms(hotel.id, count=3)
     else:
         available_rooms = []
         featured_rooms = []
@@ -446,7 +534,7 @@ def client_index_hotel_view(request, hotel_slug):
 
 def hotel_reserve_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse("Hotel no encontrado", status=404)
     if request.method == 'POST':
@@ -459,19 +547,18 @@ def hotel_reserve_view(request, hotel_slug):
             check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
         except Exception:
             return HttpResponse("Fechas inválidas", status=400)
-        rooms_qs = Room.objects.filter(hotel=hotel, active=True, status='available')
+        rooms_qs = Room.objects.filter(hotel=hotel, active=True, status='available').with_main_image()
         try:
             g = int(guests or '1')
             rooms_qs = rooms_qs.filter(capacity__gte=g)
         except Exception:
             pass
-        overlapping = Booking.objects.filter(
-            room__in=rooms_qs,
-            status__in=['confirmed', 'pending'],
-            check_in_date__lt=check_out_date,
-            check_out_date__gt=check_in_date
+        overlapping = RoomNight.objects.filter(
+            hotel=hotel,
+            date__gte=check_in_date,
+            date__lt=check_out_date
         ).values_list('room_id', flat=True)
-        available_rooms = rooms_qs.exclude(id__in=list(overlapping))[:30]
+        available_rooms = rooms_qs.exclude(id__in=overlapping)[:30]
         return render(request, 'hotel/reserve_results.html', {
             'hotel': hotel,
             'rooms': available_rooms,
@@ -485,7 +572,7 @@ def hotel_confirm_reservation_view(request, hotel_slug):
     if request.method != 'POST':
         return HttpResponse("Método no permitido", status=405)
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse("Hotel no encontrado", status=404)
     room_id = request.POST.get('room_id')
@@ -502,36 +589,19 @@ def hotel_confirm_reservation_view(request, hotel_slug):
         from datetime import datetime
         check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
         check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
-        room = Room.objects.get(id=room_id, hotel=hotel, active=True)
-        parts = full_name.strip().split(' ', 1)
-        first_name = parts[0]
-        last_name = parts[1] if len(parts) > 1 else ''
-        client, _ = Client.objects.get_or_create(email=email, defaults={
-            'first_name': first_name,
-            'last_name': last_name,
-            'phone': phone or '',
-            'dni': document or ''
-        })
-        client.hotel = hotel
-        client.save()
-        nights = (check_out_date - check_in_date).days
-        total_price = room.price * nights
-        booking = Booking.objects.create(
-            hotel=hotel,
-            client=client,
-            room=room,
-            check_in_date=check_in_date,
-            check_out_date=check_out_date,
+        room = BookingService.get_room(room_id, hotel=hotel)
+        first_name, last_name = split_full_name(full_name)
+        booking, _ = BookingService.reserve(
+            room,
+            check_in_date,
+            check_out_date,
+            guest={'first_name': first_name, 'last_name': last_name, 'email': email, 'phone': phone, 'dni': document},
             guests_count=int(guests),
-            total_price=total_price,
-            status='pending'
+            status='pending',
         )
-        try:
-            from .services import EmailService
-            EmailService.send_booking_confirmation(booking.id)
-        except Exception:
-            pass
         return HttpResponse(f"Reserva creada #{booking.id}")
+    except ValidationError as e:
+        return HttpResponse(e.messages[0], status=400)
     except Exception:
         return HttpResponse("Error al crear reserva", status=400)
 
@@ -559,7 +629,7 @@ def client_rooms_view(request):
         # Obtener hotel activo si se proporcionó
         hotel_activo = get_hotel_activo(request)
         # Obtener todas las habitaciones activas por defecto
-        base = Room.objects.filter(active=True)
+        base = Room.objects.filter(active=True).with_main_image()
         rooms = base.filter(hotel=hotel_activo) if hotel_activo else base
         
         # Aplicar filtros solo si se proporcionan
@@ -633,64 +703,81 @@ def client_rooms_view(request):
     
     return render(request, 'client/rooms.html', context)
 
-def client_rooms_hotel_view(request, hotel_slug):
+def _portal_rooms_queryset(hotel, filters):
+    """Habitaciones activas del hotel con los filtros del portal (sin ejecutar)"""
+    rooms = Room.objects.filter(active=True, hotel=hotel)
+    if filters['type']:
+        rooms = rooms.filter(type=filters['type'])
+    if filters['min_price']:
+        try:
+            min_price_val = float(filters['min_price'])
+            if min_price_val >= 0:
+                rooms = rooms.filter(price__gte=min_price_val)
+        except Exception:
+            pass
+    if filters['max_price']:
+        try:
+            max_price_val = float(filters['max_price'])
+            if max_price_val >= 0:
+                rooms = rooms.filter(price__lte=max_price_val)
+        except Exception:
+            pass
+    if filters['guests']:
+        try:
+            guests_val = int(filters['guests'])
+            if guests_val > 0:
+                rooms = rooms.filter(capacity__gte=guests_val)
+        except Exception:
+            pass
+    if filters['status']:
+        rooms = rooms.filter(status=filters['status'])
+    else:
+        rooms = rooms.filter(status='available')
+    return rooms.with_main_image()
+
+
+def _portal_rooms_summary(rooms):
+    return {
+        'rooms': rooms,
+        'total_rooms': len(rooms),
+        'available_rooms': sum(1 for room in rooms if room.status == 'available'),
+    }
+
+
+def _portal_rooms_data(hotel, filters):
+    """Listado filtrado de habitaciones del hotel y sus contadores"""
+    return _portal_rooms_summary(list(_portal_rooms_queryset(hotel, filters)))
+
+
+async def _aportal_rooms_data(hotel, filters):
+    """Versión asíncrona de _portal_rooms_data"""
+    return _portal_rooms_summary([room async for room in _portal_rooms_queryset(hotel, filters)])
+
+
+async def client_rooms_hotel_view(request, hotel_slug):
+    """
+    Listado público de habitaciones del hotel. Vista async: bajo ASGI las
+    consultas y la caché del portal no ocupan un hilo por petición.
+    """
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = await aget_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse("Hotel no encontrado", status=404)
-    if Room:
-        rooms = Room.objects.filter(active=True, hotel=hotel)
-        room_type = request.GET.get('type', '').strip()
-        min_price = request.GET.get('min_price', '').strip()
-        max_price = request.GET.get('max_price', '').strip()
-        guests = request.GET.get('guests', '').strip()
-        status_filter = request.GET.get('status', '').strip()
-        if room_type:
-            rooms = rooms.filter(type=room_type)
-        if min_price:
-            try:
-                min_price_val = float(min_price)
-                if min_price_val >= 0:
-                    rooms = rooms.filter(price__gte=min_price_val)
-            except Exception:
-                pass
-        if max_price:
-            try:
-                max_price_val = float(max_price)
-                if max_price_val >= 0:
-                    rooms = rooms.filter(price__lte=max_price_val)
-            except Exception:
-                pass
-        if guests:
-            try:
-                guests_val = int(guests)
-                if guests_val > 0:
-                    rooms = rooms.filter(capacity__gte=guests_val)
-            except Exception:
-                pass
-        if status_filter:
-            rooms = rooms.filter(status=status_filter)
-        else:
-            rooms = rooms.filter(status='available')
-        total_rooms = rooms.count()
-        available_rooms = rooms.filter(status='available').count()
-    else:
-        rooms = Room.objects.none()
-        total_rooms = 0
-        available_rooms = 0
-    return render(request, 'client/rooms.html', {
-        'rooms': rooms,
-        'room_types': Room.TYPE_CHOICES if Room else [],
-        'status_choices': Room.STATUS_CHOICES if Room else [],
-        'total_rooms': total_rooms,
-        'available_rooms': available_rooms,
-        'current_filters': {
-            'type': room_type,
-            'min_price': min_price,
-            'max_price': max_price,
-            'guests': guests,
-            'status': status_filter,
-        },
+    filters = {
+        name: request.GET.get(name, '').strip()
+        for name in ('type', 'min_price', 'max_price', 'guests', 'status')
+    }
+    data = await portal_cache.acached_for_hotel(
+        hotel.id, 'rooms', lambda: _aportal_rooms_data(hotel, filters), params=filters
+    )
+    # Renderizar cientos de tarjetas es CPU: en el hilo de la petición, no en el event loop
+    return await sync_to_async(render)(request, 'client/rooms.html', {
+        'rooms': data['rooms'],
+        'room_types': Room.TYPE_CHOICES,
+        'status_choices': Room.STATUS_CHOICES,
+        'total_rooms': data['total_rooms'],
+        'available_rooms': data['available_rooms'],
+        'current_filters': filters,
         'hotel': hotel,
     })
 
@@ -715,14 +802,16 @@ def client_room_detail_view(request, room_id):
 
 def client_room_detail_hotel_view(request, hotel_slug, room_id):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         messages.error(request, 'Hotel no encontrado.')
         return redirect('client_index')
     if Room:
-        try:
-            room = Room.objects.get(id=room_id, hotel=hotel, active=True)
-        except Room.DoesNotExist:
+        room = portal_cache.cached_for_hotel(
+            hotel.id, f'room:{room_id}',
+            lambda: Room.objects.filter(id=room_id, hotel=hotel, active=True).prefetch_related('images').first(),
+        )
+        if room is None:
             messages.error(request, 'Habitación no encontrada.')
             return redirect('client_rooms_hotel', hotel_slug=hotel_slug)
     else:
@@ -738,7 +827,7 @@ def client_booking_view(request, room_id=None):
     
     if room_id:
         try:
-            room = Room.objects.get(id=room_id, active=True)
+            room = Room.objects.select_related('hotel').get(id=room_id, active=True)
             if not room.available_for_booking:
                 messages.error(request, 'Esta habitación no está disponible para reservas.')
                 return redirect('client_rooms')
@@ -762,7 +851,7 @@ def client_booking_view(request, room_id=None):
             try:
                 # Obtener la habitación si no está definida
                 if not room:
-                    room = Room.objects.get(id=room_id_post, active=True)
+                    room = BookingService.get_room(room_id_post)
                 
                 # Validar capacidad
                 if int(guests_count) > room.capacity:
@@ -794,78 +883,25 @@ def client_booking_view(request, room_id=None):
                         'available_rooms': Room.objects.filter(active=True, status='available'),
                     })
                 
-                # Validar disponibilidad de la habitación en las fechas seleccionadas
-                overlapping_bookings = Booking.objects.filter(
-                    room=room,
-                    status__in=['confirmed', 'pending'],
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
-                )
-                
-                if overlapping_bookings.exists():
-                    messages.error(request, 'La habitación no está disponible en las fechas seleccionadas. Por favor elige otras fechas.')
-                    return render(request, 'client/booking.html', {
-                        'room': room,
-                        'available_rooms': Room.objects.filter(active=True, status='available'),
-                    })
-                
-                # Obtener o crear el cliente
-                if hasattr(request.user, 'client'):
-                    client = request.user.client
-                    # Actualizar información de contacto si se proporciona
-                    if phone:
-                        client.phone = phone
-                    if email:
-                        client.email = email
-                    client.save()
-                else:
-                    # Crear perfil de cliente si no existe
-                    import random
-                    client_email = email or request.user.email
-                    if not client_email or Client.objects.filter(email=client_email).exists():
-                        client_email = f'{request.user.username}_{random.randint(1000, 9999)}@hotel.com'
-                    
-                    client = Client.objects.create(
-                        user=request.user,
-                        first_name=request.user.first_name or request.user.username,
-                        last_name=request.user.last_name or 'Usuario',
-                        email=client_email,
-                        dni=f'{random.randint(10000000, 99999999)}',
-                        phone=phone or f'+54911{random.randint(1000000, 9999999)}'
-                    )
-                
-                # Calcular precio total
-                nights = (check_out_date - check_in_date).days
-                total_price = room.price * nights
-                
-                # Crear la reserva
-                booking = Booking.objects.create(
-                    hotel=room.hotel,
-                    client=client,
-                    room=room,
-                    check_in_date=check_in_date,
-                    check_out_date=check_out_date,
+                # Disponibilidad, cliente, precio y email de confirmación
+                booking, _ = BookingService.reserve(
+                    room,
+                    check_in_date,
+                    check_out_date,
+                    guest={'email': email, 'phone': phone},
+                    user=request.user,
                     guests_count=int(guests_count),
                     special_requests=special_requests,
-                    total_price=total_price,
-                    status='confirmed'
                 )
-                
-                # Enviar email de confirmación
-                try:
-                    from .services import EmailService
-                    email_result = EmailService.send_booking_confirmation(booking.id)
-                    if email_result.get('success'):
-                        messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! Se ha enviado una confirmación a tu email.')
-                    else:
-                        messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! (El email de confirmación no pudo ser enviado)')
-                except Exception as email_error:
-                    messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! (Error al enviar email: {str(email_error)})')
+                messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! Te enviaremos una confirmación a tu email.')
                 
                 return redirect('client_booking_confirmation', booking_id=booking.id)
                     
             except ValidationError as e:
-                messages.error(request, f'Error de validación: {str(e)}')
+                if e.code == 'room_unavailable':
+                    messages.error(request, 'La habitación no está disponible en las fechas seleccionadas. Por favor elige otras fechas.')
+                else:
+                    messages.error(request, e.messages[0])
             except Exception as e:
                 messages.error(request, f'Error al crear la reserva: {str(e)}')
         else:
@@ -890,12 +926,12 @@ def client_booking_hotel_view(request, hotel_slug, room_id=None):
         messages.warning(request, 'Debes iniciar sesión para hacer una reserva.')
         return redirect('client_login_hotel', hotel_slug=hotel_slug)
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if room_id:
         try:
-            room = Room.objects.get(id=room_id, hotel=hotel, active=True)
+            room = Room.objects.select_related('hotel').get(id=room_id, hotel=hotel, active=True)
             if not room.available_for_booking:
                 messages.error(request, 'Esta habitación no está disponible para reservas.')
                 return redirect('client_rooms_hotel', hotel_slug=hotel_slug)
@@ -915,7 +951,7 @@ def client_booking_hotel_view(request, hotel_slug, room_id=None):
         if room_id_post and check_in and check_out and guests_count:
             try:
                 if not room:
-                    room = Room.objects.get(id=room_id_post, hotel=hotel, active=True)
+                    room = BookingService.get_room(room_id_post, hotel=hotel)
                 if int(guests_count) > room.capacity:
                     messages.error(request, f'La habitación solo tiene capacidad para {room.capacity} personas.')
                     return render(request, 'client/booking.html', {
@@ -941,52 +977,25 @@ def client_booking_hotel_view(request, hotel_slug, room_id=None):
                         'available_rooms': Room.objects.filter(active=True, status='available', hotel=hotel),
                         'hotel': hotel,
                     })
-                if Booking and Client:
-                    if hasattr(hotel, 'can_accept_new_bookings') and not hotel.can_accept_new_bookings:
-                        messages.error(request, "Este hotel no está aceptando reservas en este momento. Por favor, contacta directamente al establecimiento.")
-                        return redirect('client_index_hotel', hotel_slug=hotel.slug)
-                    try:
-                        client = Client.objects.get(user=request.user)
-                    except Client.DoesNotExist:
-                        import random
-                        client_email = email or request.user.email
-                        if not client_email or Client.objects.filter(email=client_email).exists():
-                            client_email = f'{request.user.username}_{random.randint(1000, 9999)}@hotel.com'
-                        client = Client.objects.create(
-                            user=request.user,
-                            first_name=request.user.first_name or request.user.username,
-                            last_name=request.user.last_name or 'Usuario',
-                            email=client_email,
-                            dni=f'{random.randint(10000000, 99999999)}',
-                            phone=phone or f'+54911{random.randint(1000000, 9999999)}'
-                        )
-                    nights = (check_out_date - check_in_date).days
-                    total_price = room.price * nights
-                    booking = Booking.objects.create(
-                        hotel=hotel,
-                        client=client,
-                        room=room,
-                        check_in_date=check_in_date,
-                        check_out_date=check_out_date,
-                        guests_count=int(guests_count),
-                        special_requests=special_requests,
-                        total_price=total_price,
-                        status='confirmed'
-                    )
-                    try:
-                        from .services import EmailService
-                        email_result = EmailService.send_booking_confirmation(booking.id)
-                        if email_result.get('success'):
-                            messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! Se ha enviado una confirmación a tu email.')
-                        else:
-                            messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! (El email de confirmación no pudo ser enviado)')
-                    except Exception:
-                        messages.success(request, f'¡Reserva #{booking.id} creada exitosamente!')
-                    return redirect('client_booking_confirmation', booking_id=booking.id)
-                else:
-                    messages.error(request, 'Sistema de reservas no disponible.')
+                if not hotel.can_accept_new_bookings:
+                    messages.error(request, "Este hotel no está aceptando reservas en este momento. Por favor, contacta directamente al establecimiento.")
+                    return redirect('client_index_hotel', hotel_slug=hotel.slug)
+                booking, _ = BookingService.reserve(
+                    room,
+                    check_in_date,
+                    check_out_date,
+                    guest={'email': email, 'phone': phone},
+                    user=request.user,
+                    guests_count=int(guests_count),
+                    special_requests=special_requests,
+                )
+                messages.success(request, f'¡Reserva #{booking.id} creada exitosamente! Te enviaremos una confirmación a tu email.')
+                return redirect('client_booking_confirmation', booking_id=booking.id)
             except ValidationError as e:
-                messages.error(request, f'Error de validación: {str(e)}')
+                if e.code == 'room_unavailable':
+                    messages.error(request, 'La habitación no está disponible en las fechas seleccionadas. Por favor elige otras fechas.')
+                else:
+                    messages.error(request, e.messages[0])
             except Exception as e:
                 messages.error(request, f'Error al crear la reserva: {str(e)}')
         else:
@@ -1027,80 +1036,87 @@ def booking_step4_hotel_view(request, hotel_slug):
     request.GET = q
     return booking_step4(request)
 
-def get_room_availability(request, room_id):
-    """API para obtener disponibilidad de una habitación por fechas"""
-    if not Room:
-        return JsonResponse({'error': 'Sistema de habitaciones no disponible'}, status=500)
-    
-    try:
-        room = Room.objects.get(id=room_id, active=True)
-    except Room.DoesNotExist:
-        return JsonResponse({'error': 'Habitación no encontrada'}, status=404)
-    
-    # Obtener parámetros de fecha (próximos 60 días por defecto)
-    from datetime import date, timedelta
-    import json
-    
+def _calendar_range(request):
+    """Rango [start_date, end_date] del calendario (próximos 60 días por defecto)"""
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
-    
     if start_date and end_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return JsonResponse({'error': 'Formato de fecha inválido'}, status=400)
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
     else:
-        start_date = date.today()
+        start_date = timezone.localdate()
         end_date = start_date + timedelta(days=60)
+    occupancy.calendar_days(start_date, end_date)
+    return start_date, end_date
+
+
+async def get_room_availability(request, room_id):
+    """
+    API para obtener disponibilidad de una habitación por fechas.
+
+    La disponibilidad llega en tramos: runs = [[fecha, días, disponible], ...].
+    Con format=days devuelve además el formato anterior día por día.
+    """
+    try:
+        room = await Room.objects.aget(id=room_id, active=True)
+    except Room.DoesNotExist:
+        return JsonResponse({'error': 'Habitación no encontrada'}, status=404)
     
-    # Obtener reservas que afectan este período
-    if Booking:
-        bookings = Booking.objects.filter(
-            room=room,
-            status__in=['confirmed', 'pending'],
-            check_in_date__lte=end_date,
-            check_out_date__gt=start_date
-        ).values('check_in_date', 'check_out_date', 'status')
-    else:
-        bookings = []
-    
-    # Crear diccionario de disponibilidad
-    availability = {}
-    current_date = start_date
-    
-    while current_date <= end_date:
-        availability[current_date.isoformat()] = {
-            'available': True,
-            'status': 'available',
-            'price': float(room.price)
-        }
-        current_date += timedelta(days=1)
-    
-    # Marcar días ocupados
-    for booking in bookings:
-        booking_start = booking['check_in_date']
-        booking_end = booking['check_out_date']
-        
-        current_date = max(booking_start, start_date)
-        end_booking = min(booking_end, end_date + timedelta(days=1))
-        
-        while current_date < end_booking:
-            if current_date.isoformat() in availability:
-                availability[current_date.isoformat()] = {
-                    'available': False,
-                    'status': 'occupied',
-                    'price': float(room.price)
-                }
-            current_date += timedelta(days=1)
-    
-    return JsonResponse({
+    try:
+        start_date, end_date = _calendar_range(request)
+    except ValueError:
+        return JsonResponse({'error': 'Formato de fecha inválido'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+
+    calendar = await occupancy.aroom_calendar(room, start_date, end_date)
+    data = {
         'room_id': room.id,
         'room_number': room.number,
         'room_type': room.get_type_display(),
-        'availability': availability,
+        'price': float(room.price),
+        'runs': calendar['runs'],
         'start_date': start_date.isoformat(),
         'end_date': end_date.isoformat()
+    }
+    if request.GET.get('format') == 'days':
+        price = float(room.price)
+        data['availability'] = {
+            day: {'available': available, 'status': 'available' if available else 'occupied', 'price': price}
+            for day, available in occupancy.expand_runs(calendar['runs']).items()
+        }
+    return JsonResponse(data)
+
+
+async def get_rooms_availability(request):
+    """
+    Disponibilidad de varias habitaciones del hotel en una sola llamada.
+
+    Parámetros: hotel, rooms (ids separados por coma; por defecto todas las activas),
+    start_date y end_date. Retorna los tramos de cada habitación y la cantidad de
+    habitaciones libres por día (free_rooms).
+    """
+    hotel = await aget_hotel_activo(request)
+    if hotel is None:
+        return JsonResponse({'error': 'Hotel no encontrado'}, status=404)
+    try:
+        start_date, end_date = _calendar_range(request)
+        room_ids = [int(value) for value in request.GET.get('rooms', '').split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos'}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+
+    rooms = Room.objects.filter(hotel=hotel, active=True).only('id')
+    if room_ids:
+        rooms = rooms.filter(id__in=room_ids)
+    calendar = await occupancy.arooms_calendar([room async for room in rooms], start_date, end_date)
+    return JsonResponse({
+        'hotel_id': hotel.id,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'rooms': calendar['rooms'],
+        'free_rooms': calendar['free_rooms'],
     })
 
 def client_booking_confirmation_view(request, booking_id):
@@ -1175,7 +1191,7 @@ def client_my_bookings_hotel_view(request, hotel_slug):
         messages.warning(request, 'Debes iniciar sesión para ver tus reservas.')
         return redirect('client_login_hotel', hotel_slug=hotel_slug)
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if Booking and Client:
@@ -1219,7 +1235,7 @@ def client_booking_detail_hotel_view(request, hotel_slug, booking_id):
         messages.warning(request, 'Debes iniciar sesión para ver esta reserva.')
         return redirect('client_login_hotel', hotel_slug=hotel_slug)
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if Booking:
@@ -1262,7 +1278,7 @@ def client_cancel_booking_hotel_view(request, hotel_slug, booking_id):
         return redirect('client_login_hotel', hotel_slug=hotel_slug)
     if request.method == 'POST' and Booking:
         try:
-            hotel = Hotel.objects.get(slug=hotel_slug)
+            hotel = get_request_hotel(request, hotel_slug)
             booking = Booking.objects.get(id=booking_id, client__user=request.user, hotel=hotel, status__in=['pending', 'confirmed'])
             booking.cancel_booking()
             messages.success(request, 'Reserva cancelada exitosamente.')
@@ -1305,7 +1321,7 @@ def client_profile_hotel_view(request, hotel_slug):
         messages.warning(request, 'Debes iniciar sesión para ver tu perfil.')
         return redirect('client_login_hotel', hotel_slug=hotel_slug)
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if request.method == 'POST':
@@ -1356,7 +1372,7 @@ def client_login_view(request):
 
 def client_login_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if request.user.is_authenticated:
@@ -1415,7 +1431,7 @@ def client_register_view(request):
 
 def client_register_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if request.user.is_authenticated:
@@ -1522,13 +1538,9 @@ def client_simulate_payment_view(request, booking_id):
 
             booking.save()
 
-        # Enviar email de confirmación/recibo de pago
-        try:
-            from .services import EmailService
-            EmailService.send_payment_confirmation(booking.id)
-        except Exception:
-            import logging
-            logging.getLogger(__name__).warning(f"Fallo el envío de email de pago para reserva {booking.id}")
+        # Encolar email de confirmación/recibo de pago
+        from .services import EmailService
+        EmailService.queue_booking_email('payment_confirmation', booking.id)
 
         messages.success(request, 'Pago simulado procesado correctamente.')
         return redirect('client_booking_detail', booking_id=booking_id)
@@ -1638,30 +1650,21 @@ def is_hotel_staff(user, hotel):
 def superadmin_dashboard_view(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    from django.utils import timezone
-    today = timezone.now().date()
-    hotels = Hotel.objects.all().order_by('name')
-    total_rooms = 0
-    occupied_rooms = 0
-    total_reservas_hoy = 0
-    pendientes_hoy = 0
-    confirmadas_hoy = 0
-    from app.rooms.models import Room
-    from app.bookings.models import Booking
-    for h in hotels:
-        total_rooms += Room.objects.filter(hotel=h).count()
-        ocupadas = Booking.objects.filter(hotel=h, status='confirmed', check_in_date__lte=today, check_out_date__gte=today).values('room').distinct().count()
-        occupied_rooms += ocupadas
-        reservas_hoy = Booking.objects.filter(hotel=h, check_in_date__lte=today, check_out_date__gte=today).count()
-        total_reservas_hoy += reservas_hoy
-        pendientes_hoy += Booking.objects.filter(hotel=h, status='pending', check_in_date__lte=today, check_out_date__gte=today).count()
-        confirmadas_hoy += Booking.objects.filter(hotel=h, status='confirmed', check_in_date__lte=today, check_out_date__gte=today).count()
+    summary = get_fleet_summary()
+    totals = summary['totals']
+    hotels = [item['hotel'] for item in summary['hotels']]
+    total_rooms = totals['rooms']
+    occupied_rooms = totals['occupied_rooms']
+    pendientes_hoy = totals['pending_today']
+    confirmadas_hoy = totals['confirmed_today']
+    total_reservas_hoy = totals['bookings_today']
     ocupacion = 0
     if total_rooms > 0:
         from decimal import Decimal
         ocupacion = round((Decimal(occupied_rooms) / Decimal(total_rooms)) * Decimal('100'), 2)
     context = {
         'hotels': hotels,
+        'fleet': summary['hotels'],
         'total_rooms': total_rooms,
         'occupied_rooms': occupied_rooms,
         'total_reservas_hoy': total_reservas_hoy,
@@ -1687,44 +1690,28 @@ def _kpis_for_hotel(hotel):
     today = timezone.now().date()
     from app.rooms.models import Room
     total_rooms = Room.objects.filter(hotel=hotel).count()
-    occupied_rooms = Booking.objects.filter(hotel=hotel, status='confirmed', check_in_date__lte=today, check_out_date__gt=today).values('room_id').distinct().count()
-    occupancy_today = None if total_rooms == 0 else round(occupied_rooms / total_rooms, 4)
-    bookings_checkin_today_total = Booking.objects.filter(hotel=hotel, check_in_date=today).count()
-    return occupancy_today, bookings_checkin_today_total
+    stats = summarize_stats(today, today, hotel)
+    occupancy_today = None if total_rooms == 0 else round(stats['occupied_rooms'] / total_rooms, 4)
+    return occupancy_today, stats['total_bookings']
 def _kpis_for_global():
     today = timezone.now().date()
     from app.rooms.models import Room
     total_rooms = Room.objects.count()
-    occupied_rooms = Booking.objects.filter(status='confirmed', check_in_date__lte=today, check_out_date__gt=today).values('room_id').distinct().count()
-    occupancy_today = None if total_rooms == 0 else round(occupied_rooms / total_rooms, 4)
-    bookings_checkin_today_total = Booking.objects.filter(check_in_date=today).count()
-    return occupancy_today, bookings_checkin_today_total
+    stats = summarize_stats(today, today)
+    occupancy_today = None if total_rooms == 0 else round(stats['occupied_rooms'] / total_rooms, 4)
+    return occupancy_today, stats['total_bookings']
 def _series_daily_bookings(from_date, to_date, hotel=None):
-    base = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date)
+    base = Booking.objects.all()
     if hotel:
         base = base.filter(hotel=hotel)
-    arr = []
-    cur = from_date
-    while cur <= to_date:
-        day = base.filter(check_in_date=cur)
-        arr.append({
-            'date': cur.strftime('%Y-%m-%d'),
-            'pending': day.filter(status='pending').count(),
-            'confirmed': day.filter(status='confirmed').count(),
-            'cancelled': day.filter(status='cancelled').count(),
-        })
-        cur += timezone.timedelta(days=1)
-    return arr
-def _distribution_status(from_date, to_date, hotel=None):
-    qs = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date)
-    if hotel:
-        qs = qs.filter(hotel=hotel)
-    agg = qs.aggregate(
-        pending=Count('id', filter=Q(status='pending')),
-        confirmed=Count('id', filter=Q(status='confirmed')),
-        cancelled=Count('id', filter=Q(status='cancelled')),
+    series = build_series(
+        base, 'check_in_date', from_date, to_date, bucket='day',
+        group_field='status', groups=('pending', 'confirmed', 'cancelled'),
     )
-    return {'pending': agg.get('pending') or 0, 'confirmed': agg.get('confirmed') or 0, 'cancelled': agg.get('cancelled') or 0}
+    return [{'date': row.pop('period').strftime('%Y-%m-%d'), **row} for row in series]
+def _distribution_status(from_date, to_date, hotel=None):
+    stats = summarize_stats(from_date, to_date, hotel)
+    return {'pending': stats['pending'], 'confirmed': stats['confirmed'], 'cancelled': stats['cancelled']}
 @login_required
 def superadmin_api_dashboard_hotel(request, hotel_id):
     if not is_superadmin(request.user):
@@ -1737,7 +1724,7 @@ def superadmin_api_dashboard_hotel(request, hotel_id):
     except Hotel.DoesNotExist:
         return JsonResponse({'error': 'hotel_not_found'}, status=404)
     occupancy_today, bookings_today = _kpis_for_hotel(hotel)
-    reservations_period_count = Booking.objects.filter(hotel=hotel, check_in_date__gte=from_date, check_in_date__lte=to_date).count()
+    reservations_period_count = summarize_stats(from_date, to_date, hotel)['total_bookings']
     series = _series_daily_bookings(from_date, to_date, hotel)
     dist = _distribution_status(from_date, to_date, hotel)
     resp = {
@@ -1769,7 +1756,7 @@ def superadmin_api_dashboard_global(request):
     if from_date is None:
         return JsonResponse({'error': 'invalid_params'}, status=400)
     occupancy_today, bookings_today = _kpis_for_global()
-    reservations_period_count = Booking.objects.filter(check_in_date__gte=from_date, check_in_date__lte=to_date).count()
+    reservations_period_count = summarize_stats(from_date, to_date)['total_bookings']
     series = _series_daily_bookings(from_date, to_date, None)
     dist = _distribution_status(from_date, to_date, None)
     resp = {
@@ -2154,13 +2141,7 @@ def superadmin_users_list_view(request):
     hotels = Hotel.objects.all().order_by('name')
     hotel_selected = None
     if hotel_param:
-        try:
-            hotel_selected = Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                hotel_selected = Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                hotel_selected = None
+        hotel_selected = resolve_hotel(hotel_param)
     qs_users = get_user_model().objects.exclude(client__isnull=False)
     if search:
         qs_users = qs_users.filter(Q(username__icontains=search) | Q(first_name__icontains=search) | Q(last_name__icontains=search))
@@ -2173,13 +2154,7 @@ def superadmin_users_list_view(request):
             u = get_user_model().objects.get(id=user_id)
             hotel = None
             if hotel_param:
-                try:
-                    hotel = Hotel.objects.get(id=int(hotel_param))
-                except Exception:
-                    try:
-                        hotel = Hotel.objects.get(slug=str(hotel_param))
-                    except Hotel.DoesNotExist:
-                        hotel = None
+                hotel = resolve_hotel(hotel_param)
             if role == 'hotel_admin':
                 if hotel:
                     HotelAdmin.objects.update_or_create(hotel=hotel, defaults={'user': u})
@@ -2261,13 +2236,10 @@ def superadmin_users_list_view(request):
 def superadmin_export_bookings_csv(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    from app.bookings.models import Booking
-    import csv
-    from io import StringIO
     hotel_id = request.GET.get('hotel')
     desde = request.GET.get('desde')
     hasta = request.GET.get('hasta')
-    qs = Booking.objects.select_related('client', 'room', 'hotel')
+    qs = Booking.objects.all()
     if hotel_id:
         try:
             h = Hotel.objects.get(id=hotel_id)
@@ -2282,33 +2254,53 @@ def superadmin_export_bookings_csv(request):
             qs = qs.filter(check_in_date__gte=d1, check_out_date__lte=d2)
         except Exception:
             qs = qs.none()
-    buffer = StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(['id', 'hotel', 'habitacion', 'cliente', 'check_in', 'check_out', 'estado', 'total_price'])
-    for b in qs.order_by('-created_at')[:1000]:
-        writer.writerow([b.id, getattr(b.hotel, 'name', ''), getattr(b.room, 'number', ''), getattr(b.client, 'full_name', ''), b.check_in_date, b.check_out_date, b.status, b.total_price])
-    resp = HttpResponse(buffer.getvalue(), content_type='text/csv')
-    resp['Content-Disposition'] = 'attachment; filename="reservas.csv"'
-    return resp
+    values = qs.order_by('-created_at').values_list(
+        'id', 'hotel__name', 'room__number', 'client__first_name', 'client__last_name',
+        'check_in_date', 'check_out_date', 'status', 'total_price',
+    )
+
+    def rows():
+        for booking_id, hotel_name, room_number, first_name, last_name, check_in, check_out, status, total in values.iterator(chunk_size=CSV_CHUNK_SIZE):
+            yield [booking_id, hotel_name or '', room_number or '', f"{first_name} {last_name}", check_in, check_out, status, total]
+
+    return stream_csv_response(
+        rows(),
+        ['id', 'hotel', 'habitacion', 'cliente', 'check_in', 'check_out', 'estado', 'total_price'],
+        'reservas.csv',
+    )
 def get_hotel_activo(request):
     hotel_param = request.GET.get('hotel') or request.POST.get('hotel')
     if hotel_param:
-        try:
-            return Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                return Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                pass
+        hotel = resolve_hotel(hotel_param)
+        if hotel is not None:
+            return hotel
+    if getattr(request, 'hotel', None) is not None:
+        return request.hotel
+    try:
+        return get_default_hotel()
+    except Exception:
+        return None
+
+
+async def aget_hotel_activo(request):
+    """Versión asíncrona de get_hotel_activo (solo GET)"""
+    hotel_param = request.GET.get('hotel')
+    if hotel_param:
+        hotel = await aresolve_hotel(hotel_param)
+        if hotel is not None:
+            return hotel
+    if getattr(request, 'hotel', None) is not None:
+        return request.hotel
     try:
-        return Hotel.objects.order_by('id').first()
+        return await aget_default_hotel()
     except Exception:
         return None
+
 # Wrappers slug-based para panel
 @login_required
 def panel_dashboard_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2321,7 +2313,7 @@ def panel_dashboard_hotel_view(request, hotel_slug):
 @login_required
 def panel_rooms_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2334,7 +2326,7 @@ def panel_rooms_hotel_view(request, hotel_slug):
 @login_required
 def panel_bookings_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2347,7 +2339,7 @@ def panel_bookings_hotel_view(request, hotel_slug):
 @login_required
 def panel_clients_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2360,7 +2352,7 @@ def panel_clients_hotel_view(request, hotel_slug):
 @login_required
 def panel_cleaning_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2373,7 +2365,7 @@ def panel_cleaning_hotel_view(request, hotel_slug):
 @login_required
 def panel_maintenance_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_staff(request.user, hotel) or is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2386,7 +2378,7 @@ def panel_maintenance_hotel_view(request, hotel_slug):
 @login_required
 def panel_administration_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2399,7 +2391,7 @@ def panel_administration_hotel_view(request, hotel_slug):
 @login_required
 def panel_reports_hotel_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2413,7 +2405,7 @@ def panel_reports_hotel_view(request, hotel_slug):
 @require_http_methods(["POST"])
 def panel_change_booking_status_hotel_view(request, hotel_slug, booking_id):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         messages.error(request, 'Hotel no encontrado')
         return redirect('panel_dashboard')
@@ -2435,7 +2427,7 @@ def panel_change_booking_status_hotel_view(request, hotel_slug, booking_id):
 @login_required
 def hotel_users_list_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2447,7 +2439,7 @@ def hotel_users_list_view(request, hotel_slug):
 @login_required
 def hotel_user_create_view(request, hotel_slug):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2477,7 +2469,7 @@ def hotel_user_create_view(request, hotel_slug):
 @login_required
 def hotel_user_edit_view(request, hotel_slug, user_id):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
@@ -2514,7 +2506,7 @@ def hotel_user_edit_view(request, hotel_slug, user_id):
 @login_required
 def hotel_user_delete_view(request, hotel_slug, user_id):
     try:
-        hotel = Hotel.objects.get(slug=hotel_slug)
+        hotel = get_request_hotel(request, hotel_slug)
     except Hotel.DoesNotExist:
         return HttpResponse('Hotel no encontrado', status=404)
     if not (is_hotel_admin(request.user, hotel) or is_superadmin(request.user)):
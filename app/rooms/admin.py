@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from .models import Room, RoomImage
 
@@ -9,8 +10,8 @@ class RoomImageInline(admin.TabularInline):
     """
     model = RoomImage
     extra = 1
-    fields = ['image', 'alt_text', 'is_main', 'order', 'image_preview']
-    readonly_fields = ['image_preview']
+    fields = ['image', 'alt_text', 'is_main', 'order', 'image_preview', 'derivatives_status']
+    readonly_fields = ['image_preview', 'derivatives_status']
     
     def image_preview(self, obj):
         """Muestra una vista previa de la imagen"""
@@ -54,8 +55,8 @@ class RoomAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        """Optimizar consultas con prefetch_related para imágenes"""
-        return super().get_queryset(request).prefetch_related('images')
+        """Imagen principal y cantidad de imágenes en la misma consulta del listado"""
+        return super().get_queryset(request).with_main_image().annotate(images_total=Count('images'))
     
     def available_rooms(self, obj):
         """Método para mostrar habitaciones disponibles"""
@@ -65,7 +66,9 @@ class RoomAdmin(admin.ModelAdmin):
     
     def image_count(self, obj):
         """Muestra el número de imágenes de la habitación"""
-        count = obj.images.count()
+        count = getattr(obj, 'images_total', None)
+        if count is None:
+            count = obj.images.count()
         if count == 0:
             return format_html('<span style="color: red;">0 imágenes</span>')
         elif count == 1:
@@ -76,17 +79,16 @@ class RoomAdmin(admin.ModelAdmin):
     
     def main_image_preview(self, obj):
         """Muestra la imagen principal de la habitación"""
-        main_img = obj.images.filter(is_main=True).first()
-        if main_img and main_img.image:
+        main_img = obj.primary_image
+        if main_img and main_img.image and main_img.is_main:
             return format_html(
                 '<img src="{}" style="max-height: 200px; max-width: 300px; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" />',
                 main_img.image.url
             )
-        elif obj.images.exists():
-            first_img = obj.images.first()
+        elif main_img and main_img.image:
             return format_html(
                 '<img src="{}" style="max-height: 200px; max-width: 300px; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);" /><br><small style="color: orange;">Primera imagen (no marcada como principal)</small>',
-                first_img.image.url
+                main_img.image.url
             )
         return format_html('<div style="padding: 20px; background: #f8f9fa; border-radius: 10px; text-align: center; color: #6c757d;">Sin imágenes</div>')
     main_image_preview.short_description = 'Imagen Principal'
@@ -2,9 +2,9 @@ from ninja import Router, Schema
 from typing import List, Optional
 from datetime import date
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 from .models import Room
-from app.bookings.models import Booking
+from app.administration.resolver import aresolve_hotel
+from app.bookings.availability import SEARCH_ORDERINGS, asearch_available_rooms
 
 router = Router()
 
@@ -23,84 +23,81 @@ class AvailableRoomsResponse(Schema):
     message: str
     rooms: List[RoomSchema]
     total_rooms: int
+    next_cursor: Optional[str] = None
 
 class AvailableRoomsRequest(Schema):
     fecha_inicio: date
     fecha_fin: date
     personas: int
 
+
 @router.get("/habitaciones-disponibles/", response=AvailableRoomsResponse)
-def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas: int):
+async def get_available_rooms(request, fecha_inicio: date, fecha_fin: date, personas: int,
+                        hotel: Optional[str] = None, orden: str = 'price',
+                        cursor: Optional[str] = None, limite: int = 50):
     """
     Obtiene las habitaciones disponibles entre dos fechas para cierta cantidad de personas.
+    Asíncrono: bajo ASGI las consultas no ocupan un hilo del servidor por petición.
     
     Args:
         fecha_inicio: Fecha de inicio de la búsqueda
         fecha_fin: Fecha de fin de la búsqueda
         personas: Número de personas para la reserva
+        hotel: ID o slug del hotel (opcional, por defecto todos)
+        orden: 'price' o 'capacity'
+        cursor: Cursor devuelto en `next_cursor` para pedir la página siguiente
+        limite: Tamaño de página (máximo 200)
     
     Returns:
-        Lista de habitaciones disponibles con sus detalles
+        Página de habitaciones disponibles con sus detalles
     """
+    def error(message):
+        return {"success": False, "message": message, "rooms": [], "total_rooms": 0}
+
     try:
         # Validaciones básicas
         if fecha_inicio >= fecha_fin:
-            return {
-                "success": False,
-                "message": "La fecha de inicio debe ser anterior a la fecha de fin",
-                "rooms": [],
-                "total_rooms": 0
-            }
+            return error("La fecha de inicio debe ser anterior a la fecha de fin")
         
         if personas <= 0:
-            return {
-                "success": False,
-                "message": "El número de personas debe ser mayor a 0",
-                "rooms": [],
-                "total_rooms": 0
+            return error("El número de personas debe ser mayor a 0")
+
+        if orden not in SEARCH_ORDERINGS:
+            return error(f"Orden inválido. Valores permitidos: {', '.join(SEARCH_ORDERINGS)}")
+
+        hotel_obj = await aresolve_hotel(hotel)
+        if hotel and hotel_obj is None:
+            return error("Hotel no encontrado")
+
+        try:
+            rows, next_cursor = await asearch_available_rooms(
+                fecha_inicio, fecha_fin, personas,
+                hotel=hotel_obj, order_by=orden, cursor=cursor, limit=limite,
+            )
+        except ValueError as e:
+            return error(str(e))
+
+        type_labels = dict(Room.TYPE_CHOICES)
+        rooms_data = [
+            {
+                "id": row['id'],
+                "number": row['number'],
+                "type": type_labels.get(row['type'], row['type']),
+                "capacity": row['capacity'],
+                "price": float(row['price']),
+                "description": row['description'],
+                "floor": row['floor'],
             }
-        
-        # Obtener habitaciones que cumplan los criterios básicos
-        available_rooms = Room.objects.filter(
-            status='available',  # Solo habitaciones libres
-            active=True,         # Solo habitaciones activas
-            capacity__gte=personas  # Que tengan capacidad suficiente
-        )
-        
-        # Filtrar habitaciones que no tengan reservas superpuestas
-        conflicting_bookings = Booking.objects.filter(
-            status__in=['pending', 'confirmed'],  # Solo reservas activas
-            check_in_date__lt=fecha_fin,
-            check_out_date__gt=fecha_inicio
-        ).values_list('room_id', flat=True)
-        
-        # Excluir habitaciones con reservas conflictivas
-        available_rooms = available_rooms.exclude(id__in=conflicting_bookings)
-        
-        # Preparar respuesta
-        rooms_data = []
-        for room in available_rooms:
-            rooms_data.append({
-                "id": room.id,
-                "number": room.number,
-                "type": room.get_type_display(),
-                "capacity": room.capacity,
-                "price": float(room.price),
-                "description": room.description,
-                "floor": room.floor
-            })
+            for row in rows
+        ]
         
         return {
             "success": True,
             "message": f"Se encontraron {len(rooms_data)} habitaciones disponibles",
             "rooms": rooms_data,
-            "total_rooms": len(rooms_data)
+            "total_rooms": len(rooms_data),
+            "next_cursor": next_cursor,
         }
         
     except Exception as e:
-        return {
-            "success": False,
-            "message": f"Error al obtener habitaciones disponibles: {str(e)}",
-            "rooms": [],
-            "total_rooms": 0
-        } 
\ No newline at end of file
+        return error(f"Error al obtener habitaciones disponibles: {str(e)}")
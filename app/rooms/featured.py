@@ -0,0 +1,105 @@
+"""
+Habitaciones destacadas de las portadas del portal.
+
+order_by('?') obliga a la base a ordenar al azar toda la tabla de habitaciones
+en cada visita. En su lugar se guarda en la caché del portal la lista de ids
+candidatos (con su peso) de cada hotel, se sortean ids en Python y solo se
+leen esas filas. La lista usa las claves versionadas de app/core/cache.py:
+guardar o borrar una habitación la descarta y se rehace en la siguiente visita.
+
+El peso se elige con FEATURED_ROOMS_WEIGHTING:
+- 'uniform': todas las habitaciones con la misma probabilidad (por defecto);
+- 'type': las suites y familiares salen más seguido (TYPE_WEIGHTS);
+- 'price': probabilidad proporcional al precio por noche.
+"""
+import heapq
+import random
+
+from django.conf import settings
+
+from app.core import cache as portal_cache
+from .models import Room
+
+WEIGHTINGS = ('uniform', 'type', 'price')
+TYPE_WEIGHTS = {
+    'individual': 1.0,
+    'double': 1.0,
+    'triple': 1.5,
+    'family': 2.0,
+    'suite': 3.0,
+}
+
+
+def room_weight(room_type, price, weighting='uniform'):
+    """Peso relativo de una habitación según el criterio indicado"""
+    if weighting == 'type':
+        return TYPE_WEIGHTS.get(room_type, 1.0)
+    if weighting == 'price':
+        return max(float(price or 0), 1.0)
+    return 1.0
+
+
+def candidate_pool(hotel_id, weighting='uniform'):
+    """
+    [(id, peso)] de las habitaciones activas del hotel, desde la caché del
+    portal. Con hotel_id=ALL_HOTELS abarca todos los hoteles.
+    """
+    def build():
+        # order_by() sin campos: no hace falta el orden por número del Meta
+        qs = Room.objects.filter(active=True).order_by()
+        if hotel_id != portal_cache.ALL_HOTELS:
+            qs = qs.filter(hotel_id=hotel_id)
+        return [
+            (pk, room_weight(room_type, price, weighting))
+            for pk, room_type, price in qs.values_list('id', 'type', 'price')
+        ]
+
+    return portal_cache.cached_for_hotel(hotel_id, f'featured_pool:{weighting}', build)
+
+
+def sample_ids(pool, count, rng=None):
+    """
+    Elige hasta `count` ids distintos del pool [(id, peso)]. Con pesos iguales
+    es un muestreo simple; si no, el de Efraimidis-Spirakis (se queda con las
+    `count` claves u^(1/peso) más altas), en O(n log count).
+    """
+    rng = rng or random
+    if len(pool) <= count:
+        ids = [pk for pk, _ in pool]
+        rng.shuffle(ids)
+        return ids
+    if len({weight for _, weight in pool}) == 1:
+        return [pk for pk, _ in rng.sample(pool, count)]
+    chosen = heapq.nlargest(count, pool, key=lambda item: rng.random() ** (1.0 / item[1]))
+    return [pk for pk, _ in chosen]
+
+
+def _load_rooms(ids, hotel_id=None):
+    qs = Room.objects.filter(id__in=ids, active=True).order_by().prefetch_related('images')
+    if hotel_id is not None:
+        qs = qs.filter(hotel_id=hotel_id)
+    return {room.id: room for room in qs}
+
+
+def featured_rooms(hotel_id=portal_cache.ALL_HOTELS, count=3, weighting=None, rng=None):
+    """
+    Habitaciones destacadas al azar (con imágenes precargadas). Para un hotel
+    reutiliza las entradas room:<id> del detalle en la caché del portal, así
+    que una portada con la caché caliente no consulta la base.
+    """
+    weighting = weighting or getattr(settings, 'FEATURED_ROOMS_WEIGHTING', 'uniform')
+    if weighting not in WEIGHTINGS:
+        weighting = 'uniform'
+    ids = sample_ids(candidate_pool(hotel_id, weighting), count, rng)
+    if not ids:
+        return []
+    if hotel_id == portal_cache.ALL_HOTELS:
+        rooms = _load_rooms(ids)
+        return [rooms[pk] for pk in ids if pk in rooms]
+
+    def build_missing(names):
+        loaded = _load_rooms([int(name.split(':', 1)[1]) for name in names], hotel_id)
+        return {f'room:{pk}': room for pk, room in loaded.items()}
+
+    entries = portal_cache.get_many_for_hotel(hotel_id, [f'room:{pk}' for pk in ids], build_missing)
+    return [room for room in entries.values() if room is not None]
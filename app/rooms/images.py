@@ -0,0 +1,147 @@
+"""
+Derivados de las imágenes de habitaciones (thumb, card, hero en WebP y JPEG).
+
+El portal servía el archivo original subido incluso para miniaturas. Al
+guardar un RoomImage con una imagen nueva queda en derivatives_status
+'pending'; el comando process_room_images genera fuera de la petición las
+versiones redimensionadas:
+
+- se reclaman lotes de pendientes con un UPDATE condicional
+  (pending -> processing), así varios workers no procesan la misma imagen;
+- cada derivado se guarda con un nombre derivado del contenido del original
+  (rooms/derivatives/<sha256>-<ancho>w.<ext>): un archivo nunca cambia bajo
+  el mismo nombre y se puede servir con caché de un año (immutable);
+- las plantillas eligen el tamaño con srcset (Room.main_image_srcset*).
+"""
+import hashlib
+import logging
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from app.core import cache as portal_cache
+from .models import RoomImage
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'rooms/derivatives'
+# Ancho máximo de cada tamaño; nunca se amplía una imagen más chica
+SIZES = {
+    'thumb': 320,
+    'card': 640,
+    'hero': 1600,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DEFAULT_BATCH_SIZE = 20
+# Caché HTTP de los derivados: el nombre cambia con el contenido
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _rgb(image):
+    """Convierte a RGB aplanando la transparencia sobre blanco (JPEG no la admite)"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(room_image):
+    """
+    Genera y guarda los derivados de room_image.image.
+
+    Returns:
+        dict {tamaño: {'width', 'height', 'webp', 'jpeg'}} con los nombres en el storage
+    """
+    storage = room_image.image.storage
+    with room_image.image.open('rb') as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    with Image.open(BytesIO(data)) as opened:
+        original = _rgb(ImageOps.exif_transpose(opened))
+
+    derivatives = {}
+    for size, max_width in SIZES.items():
+        width = min(max_width, original.width)
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        entry = {'width': width, 'height': height}
+        for fmt in FORMATS:
+            ext = 'jpg' if fmt == 'jpeg' else fmt
+            name = f'{DERIVATIVES_DIR}/{digest}-{width}w.{ext}'
+            # Mismo contenido, mismo nombre: si ya existe (otra imagen idéntica) se reutiliza
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(_encode(resized, fmt)))
+            entry[fmt] = name
+        derivatives[size] = entry
+    return derivatives
+
+
+def claim_batch(limit=DEFAULT_BATCH_SIZE):
+    """Reclama hasta `limit` imágenes pendientes (pending -> processing) y las devuelve"""
+    claimed = []
+    candidates = (
+        RoomImage.objects.filter(derivatives_status='pending').exclude(Q(image='') | Q(image__isnull=True))
+        .order_by('id').values_list('id', flat=True)[:limit]
+    )
+    for image_id in list(candidates):
+        if RoomImage.objects.filter(pk=image_id, derivatives_status='pending').update(derivatives_status='processing'):
+            claimed.append(image_id)
+    return list(RoomImage.objects.filter(pk__in=claimed).select_related('room'))
+
+
+def process_pending(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Procesa un lote de imágenes pendientes.
+
+    Returns:
+        dict con claimed, ready, failed, files (derivados escritos o reutilizados) y seconds
+    """
+    started = time.monotonic()
+    stats = {'claimed': 0, 'ready': 0, 'failed': 0, 'files': 0, 'seconds': 0.0}
+    images = claim_batch(batch_size)
+    stats['claimed'] = len(images)
+    hotel_ids = set()
+    for room_image in images:
+        try:
+            derivatives = build_derivatives(room_image)
+        except Exception:
+            logger.exception('No se pudieron generar los derivados de la imagen %s', room_image.pk)
+            RoomImage.objects.filter(pk=room_image.pk).update(derivatives_status='failed')
+            stats['failed'] += 1
+            continue
+        # update() y no save(): no debe volver a encolar la imagen. Si mientras tanto
+        # se reemplazó el archivo, derivatives_source ya no coincide y la fila queda pendiente
+        RoomImage.objects.filter(pk=room_image.pk, derivatives_source=room_image.derivatives_source).update(
+            derivatives=derivatives, derivatives_status='ready', derivatives_source=room_image.image.name
+        )
+        stats['ready'] += 1
+        stats['files'] += len(derivatives) * len(FORMATS)
+        hotel_ids.add(room_image.room.hotel_id)
+    # Las páginas cacheadas del portal guardan las URLs de las imágenes
+    for hotel_id in hotel_ids:
+        portal_cache.invalidate_hotel(hotel_id)
+    if hotel_ids:
+        portal_cache.invalidate_hotel(portal_cache.ALL_HOTELS)
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def requeue(queryset=None):
+    """Marca imágenes para regenerar sus derivados (p. ej. tras cambiar SIZES)"""
+    queryset = RoomImage.objects.all() if queryset is None else queryset
+    return queryset.update(derivatives_status='pending')
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0006_hotel_template_id'),
+        ('rooms', '0003_room_hotel_alter_room_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['hotel', 'price', 'id'], name='room_hotel_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['hotel', 'capacity', 'id'], name='room_hotel_capacity_idx'),
+        ),
+    ]
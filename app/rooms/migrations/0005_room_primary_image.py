@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_primary_image(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomImage = apps.get_model('rooms', 'RoomImage')
+    primary = {}
+    # Mismo criterio que Room.main_image: principal primero, luego order/id
+    for image_id, room_id in RoomImage.objects.order_by('room_id', '-is_main', 'order', 'id').values_list('id', 'room_id'):
+        primary.setdefault(room_id, image_id)
+    for room_id, image_id in primary.items():
+        Room.objects.filter(pk=room_id).update(primary_image_id=image_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_room_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Imagen principal (calculada)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rooms.roomimage'),
+        ),
+        migrations.RunPython(populate_primary_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+def populate_derivatives_source(apps, schema_editor):
+    # Las imágenes existentes quedan pendientes de generar sus derivados
+    RoomImage = apps.get_model('rooms', 'RoomImage')
+    RoomImage.objects.update(derivatives_source=models.F('image'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0005_room_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='roomimage',
+            name='derivatives_source',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='roomimage',
+            name='derivatives_status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('ready', 'Lista'), ('failed', 'Fallida')], db_index=True, default='pending', editable=False, max_length=20),
+        ),
+        migrations.RunPython(populate_derivatives_source, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from app.administration.models import Hotel
 
+# Imagen por defecto si la habitación no tiene ninguna
+DEFAULT_ROOM_IMAGE = "https://images.unsplash.com/photo-1566665797739-1674de7a421a?ixlib=rb-4.0.3&auto=format&fit=crop&w=500&q=80"
+
+
+class RoomQuerySet(models.QuerySet):
+    def with_main_image(self):
+        """Trae la imagen principal en la misma consulta (JOIN sobre primary_image)"""
+        return self.select_related('primary_image')
+
+
 class Room(models.Model):
     """
     Modelo para representar las habitaciones del hotel
@@ -34,11 +44,18 @@ class Room(models.Model):
     description = models.TextField(blank=True, null=True)
     floor = models.PositiveIntegerField(default=1)
     active = models.BooleanField(default=True, help_text="Si la habitación está disponible para reservas")
+    # Desnormalizado: lo mantiene RoomImage (save/delete) con el mismo criterio que main_image
+    primary_image = models.ForeignKey(
+        'RoomImage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', editable=False,
+        help_text="Imagen principal (calculada)"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = RoomQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Habitación"
         verbose_name_plural = "Habitaciones"
@@ -46,10 +63,25 @@ class Room(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['hotel', 'number'], name='uniq_room_hotel_number')
         ]
+        indexes = [
+            # Búsqueda de disponibilidad ordenada por precio o capacidad dentro de un hotel
+            models.Index(fields=['hotel', 'price', 'id'], name='room_hotel_price_idx'),
+            models.Index(fields=['hotel', 'capacity', 'id'], name='room_hotel_capacity_idx'),
+        ]
     
     def __str__(self):
         return f"Habitación {self.number} - {self.get_type_display()}"
     
+    def save(self, *args, **kwargs):
+        # primary_image lo mantiene RoomImage: una instancia cargada antes de
+        # subir o borrar una imagen no debe pisarlo al guardarse
+        if not self._state.adding and not kwargs.get('update_fields') and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'primary_image'
+            ]
+        super().save(*args, **kwargs)
+
     def clean(self):
         from django.core.exceptions import ValidationError
         super().clean()
@@ -62,29 +94,70 @@ class Room(models.Model):
         return self.status == 'available' and self.active
     
     def change_status(self, new_status):
-        """Método para cambiar el estado de la habitación"""
+        """Método para cambiar el estado de la habitación (no escribe si ya lo tiene)"""
         if new_status in dict(self.STATUS_CHOICES):
-            self.status = new_status
-            self.save()
+            if self.status != new_status:
+                self.status = new_status
+                self.save(update_fields=['status', 'updated_at'])
             return True
         return False
     
+    def _prefetched_images(self):
+        """Imágenes ya cargadas con prefetch_related('images'), o None"""
+        return getattr(self, '_prefetched_objects_cache', {}).get('images')
+
+    def refresh_primary_image(self):
+        """Recalcula primary_image: la marcada como principal, si no la primera por order/id"""
+        image = RoomImage.objects.filter(room_id=self.pk).order_by('-is_main', 'order', 'id').first()
+        Room.objects.filter(pk=self.pk).update(primary_image=image)
+        self.primary_image = image
+        return image
+
+    def _main_image_obj(self):
+        """RoomImage principal: la marcada como principal, si no la primera por order/id"""
+        prefetched = self._prefetched_images()
+        if prefetched is not None:
+            images = list(prefetched)
+            # Mismo criterio que el orden por defecto: principal primero, luego order/id
+            return next((img for img in images if img.is_main), images[0] if images else None)
+        if self.primary_image_id or Room.primary_image.is_cached(self):
+            # Con with_main_image() ya viene cargada; si no, una consulta por id
+            return self.primary_image
+        # Sin puntero (imágenes creadas con bulk_create o SQL directo)
+        return self.images.order_by('-is_main', 'order', 'id').first()
+
     @property
     def main_image(self):
         """Obtiene la imagen principal de la habitación"""
-        main_img = self.images.filter(is_main=True).first()
-        if main_img:
-            return main_img.image.url
-        # Si no hay imagen principal, tomar la primera disponible
-        first_img = self.images.first()
-        if first_img:
-            return first_img.image.url
-        # Imagen por defecto si no hay ninguna
-        return "https://images.unsplash.com/photo-1566665797739-1674de7a421a?ixlib=rb-4.0.3&auto=format&fit=crop&w=500&q=80"
-    
+        image = self._main_image_obj()
+        if image:
+            return image.image.url
+        return DEFAULT_ROOM_IMAGE
+
+    @property
+    def main_image_card(self):
+        """Imagen principal en tamaño tarjeta (el original mientras no haya derivados)"""
+        image = self._main_image_obj()
+        return image.derivative_url('card') if image else DEFAULT_ROOM_IMAGE
+
+    @property
+    def main_image_srcset(self):
+        """srcset JPEG de la imagen principal ('' si no hay derivados)"""
+        image = self._main_image_obj()
+        return image.srcset('jpeg') if image else ''
+
+    @property
+    def main_image_srcset_webp(self):
+        """srcset WebP de la imagen principal ('' si no hay derivados)"""
+        image = self._main_image_obj()
+        return image.srcset('webp') if image else ''
+
     @property
     def all_images(self):
         """Obtiene todas las imágenes de la habitación ordenadas"""
+        prefetched = self._prefetched_images()
+        if prefetched is not None:
+            return prefetched
         return self.images.all().order_by('-is_main', 'order', 'id')
 
 
@@ -97,6 +170,19 @@ class RoomImage(models.Model):
     alt_text = models.CharField(max_length=200, blank=True, help_text="Texto alternativo para la imagen")
     is_main = models.BooleanField(default=False, help_text="Imagen principal de la habitación")
     order = models.PositiveIntegerField(default=0, help_text="Orden de visualización")
+
+    # Versiones redimensionadas (thumb/card/hero en WebP y JPEG), generadas por
+    # process_room_images: {"card": {"width": 640, "height": 427, "webp": "...", "jpeg": "..."}, ...}
+    DERIVATIVES_STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
+        ('ready', 'Lista'),
+        ('failed', 'Fallida'),
+    ]
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    derivatives_status = models.CharField(max_length=20, choices=DERIVATIVES_STATUS_CHOICES, default='pending', db_index=True, editable=False)
+    # Archivo a partir del cual se generaron: si cambia la imagen se vuelven a generar
+    derivatives_source = models.CharField(max_length=255, blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,7 +197,32 @@ class RoomImage(models.Model):
         main_text = " (Principal)" if self.is_main else ""
         return f"Imagen de {self.room.number}{main_text}"
     
+    def derivative_url(self, size, fmt='jpeg'):
+        """URL del derivado `size` en `fmt`; el original mientras no esté generado"""
+        name = (self.derivatives or {}).get(size, {}).get(fmt)
+        return self.image.storage.url(name) if name else self.image.url
+
+    def srcset(self, fmt='jpeg'):
+        """Atributo srcset ('url 320w, url 640w, ...') con los derivados listos"""
+        by_width = {}
+        for derivative in (self.derivatives or {}).values():
+            if derivative.get(fmt):
+                by_width.setdefault(derivative['width'], derivative[fmt])
+        return ', '.join(f'{self.image.storage.url(name)} {width}w' for width, name in sorted(by_width.items()))
+
     def save(self, *args, **kwargs):
-        # Si esta imagen se marca como principal, desmarcar las demás
-        if self.is_main:
-            RoomImage.objects.filter(room=self.room, is_main=True).update(is_main=False)
+        image_changed = self.image.name != self.derivatives_source
+        if image_changed:
+            # Imagen nueva o reemplazada: los derivados se generan en segundo plano (process_room_images)
+            self.derivatives = {}
+            self.derivatives_status = 'pending'
+        with transaction.atomic():
+            # Si esta imagen se marca como principal, desmarcar las demás
+            if self.is_main:
+                RoomImage.objects.filter(room_id=self.room_id, is_main=True).exclude(pk=self.pk).update(is_main=False)
+            super().save(*args, **kwargs)
+            if image_changed:
+                # El nombre definitivo lo asigna el storage al guardar el archivo subido
+                self.derivatives_source = self.image.name or ''
+                RoomImage.objects.filter(pk=self.pk).update(derivatives_source=self.derivatives_source)
+            self.room.refresh_primary_image()
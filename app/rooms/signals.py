@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .models import Room, RoomImage
+
+
+@receiver(post_delete, sender=RoomImage)
+def refresh_primary_image(sender, instance, **kwargs):
+    # También cubre los borrados masivos (admin, QuerySet.delete); al borrar la habitación no queda nada que actualizar
+    room = Room.objects.filter(pk=instance.room_id).first()
+    if room is not None:
+        room.refresh_primary_image()
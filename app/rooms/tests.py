@@ -1,3 +1,318 @@
-from django.test import TestCase
+import random
+import shutil
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from app.administration.models import Hotel
+from app.administration.resolver import hotel_cache
+from app.bookings.availability import search_available_rooms
+from app.bookings.models import Booking
+from app.clients.models import Client
+from app.rooms import featured, images
+from app.rooms.models import DEFAULT_ROOM_IMAGE, Room, RoomImage
+
+
+class AvailabilitySearchTestCase(TestCase):
+    """Tests del buscador de disponibilidad por hotel, fechas y capacidad"""
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        self.other_hotel = Hotel.objects.create(name='Otro Hotel', slug='otro-hotel')
+        self.rooms = [
+            Room.objects.create(hotel=self.hotel, number=str(100 + i), price=Decimal(price), capacity=capacity)
+            for i, (price, capacity) in enumerate([(80, 2), (80, 2), (120, 3), (200, 4), (60, 1)])
+        ]
+        Room.objects.create(hotel=self.other_hotel, number='101', price=Decimal('50'), capacity=2)
+        self.guest = Client.objects.create(first_name='Ana', last_name='Pérez', email='ana@example.com', dni='12345678')
+        self.check_in = timezone.now().date() + timedelta(days=5)
+        self.check_out = self.check_in + timedelta(days=2)
+
+    def test_excludes_booked_small_and_foreign_rooms(self):
+        Booking.objects.create(
+            hotel=self.hotel, client=self.guest, room=self.rooms[2],
+            check_in_date=self.check_in + timedelta(days=1), check_out_date=self.check_out + timedelta(days=3),
+            total_price=Decimal('0'),
+        )
+        with self.assertNumQueries(1):
+            rows, next_cursor = search_available_rooms(self.check_in, self.check_out, 2, hotel=self.hotel)
+        self.assertEqual([r['id'] for r in rows], [self.rooms[0].id, self.rooms[1].id, self.rooms[3].id])
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_pagination_walks_all_rooms_in_order(self):
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = search_available_rooms(
+                self.check_in, self.check_out, 1, hotel=self.hotel, order_by='price', cursor=cursor, limit=2
+            )
+            seen.extend(r['id'] for r in rows)
+            if not cursor:
+                break
+        expected = [r.id for r in sorted(self.rooms, key=lambda r: (r.price, r.id))]
+        self.assertEqual(seen, expected)
+
+    def test_api_returns_next_cursor(self):
+        response = self.client.get('/api/habitaciones-disponibles/', {
+            'fecha_inicio': self.check_in, 'fecha_fin': self.check_out, 'personas': 1,
+            'hotel': self.hotel.slug, 'orden': 'capacity', 'limite': 3,
+        })
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total_rooms'], 3)
+        self.assertEqual([r['capacity'] for r in data['rooms']], [1, 2, 2])
+        self.assertIsNotNone(data['next_cursor'])
+
+
+class FeaturedRoomsTestCase(TestCase):
+    """Tests del sorteo de habitaciones destacadas sin order_by('?')"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.other = Hotel.objects.create(name='Otro Hotel', slug='otro-hotel')
+        cls.rooms = [
+            Room.objects.create(hotel=cls.hotel, number=str(100 + i), price=Decimal(100), type=room_type)
+            for i, room_type in enumerate(['individual', 'double', 'suite', 'family', 'triple'])
+        ]
+        Room.objects.create(hotel=cls.other, number='900', price=Decimal(50))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fetches_only_sampled_rows_without_random_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            rooms = featured.featured_rooms(self.hotel.id, count=3)
+        self.assertEqual(len({room.id for room in rooms}), 3)
+        self.assertTrue(all(room.hotel_id == self.hotel.id for room in rooms))
+        sql = ' '.join(query['sql'] for query in queries.captured_queries).upper()
+        self.assertNotIn('RANDOM()', sql)
+        # ids candidatos, las 3 filas sorteadas y sus imágenes
+        self.assertEqual(len(queries.captured_queries), 3)
+
+        # Con todas las filas ya en caché, cualquier sorteo se resuelve sin consultas
+        featured.featured_rooms(self.hotel.id, count=5)
+        with self.assertNumQueries(0):
+            again = featured.featured_rooms(self.hotel.id, count=3, rng=random.Random(1))
+        self.assertTrue(all(room.hotel_id == self.hotel.id for room in again))
+
+    def test_room_changes_refresh_candidates(self):
+        featured.featured_rooms(self.hotel.id, count=3)
+        for room in self.rooms[1:]:
+            with self.captureOnCommitCallbacks(execute=True):
+                room.active = False
+                room.save()
+        rooms = featured.featured_rooms(self.hotel.id, count=3)
+        self.assertEqual([room.id for room in rooms], [self.rooms[0].id])
+
+    def test_all_hotels_pool(self):
+        pool = featured.candidate_pool(featured.portal_cache.ALL_HOTELS)
+        self.assertEqual(len(pool), 6)
+        self.assertEqual(len(featured.featured_rooms(count=10)), 6)
+
+    def test_weighting_by_type_favours_suites(self):
+        pool = featured.candidate_pool(self.hotel.id, 'type')
+        rng = random.Random(7)
+        counts = Counter(featured.sample_ids(pool, 1, rng)[0] for _ in range(3000))
+        suite, single = self.rooms[2].id, self.rooms[0].id
+        self.assertGreater(counts[suite], 2 * counts[single])
+        self.assertEqual(len(set(featured.sample_ids(pool, 4, rng))), 4)
+
+    def test_portal_index_uses_sampler(self):
+        response = self.client.get(reverse('client_index_hotel', args=[self.hotel.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['featured_rooms']), 3)
+
+
+class RoomMainImageTestCase(TestCase):
+    """Tests de la imagen principal desnormalizada y su carga en los listados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.user = get_user_model().objects.create_user(username='staff', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+
+    def add_rooms(self, count, start=100):
+        rooms = []
+        for i in range(start, start + count):
+            room = Room.objects.create(hotel=self.hotel, number=str(i), price=Decimal(100))
+            RoomImage.objects.create(room=room, image=f'rooms/{i}-a.jpg', order=1)
+            RoomImage.objects.create(room=room, image=f'rooms/{i}-main.jpg', order=2, is_main=True)
+            rooms.append(room)
+        return rooms
+
+    def test_image_save_maintains_primary_image(self):
+        room = Room.objects.create(hotel=self.hotel, number='101', price=Decimal(100))
+        first = RoomImage.objects.create(room=room, image='rooms/a.jpg', order=1)
+        self.assertEqual(Room.objects.get(pk=room.pk).primary_image, first)
+
+        main = RoomImage.objects.create(room=room, image='rooms/b.jpg', order=2, is_main=True)
+        self.assertEqual(Room.objects.get(pk=room.pk).primary_image, main)
+        self.assertEqual(RoomImage.objects.filter(room=room).count(), 2)
+
+        # Una instancia cargada antes no pisa el puntero al guardarse
+        room.description = 'Vista al mar'
+        room.save()
+        self.assertEqual(Room.objects.get(pk=room.pk).primary_image, main)
+
+        main.delete()
+        self.assertEqual(Room.objects.get(pk=room.pk).primary_image, first)
+        RoomImage.objects.filter(room=room).delete()
+        room = Room.objects.with_main_image().get(pk=room.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(room.main_image, DEFAULT_ROOM_IMAGE)
+
+    def test_listing_loads_main_images_in_one_query(self):
+        self.add_rooms(5)
+        with self.assertNumQueries(1):
+            urls = [room.main_image for room in Room.objects.with_main_image()]
+        self.assertEqual(len(urls), 5)
+        self.assertTrue(all(url.endswith('-main.jpg') for url in urls))
+
+    def test_portal_and_panel_listings_are_constant_in_queries(self):
+        self.add_rooms(2)
+        self.client.force_login(self.user)
+        pages = [
+            reverse('client_rooms_hotel', args=[self.hotel.slug]),
+            reverse('client_rooms') + f'?hotel={self.hotel.slug}',
+            reverse('rooms') + f'?hotel={self.hotel.id}',
+            reverse('rooms_api_collection') + f'?hotel={self.hotel.id}',
+        ]
+
+        def count_queries():
+            counts = []
+            for url in pages:
+                cache.clear()
+                hotel_cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                counts.append(len(queries.captured_queries))
+            return counts
+
+        small = count_queries()
+        self.add_rooms(6, start=200)
+        self.assertEqual(count_queries(), small)
+
+        results = self.client.get(pages[-1]).json()['results']
+        self.assertTrue(all(row['main_image'].endswith('-main.jpg') for row in results))
+
+
+def make_photo(width=1800, height=1200):
+    """JPEG con manchas suaves y grano fino, que se comprime como una foto real"""
+    from PIL import Image, ImageChops
+
+    bands = []
+    for sigma in (50, 70, 90):
+        coarse = Image.effect_noise((width // 20, height // 20), sigma).resize((width, height), Image.BICUBIC)
+        bands.append(ImageChops.add(coarse, Image.effect_noise((width, height), 12), 2))
+    buffer = BytesIO()
+    Image.merge('RGB', bands).save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+class RoomImageDerivativesTestCase(TestCase):
+    """Tests de la generación de derivados de imágenes y su uso en el portal"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name='Hotel Test', slug='hotel-test')
+        cls.room = Room.objects.create(hotel=cls.hotel, number='101', price=Decimal(100))
+        cls.photo = make_photo()
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.image = RoomImage.objects.create(
+            room=self.room, image=SimpleUploadedFile('foto.jpg', self.photo, content_type='image/jpeg'), is_main=True
+        )
+
+    def test_upload_is_queued_and_processed_in_background(self):
+        self.assertEqual(self.image.derivatives_status, 'pending')
+        self.assertEqual(self.image.derivatives_source, self.image.image.name)
+        self.assertEqual(self.image.derivative_url('card'), self.image.image.url)
+
+        call_command('process_room_images', stdout=StringIO())
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.derivatives_status, 'ready')
+        self.assertEqual([self.image.derivatives[size]['width'] for size in ('thumb', 'card', 'hero')], [320, 640, 1600])
+        self.assertEqual(self.image.derivatives['card']['height'], 427)
+        names = {d[fmt] for d in self.image.derivatives.values() for fmt in ('webp', 'jpeg')}
+        self.assertEqual(len(names), 6)
+        self.assertTrue(all(name.startswith('rooms/derivatives/') for name in names))
+        self.assertIn('640w.webp', self.image.derivative_url('card', 'webp'))
+        self.assertEqual(self.image.srcset('webp').count('w, '), 2)
+
+        # Otros cambios no vuelven a encolar; reemplazar el archivo sí
+        self.image.alt_text = 'Vista'
+        self.image.save()
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.derivatives_status, 'ready')
+        self.image.image = SimpleUploadedFile('otra.jpg', make_photo(400, 300), content_type='image/jpeg')
+        self.image.save()
+        self.image.refresh_from_db()
+        self.assertEqual((self.image.derivatives_status, self.image.derivatives), ('pending', {}))
+
+    def test_same_content_reuses_files(self):
+        images.process_pending()
+        self.image.refresh_from_db()
+        copy = RoomImage.objects.create(
+            room=self.room, image=SimpleUploadedFile('copia.jpg', self.photo, content_type='image/jpeg'), order=5
+        )
+        self.assertNotEqual(copy.image.name, self.image.image.name)
+        images.process_pending()
+        copy.refresh_from_db()
+        self.assertEqual(copy.derivatives, self.image.derivatives)
+
+    def test_invalid_file_is_marked_failed(self):
+        broken = RoomImage.objects.create(
+            room=self.room, image=SimpleUploadedFile('rota.jpg', b'no es una imagen', content_type='image/jpeg'), order=9
+        )
+        with self.assertLogs('app.rooms.images', 'ERROR'):
+            stats = images.process_pending()
+        self.assertEqual((stats['ready'], stats['failed']), (1, 1))
+        broken.refresh_from_db()
+        self.assertEqual(broken.derivatives_status, 'failed')
+
+    def test_derivatives_served_with_immutable_cache(self):
+        images.process_pending()
+        self.image.refresh_from_db()
+        response = self.client.get(self.image.derivative_url('thumb', 'webp'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        missing = reverse('room_image_derivative', args=['nada-320w.webp'])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_rooms_grid_uses_srcset_and_weighs_far_less(self):
+        url = reverse('client_rooms_hotel', args=[self.hotel.slug])
+        self.assertIn(self.image.image.url, self.client.get(url).content.decode())
+
+        images.process_pending()
+        self.image.refresh_from_db()
+        html = self.client.get(url).content.decode()
+        self.assertIn('type="image/webp" srcset="', html)
+        self.assertIn(self.image.srcset('webp'), html)
+        self.assertNotIn(self.image.image.url + '"', html)
+
+        card = self.image.image.storage.size(self.image.derivatives['card']['webp'])
+        self.assertLess(card * 10, len(self.photo))
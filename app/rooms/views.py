@@ -1,15 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db.models import Q
 import json
 from .models import Room, RoomImage
-from app.administration.models import Hotel
+from .images import CACHE_CONTROL, DERIVATIVES_DIR
+from app.administration.resolver import get_default_hotel, resolve_hotel
 from .forms import RoomForm
+from app.core.utils import CSV_CHUNK_SIZE, stream_csv_response
+from app.core.pagination import InvalidCursor, keyset_paginate, parse_page_size
+from app.core.versions import conditional_on_versions, hotel_param
 
 @login_required
 def rooms_view(request):
@@ -17,14 +21,8 @@ def rooms_view(request):
     hotel_param = request.GET.get('hotel')
     hotel = None
     if hotel_param:
-        try:
-            hotel = Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                hotel = None
-    rooms = Room.objects.all().order_by('number')
+        hotel = resolve_hotel(hotel_param)
+    rooms = Room.objects.with_main_image().order_by('number')
     if hotel:
         rooms = rooms.filter(hotel=hotel)
     
@@ -147,19 +145,14 @@ def delete_room(request, room_id):
 # API Views para AJAX
 @login_required
 @require_http_methods(["GET"])
+@conditional_on_versions(hotel_param)
 def rooms_api(request):
-    """API para obtener habitaciones en formato JSON"""
+    """API para obtener habitaciones en formato JSON, paginado por cursor sobre (number, id)"""
     hotel_param = request.GET.get('hotel')
     hotel = None
     if hotel_param:
-        try:
-            hotel = Hotel.objects.get(id=int(hotel_param))
-        except Exception:
-            try:
-                hotel = Hotel.objects.get(slug=str(hotel_param))
-            except Hotel.DoesNotExist:
-                hotel = None
-    rooms = Room.objects.all().order_by('number')
+        hotel = resolve_hotel(hotel_param)
+    rooms = Room.objects.all()
     if hotel:
         rooms = rooms.filter(hotel=hotel)
     
@@ -181,22 +174,28 @@ def rooms_api(request):
             Q(description__icontains=search)
         )
     
-    rooms_data = []
-    for room in rooms:
-        rooms_data.append({
-            'id': room.id,
-            'number': room.number,
-            'type': room.type,
-            'capacity': room.capacity,
-            'floor': room.floor,
-            'price': float(room.price),
-            'status': room.status,
-            'description': room.description or '',
-            'active': room.active,
-            'created_at': room.created_at.isoformat() if room.created_at else None,
-        })
-    
-    return JsonResponse(rooms_data, safe=False)
+    try:
+        page = keyset_paginate(
+            rooms, ['number', 'id'],
+            ('id', 'number', 'type', 'capacity', 'floor', 'price', 'status', 'description', 'active', 'created_at',
+             'primary_image__image'),
+            cursor=request.GET.get('cursor'), page_size=parse_page_size(request.GET.get('page_size')),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    storage = RoomImage._meta.get_field('image').storage
+    page['results'] = [
+        {
+            **{key: value for key, value in room.items() if key != 'primary_image__image'},
+            'main_image': storage.url(room['primary_image__image']) if room['primary_image__image'] else None,
+            'price': float(room['price']),
+            'description': room['description'] or '',
+            'created_at': room['created_at'].isoformat() if room['created_at'] else None,
+        }
+        for room in page['results']
+    ]
+    return JsonResponse(page)
 
 @login_required
 @csrf_exempt
@@ -208,15 +207,9 @@ def create_room_api(request):
         hotel_param = request.GET.get('hotel') or data.get('hotel') or data.get('hotel_id') or data.get('hotel_slug')
         hotel = None
         if hotel_param:
-            try:
-                hotel = Hotel.objects.get(id=int(hotel_param))
-            except Exception:
-                try:
-                    hotel = Hotel.objects.get(slug=str(hotel_param))
-                except Hotel.DoesNotExist:
-                    hotel = None
+            hotel = resolve_hotel(hotel_param)
         if hotel is None:
-            hotel = Hotel.objects.order_by('id').first()
+            hotel = get_default_hotel()
         if hotel is None:
             return JsonResponse({'error': 'Hotel no encontrado para asociar la habitación'}, status=400)
         
@@ -389,18 +382,7 @@ def rooms_statistics(request):
 # Nueva vista: exportación CSV de habitaciones
 @login_required
 def export_rooms_csv(request):
-    import csv
-    from django.http import HttpResponse
-
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="habitaciones.csv"'
-
-    writer = csv.writer(response)
-    # Encabezados
-    writer.writerow([
-        'Numero', 'Tipo', 'Capacidad', 'Piso', 'Precio', 'Estado', 'Activa', 'Descripcion'
-    ])
-
+    """Exporta habitaciones a CSV con los filtros de la vista (en streaming, sin límite de filas)"""
     # Filtros opcionales (coherentes con la vista)
     rooms_qs = Room.objects.all().order_by('number')
     status_filter = request.GET.get('status')
@@ -417,19 +399,26 @@ def export_rooms_csv(request):
     if search:
         rooms_qs = rooms_qs.filter(Q(number__icontains=search) | Q(description__icontains=search))
 
-    for room in rooms_qs:
-        writer.writerow([
-            room.number,
-            room.get_type_display() if hasattr(room, 'get_type_display') else room.type,
-            room.capacity,
-            room.floor,
-            room.price,
-            room.get_status_display() if hasattr(room, 'get_status_display') else room.status,
-            'Sí' if room.active else 'No',
-            (room.description or '').replace('\n', ' ').strip()
-        ])
+    type_labels = dict(Room.TYPE_CHOICES)
+    status_labels = dict(Room.STATUS_CHOICES)
+    values = rooms_qs.values_list('number', 'type', 'capacity', 'floor', 'price', 'status', 'active', 'description')
 
-    return response
+    def rows():
+        for number, room_type, capacity, floor, price, status, active, description in values.iterator(chunk_size=CSV_CHUNK_SIZE):
+            yield [
+                number,
+                type_labels.get(room_type, room_type),
+                capacity,
+                floor,
+                price,
+                status_labels.get(status, status),
+                'Sí' if active else 'No',
+                (description or '').replace('\n', ' ').strip()
+            ]
+
+    return stream_csv_response(rows(), [
+        'Numero', 'Tipo', 'Capacidad', 'Piso', 'Precio', 'Estado', 'Activa', 'Descripcion'
+    ], 'habitaciones.csv')
 
 @login_required
 @require_http_methods(["GET"])
@@ -459,3 +448,16 @@ def room_detail_api(request, room_id):
         ],
     }
     return JsonResponse(data)
+
+
+@require_http_methods(["GET", "HEAD"])
+def room_image_derivative(request, name):
+    """Sirve un derivado de imagen; el nombre incluye el hash del contenido, así que nunca cambia"""
+    path = f'{DERIVATIVES_DIR}/{name}'
+    storage = RoomImage._meta.get_field('image').storage
+    if name.startswith('.') or not name.endswith(('.webp', '.jpg')) or not storage.exists(path):
+        raise Http404('Imagen no encontrada')
+    content_type = 'image/webp' if name.endswith('.webp') else 'image/jpeg'
+    response = FileResponse(storage.open(path, 'rb'), content_type=content_type)
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -1,55 +1,103 @@
 from typing import Optional, Dict, Any
-from datetime import date
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from datetime import date, timedelta
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from app.bookings.models import Booking
+from app.core.models import DailyHotelStats
+from app.core.series import build_series
+from app.core.services_stats import stats_queryset, summarize_stats
 from app.rooms.models import Room
 from app.administration.models import Hotel
 
+FLEET_COUNTERS = (
+    "rooms",
+    "occupied_rooms",
+    "arrivals_today",
+    "pending_today",
+    "confirmed_today",
+    "bookings_today",
+    "confirmed_spans_today",
+    "bookings_this_week",
+)
+
+
+def get_fleet_summary(today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Contadores por hotel para el panel superadmin en un número constante de consultas
+    (hoteles, habitaciones, reservas y estadísticas diarias), sin importar cuántos hoteles haya.
+
+    - rooms: habitaciones del hotel
+    - occupied_rooms / arrivals_today: de DailyHotelStats del día
+    - pending_today / confirmed_today: reservas que pernoctan hoy (check_in <= hoy < check_out)
+    - bookings_today: reservas de cualquier estado cuya estadía incluye hoy, también el día
+      de salida (check_in <= hoy <= check_out)
+    - confirmed_spans_today: las confirmadas de bookings_today (incluye a quien sale hoy)
+    - bookings_this_week: reservas con check-in en la semana actual (lunes a domingo)
+    """
+    today = today or timezone.now().date()
+    start_week = today - timedelta(days=today.weekday())
+    end_week = start_week + timedelta(days=6)
+
+    hotels = list(Hotel.objects.all().order_by("name"))
+    counters: Dict[int, Dict[str, int]] = {h.id: {name: 0 for name in FLEET_COUNTERS} for h in hotels}
+
+    for row in Room.objects.filter(hotel__isnull=False).values("hotel_id").annotate(total=Count("id")):
+        if row["hotel_id"] in counters:
+            counters[row["hotel_id"]]["rooms"] = row["total"]
+
+    in_house = Q(check_in_date__lte=today, check_out_date__gt=today)
+    spans_today = Q(check_in_date__lte=today, check_out_date__gte=today)
+    this_week = Q(check_in_date__gte=start_week, check_in_date__lte=end_week)
+    booking_rows = (
+        Booking.objects.filter(hotel__isnull=False)
+        .filter(spans_today | this_week)
+        .values("hotel_id")
+        .annotate(
+            pending_today=Count("id", filter=in_house & Q(status="pending")),
+            confirmed_today=Count("id", filter=in_house & Q(status="confirmed")),
+            bookings_today=Count("id", filter=spans_today),
+            confirmed_spans_today=Count("id", filter=spans_today & Q(status="confirmed")),
+            bookings_this_week=Count("id", filter=this_week),
+        )
+    )
+    for row in booking_rows:
+        if row["hotel_id"] in counters:
+            for name in ("pending_today", "confirmed_today", "bookings_today", "confirmed_spans_today", "bookings_this_week"):
+                counters[row["hotel_id"]][name] = row[name]
+
+    for row in DailyHotelStats.objects.filter(date=today).values("hotel_id", "occupied_rooms", "arrivals"):
+        if row["hotel_id"] in counters:
+            counters[row["hotel_id"]]["occupied_rooms"] = row["occupied_rooms"]
+            counters[row["hotel_id"]]["arrivals_today"] = row["arrivals"]
+
+    items = [{"hotel": h, **counters[h.id]} for h in hotels]
+    totals = {name: sum(item[name] for item in items) for name in FLEET_COUNTERS}
+    return {"date": today, "hotels": items, "totals": totals}
+
 
 def get_dashboard_data(scope: str, hotel: Optional[Hotel], desde: date, hasta: date) -> Dict[str, Any]:
-    bookings_qs = Booking.objects.filter(check_in_date__range=(desde, hasta))
+    # Todas las métricas se leen de DailyHotelStats: una fila por hotel y día
+    scoped_hotel = hotel if scope == "hotel" and hotel is not None else None
     rooms_qs = Room.objects.all()
-    if scope == "hotel" and hotel is not None:
-        bookings_qs = bookings_qs.filter(hotel=hotel)
-        rooms_qs = rooms_qs.filter(hotel=hotel)
+    if scoped_hotel is not None:
+        rooms_qs = rooms_qs.filter(hotel=scoped_hotel)
     today = timezone.now().date()
-    active_today_qs = Booking.objects.filter(check_in_date__lte=today, check_out_date__gt=today, status="confirmed")
-    if scope == "hotel" and hotel is not None:
-        active_today_qs = active_today_qs.filter(hotel=hotel)
-    occupied_rooms_count = active_today_qs.values("room").distinct().count()
+    today_stats = summarize_stats(today, today, scoped_hotel)
     total_rooms = rooms_qs.count()
-    occupancy_today = None if total_rooms == 0 else occupied_rooms_count / total_rooms
-    checkin_qs = Booking.objects.filter(check_in_date=today)
-    if scope == "hotel" and hotel is not None:
-        checkin_qs = checkin_qs.filter(hotel=hotel)
-    bookings_checkin_today_total = checkin_qs.count()
-    reservations_period_count = bookings_qs.count()
-    daily = bookings_qs.annotate(d=TruncDate("check_in_date")).values("d", "status").annotate(count=Count("id")).order_by("d")
-    daily_map: Dict[str, Dict[str, int]] = {}
-    for row in daily:
-        d = row["d"].isoformat()
-        s = row["status"]
-        c = row["count"]
-        if d not in daily_map:
-            daily_map[d] = {"pending": 0, "confirmed": 0, "cancelled": 0}
-        if s in daily_map[d]:
-            daily_map[d][s] += c
-    daily_bookings = [{"date": d, **daily_map[d]} for d in sorted(daily_map.keys())]
-    status_counts = bookings_qs.values("status").annotate(count=Count("id"))
-    status_dist = {"pending": 0, "confirmed": 0, "cancelled": 0}
-    for row in status_counts:
-        s = row["status"]
-        c = row["count"]
-        if s in status_dist:
-            status_dist[s] = c
+    occupancy_today = None if total_rooms == 0 else today_stats["occupied_rooms"] / total_rooms
+    period_stats = summarize_stats(desde, hasta, scoped_hotel)
+    daily = build_series(
+        stats_queryset(desde, hasta, scoped_hotel), "date", desde, hasta, bucket="day",
+        metrics={"pending": Sum("pending"), "confirmed": Sum("confirmed"), "cancelled": Sum("cancelled")},
+    )
+    daily_bookings = [{"date": row.pop("period").isoformat(), **row} for row in daily]
+    status_dist = {s: period_stats[s] for s in ("pending", "confirmed", "cancelled")}
     return {
         "kpis": {
             "occupancy_today": occupancy_today,
-            "bookings_checkin_today_total": bookings_checkin_today_total,
-            "reservations_period_count": reservations_period_count,
+            "bookings_checkin_today_total": today_stats["total_bookings"],
+            "reservations_period_count": period_stats["total_bookings"],
         },
         "series": {"daily_bookings": daily_bookings},
         "distributions": {"status": status_dist},
-    }
\ No newline at end of file
+    }
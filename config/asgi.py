@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Servido con un servidor ASGI (p. ej. ``uvicorn config.asgi:application``), el
+endpoint de eventos en vivo del dashboard (/api/dashboard-events/, vista
+asíncrona en app/core/views.py) mantiene cada conexión como una corrutina
+esperando avisos del bus en proceso de app/core/events.py, sin ocupar un hilo.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from decouple import config as env_config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -90,6 +91,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'app.administration.resolver.HotelResolverMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -134,6 +136,48 @@ if DATABASE_URL:
         # Si no está instalado dj_database_url, se mantiene SQLite
         pass
 
+# Caché: CACHE_BACKEND=locmem (por defecto, por proceso), file (CACHE_LOCATION=directorio)
+# o redis (CACHE_LOCATION=redis://host:6379/0, requiere el paquete redis)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'o11ce',
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', '300')),
+    }
+}
+if CACHE_BACKEND == 'file':
+    CACHES['default'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    })
+elif CACHE_BACKEND == 'redis':
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        # Sin redis no caer a locmem en silencio: las invalidaciones y los 304 dependen de una caché compartida
+        raise ImproperlyConfigured('CACHE_BACKEND=redis requiere el paquete redis (pip install -r requirements.txt)')
+    CACHES['default'].update({
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/0'),
+    })
+
+# Caché de las páginas públicas por hotel (app/core/cache.py)
+PORTAL_CACHE_ALIAS = 'default'
+PORTAL_CACHE_TIMEOUT = int(os.environ.get('PORTAL_CACHE_TIMEOUT', '300'))
+# Sorteo de habitaciones destacadas: uniform, type o price (app/rooms/featured.py)
+FEATURED_ROOMS_WEIGHTING = os.environ.get('FEATURED_ROOMS_WEIGHTING', 'uniform')
+
+# Hoteles resueltos por slug/id en cada proceso (app/administration/resolver.py)
+HOTEL_RESOLVER_MAXSIZE = 512
+HOTEL_RESOLVER_TTL = int(os.environ.get('HOTEL_RESOLVER_TTL', '60'))
+
+# Keep-alive (segundos) de los eventos en vivo del dashboard (app/core/events.py)
+DASHBOARD_EVENTS_HEARTBEAT = int(os.environ.get('DASHBOARD_EVENTS_HEARTBEAT', '15'))
+
+# Perfil de consultas de los caminos de guardado (app/core/profiling.py, logger app.profiling)
+SAVE_PATH_PROFILE = os.environ.get('SAVE_PATH_PROFILE', 'False') == 'True'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -178,6 +222,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Archivos subidos (imágenes de habitaciones y sus derivados)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -226,7 +274,7 @@ else:
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
-EMAIL_USE_SSL = os.environ.get('EMAIL_USE_SSL', 'False') == 'False'
+EMAIL_USE_SSL = os.environ.get('EMAIL_USE_SSL', 'False') == 'True'
 EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '20'))
 
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
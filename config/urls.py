@@ -15,6 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
@@ -27,20 +29,20 @@ from django.http import HttpResponse
 import json
 from enum import Enum
 from app.clients.views import clients_api_collection, clients_api_detail
-from app.bookings.views import bookings_api_collection, booking_api_detail, create_booking_api, update_booking_api
+from app.bookings.views import bookings_api_collection, booking_api_detail, create_booking_api, import_bookings_api, update_booking_api
 
 # Importar vistas web
 from app.core.views import (
     login_view, register_view, logout_view, dashboard_view,
     profile_view, settings_view, bookings_view,
     clients_view, cleaning_view, maintenance_view,
-    administration_view, reports_view, dashboard_metrics_api,
+    administration_view, reports_view, dashboard_metrics_api, dashboard_events_view,
     # Vistas del portal de clientes
     client_index_view, client_rooms_view, client_room_detail_view,
     client_booking_view, client_my_bookings_view, client_booking_detail_view,
     client_booking_confirmation_view,
     client_cancel_booking_view, client_profile_view, client_login_view,
-    client_register_view, client_logout_view, get_room_availability,
+    client_register_view, client_logout_view, get_room_availability, get_rooms_availability,
     hotel_reserve_view, hotel_confirm_reservation_view,
     panel_change_booking_status,
     superadmin_dashboard_view,
@@ -70,7 +72,7 @@ from app.core.views import (
     panel_administration_hotel_view, panel_reports_hotel_view, panel_change_booking_status_hotel_view
 )
 from app.core.views import client_simulate_payment_view, client_booking_pdf_view, health_view
-from app.rooms.views import rooms_view, rooms_api_collection, room_api_detail, export_rooms_csv, room_detail_api
+from app.rooms.views import rooms_view, rooms_api_collection, room_api_detail, export_rooms_csv, room_detail_api, room_image_derivative
 from app.bookings.views import export_bookings_csv
 
 # Importar vistas de reservas
@@ -394,11 +396,13 @@ urlpatterns = [
 
     # Endpoints REST de reservas para el dashboard
     path("api/bookings/", bookings_api_collection, name="bookings_api_collection"),
+    path("api/bookings/import/", import_bookings_api, name="import_bookings_api"),
     path("api/bookings/<int:booking_id>/", booking_api_detail, name="booking_api_detail"),
     
     # Rutas web
     path("", dashboard_view, name="dashboard"),
     path("api/dashboard-metrics/", dashboard_metrics_api, name="dashboard_metrics_api"),
+    path("api/dashboard-events/", dashboard_events_view, name="dashboard_events"),
     path("login/", login_view, name="login"),
     path("register/", register_view, name="register"),
     path("logout/", logout_view, name="logout"),
@@ -446,6 +450,7 @@ urlpatterns = [
     path("portal/booking/confirmation/<int:booking_id>/", client_booking_confirmation_view, name="client_booking_confirmation"),
     path("portal/profile/", client_profile_view, name="client_profile"),
     path("portal/room-availability/<int:room_id>/", get_room_availability, name="room_availability"),
+    path("portal/rooms-availability/", get_rooms_availability, name="rooms_availability"),
 
     # Rutas slug-based del portal por hotel
     path("h/<slug:hotel_slug>/portal/", client_index_hotel_view, name="client_index_hotel"),
@@ -521,4 +526,9 @@ urlpatterns = [
     path("superadmin/api/ia/chat/", superadmin_api_ia_chat, name="superadmin_api_ia_chat"),
     path("superadmin/api/hotels", superadmin_api_hotels, name="superadmin_api_hotels"),
     path("health/", health_view, name="health"),
+    # Derivados de imágenes (nombre con hash del contenido): caché HTTP de un año
+    path(f"{settings.MEDIA_URL.strip('/')}/rooms/derivatives/<str:name>", room_image_derivative, name="room_image_derivative"),
 ]
+
+# Imágenes originales subidas (en producción las sirve el servidor web)
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)